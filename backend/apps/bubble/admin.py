@@ -16,11 +16,11 @@ class DifficultyAdmin(admin.ModelAdmin):
     """
     Administração do modelo Difficulty.
     
-    - Exibe nome e pontos associados à dificuldade.
+    - Exibe nome, pontos e intervalo entre check-ins associados à dificuldade.
     - Permite busca pelo nome da dificuldade.
     - Ordena a listagem com base nos pontos por atividade.
     """
-    list_display = ('name', 'points_for_activity')  # Exibe nome e pontos de atividade
+    list_display = ('name', 'points_for_activity', 'cooldown_hours')  # Exibe nome, pontos de atividade e intervalo
     search_fields = ('name',)  # Permite busca pelo nome
     ordering = ('points_for_activity',)  # Ordena por pontos de atividade
 
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class BolhaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.bubble'
+
+    def ready(self):
+        from utils.checks import check_shared_cache
+
+        # A versão da escada de ranks (apps.bubble.ranks) precisa ser vista por todos os workers
+        checks.register(check_shared_cache, checks.Tags.caches)
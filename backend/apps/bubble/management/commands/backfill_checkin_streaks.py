@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.bubble.models import Bubble, CheckIn, advance_streak
+from apps.users.models import local_date
+
+"""
+    Comando para (re)calcular as sequências de dias com check-in das bolhas.
+
+    Uso: python manage.py backfill_checkin_streaks [--batch-size 500]
+
+    As sequências (`current_streak`, `longest_streak`, `last_checkin_local_date`) são mantidas pelo
+    check-in; este comando as preenche para dados anteriores a essas colunas ou corrige divergências.
+    Percorre as bolhas em lotes por faixa de id; para cada lote, lê os check-ins em ordem
+    cronológica (índice em (bubble, created_at, id)), aplica a mesma regra do check-in na data local
+    do fuso de cada usuário e grava o lote com um bulk_update.
+
+    As linhas do lote ficam travadas enquanto ele é recalculado; um check-in concorrente que tenha
+    lido a bolha antes refaz a leitura (ver `Bubble.objects.check_in`).
+"""
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as sequências de dias com check-in das bolhas a partir do histórico.'
+
+    fields = ['current_streak', 'longest_streak', 'last_checkin_local_date']
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Quantidade de bolhas por lote.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        total = 0
+
+        while True:
+            ids = list(Bubble.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+
+            total += self.backfill(ids)
+            last_id = ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f'{total} bolhas recalculadas.'))
+
+    def backfill(self, ids):
+        with transaction.atomic():
+            bubbles = {
+                bubble.pk: bubble
+                for bubble in Bubble.objects.select_for_update(of=('self',))
+                .filter(pk__in=ids)
+                .select_related('user')
+                .only('pk', 'user__timezone')
+            }
+            for bubble in bubbles.values():
+                bubble.current_streak, bubble.longest_streak, bubble.last_checkin_local_date = 0, 0, None
+
+            check_ins = (
+                CheckIn.objects.filter(bubble_id__in=ids)
+                .order_by('bubble_id', 'created_at', 'id')
+                .values_list('bubble_id', 'created_at')
+            )
+            for bubble_id, created_at in check_ins.iterator():
+                bubble = bubbles[bubble_id]
+                today = local_date(created_at, bubble.user.timezone)
+                bubble.current_streak, bubble.longest_streak = advance_streak(
+                    bubble.current_streak, bubble.longest_streak, bubble.last_checkin_local_date, today
+                )
+                bubble.last_checkin_local_date = today
+
+            return Bubble.objects.bulk_update(bubbles.values(), self.fields)
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:45
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_checkin_totals(apps, schema_editor):
+    """ Preenche os totais de check-ins e de XP das bolhas existentes. """
+    Bubble = apps.get_model('bubble', 'Bubble')
+    CheckIn = apps.get_model('bubble', 'CheckIn')
+
+    check_ins = CheckIn.objects.filter(bubble=OuterRef('pk')).values('bubble')
+    Bubble.objects.update(
+        checkin_count=Coalesce(Subquery(check_ins.annotate(total=Count('*')).values('total')), 0),
+        total_xp=Coalesce(Subquery(check_ins.annotate(total=Sum('xp_earned')).values('total')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bubble', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bubble',
+            name='checkin_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='bubble',
+            name='total_xp',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='checkin',
+            index=models.Index(fields=['bubble', 'created_at', 'id'], name='bubble_checkin_history_idx'),
+        ),
+        migrations.RunPython(backfill_checkin_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:49
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+
+
+def backfill_last_checkin_at(apps, schema_editor):
+    """ Preenche o último check-in das bolhas existentes. """
+    Bubble = apps.get_model('bubble', 'Bubble')
+    CheckIn = apps.get_model('bubble', 'CheckIn')
+
+    last = CheckIn.objects.filter(bubble=OuterRef('pk')).values('bubble').annotate(last=Max('created_at')).values('last')
+    Bubble.objects.update(last_checkin_at=Subquery(last))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bubble', '0002_bubble_checkin_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bubble',
+            name='last_checkin_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='difficulty',
+            name='cooldown_hours',
+            field=models.PositiveIntegerField(default=24),
+        ),
+        migrations.RunPython(backfill_last_checkin_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bubble', '0003_bubble_last_checkin_cooldown'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bubble',
+            name='current_streak',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='bubble',
+            name='last_checkin_local_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='bubble',
+            name='longest_streak',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,7 +1,11 @@
-from django.db import models
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models import F, Q
 from django.utils import timezone
 from django.dispatch import receiver
-from apps.users.models import Users
+from apps.users.models import Users, local_date
+from apps.bubble import ranks
 
 """
     Modelos de dados para Bolhas e Check-Ins.
@@ -10,16 +14,20 @@ from apps.users.models import Users
     - Rank: Define os ranks das bolhas, baseados na dificuldade e pontuação acumulada.
     - Bubble: Representa uma bolha associada a um usuário, armazenando progresso e rank.
     - CheckIn: Registra atividades realizadas dentro de uma bolha, atribuindo pontos de experiência.
+    - BubbleQuerySet.check_in: Registra um check-in e atualiza progresso, rank e último check-in em
+      uma transação, com o intervalo mínimo garantido por um UPDATE condicional.
 
     Também inclui um sinal `post_migrate` que cria automaticamente ranks padrão após a migração do banco de dados.
 """
 
 class Difficulty(models.Model):
     """
-    Define os níveis de dificuldade das atividades, determinando quantos pontos cada uma vale.
+    Define os níveis de dificuldade das atividades, determinando quantos pontos cada uma vale e o
+    intervalo mínimo entre check-ins das bolhas nos ranks desta dificuldade.
     """
     name = models.CharField(max_length=100, unique=True)  # Nome da dificuldade (ex.: Fácil, Médio, Difícil)
     points_for_activity = models.PositiveIntegerField()  # Pontos atribuídos por atividade nesta dificuldade
+    cooldown_hours = models.PositiveIntegerField(default=24)  # Horas mínimas entre check-ins
 
     class Meta:
         verbose_name = 'Difficulty'
@@ -45,13 +53,141 @@ class Rank(models.Model):
         return f"{self.name} ({self.difficulty.name})"
 
 
+class CheckInNotAllowed(Exception):
+    """ O check-in foi recusado (ex.: feito antes do intervalo mínimo). """
+
+
+class CheckInContention(Exception):
+    """ A bolha mudou por escritas concorrentes em todas as tentativas; o envio pode ser repetido. """
+
+
+def cooldown_message(hours):
+    return f'Um novo Check-in só pode ser feito após {hours} horas.'
+
+
+def advance_streak(current, longest, last_date, today):
+    """
+    Sequências de dias após um check-in na data local `today`, dado o último dia com check-in.
+    Retorna (atual, maior).
+    """
+    if last_date == today:
+        current = max(current, 1)  # Outro check-in no mesmo dia não altera a sequência
+    elif last_date is not None and today - last_date == timedelta(days=1):
+        current += 1
+    else:
+        current = 1
+    return current, max(longest, current)
+
+
+class BubbleQuerySet(models.QuerySet):
+    check_in_attempts = 3
+
+    def check_in(self, user_id, description=''):
+        """
+        Registra um check-in na bolha do usuário.
+
+        1. Leitura da bolha pelo usuário (rank, progresso, sequências, `last_checkin_at` e o fuso do
+           usuário): um check-in dentro do intervalo da dificuldade do rank atual é recusado aqui,
+           sem escrita;
+        2. Em uma transação, um UPDATE condicional grava `last_checkin_at`, o novo progresso (ou a
+           promoção para o maior rank alcançado, zerando o progresso), os totais e as sequências de
+           dias (na data local do usuário), apenas se `last_checkin_at` ainda estiver fora do
+           intervalo e a linha ainda for a lida (mesmo rank, progresso e último check-in);
+        3. INSERT do check-in com o XP da dificuldade do rank atual.
+
+        O WHERE do UPDATE é a trava: de dois envios simultâneos, só um atualiza a linha; o outro
+        encontra `last_checkin_at` recente (0 linhas) e é recusado. Se a linha mudou por outra
+        escrita sem cair no intervalo, a leitura é refeita; esgotadas as tentativas, uma última
+        leitura separa o intervalo de fato (CheckInNotAllowed) da disputa (CheckInContention).
+
+        XP, intervalo e promoção vêm da escada de ranks em memória (ver apps.bubble.ranks), sem
+        consultar Rank ou Difficulty.
+
+        Retorna o check-in criado. Levanta Bubble.DoesNotExist se o usuário não tiver bolha,
+        CheckInNotAllowed se o último check-in for recente demais e CheckInContention se a bolha não
+        parou de mudar durante as tentativas.
+        """
+        ladder = ranks.get_ladder()
+        for _ in range(self.check_in_attempts):
+            state = self.filter(user_id=user_id).values(
+                'pk', 'rank_id', 'progress', 'last_checkin_at', 'last_checkin_local_date',
+                'current_streak', 'longest_streak', 'user__timezone',
+            ).first()
+            if state is None:
+                raise self.model.DoesNotExist('A Bolha não foi encontrada')
+
+            rank = ladder[state['rank_id']]
+            now = timezone.now()
+            allowed_since = now - timedelta(hours=rank.cooldown_hours)
+            if state['last_checkin_at'] is not None and state['last_checkin_at'] > allowed_since:
+                raise CheckInNotAllowed(cooldown_message(rank.cooldown_hours))
+
+            xp = rank.points_for_activity
+            promotion = ladder.promotion(rank.id, state['progress'] + xp)
+            today = local_date(now, state['user__timezone'])
+            current_streak, longest_streak = advance_streak(
+                state['current_streak'], state['longest_streak'], state['last_checkin_local_date'], today
+            )
+            changes = {
+                'last_checkin_at': now,
+                'last_checkin_local_date': today,
+                'current_streak': current_streak,
+                'longest_streak': longest_streak,
+                'checkin_count': F('checkin_count') + 1,
+                'total_xp': F('total_xp') + xp,
+            }
+            if promotion is not None:
+                changes.update(rank=promotion.id, progress=0)
+            else:
+                changes.update(progress=state['progress'] + xp)
+
+            if state['last_checkin_at'] is None:
+                unchanged = Q(last_checkin_at__isnull=True)
+            else:
+                unchanged = Q(last_checkin_at=state['last_checkin_at'], last_checkin_at__lte=allowed_since)
+            # Também detecta sequências recalculadas por `backfill_checkin_streaks` depois da leitura
+            if state['last_checkin_local_date'] is None:
+                unchanged &= Q(last_checkin_local_date__isnull=True)
+            else:
+                unchanged &= Q(last_checkin_local_date=state['last_checkin_local_date'])
+
+            with transaction.atomic():
+                claimed = (
+                    self.filter(unchanged, pk=state['pk'], rank_id=rank.id, progress=state['progress'])
+                    .update(**changes)
+                )
+                if claimed:
+                    return CheckIn.objects.create(
+                        bubble_id=state['pk'], description=description, xp_earned=xp, created_at=now
+                    )
+
+        state = self.filter(user_id=user_id).values('rank_id', 'last_checkin_at').first()
+        if state is not None and state['last_checkin_at'] is not None:
+            rank = ladder[state['rank_id']]
+            if state['last_checkin_at'] > timezone.now() - timedelta(hours=rank.cooldown_hours):
+                raise CheckInNotAllowed(cooldown_message(rank.cooldown_hours))
+        raise CheckInContention('A bolha foi alterada por outra requisição. Tente novamente.')
+
+
 class Bubble(models.Model):
     """
     Representa uma bolha associada a um usuário, registrando seu progresso e rank atual.
+
+    `checkin_count`, `total_xp`, `last_checkin_at` e as sequências de dias são desnormalizados,
+    mantidos por `Bubble.objects.check_in` (e recalculáveis com `backfill_checkin_streaks`). As
+    sequências usam a data local no fuso do usuário (`last_checkin_local_date`).
     """
     user = models.ForeignKey(Users, on_delete=models.CASCADE)  # Usuário proprietário da bolha
     progress = models.PositiveIntegerField(default=0)  # Pontuação acumulada dentro da bolha
     rank = models.ForeignKey(Rank, on_delete=models.SET_DEFAULT, default=1)  # Rank atual do usuário na bolha
+    checkin_count = models.PositiveIntegerField(default=0)  # Total de check-ins da bolha
+    total_xp = models.PositiveIntegerField(default=0)  # XP somado de todos os check-ins (não zera na promoção)
+    last_checkin_at = models.DateTimeField(null=True, blank=True)  # Data/hora do último check-in
+    last_checkin_local_date = models.DateField(null=True, blank=True)  # Dia do último check-in no fuso do usuário
+    current_streak = models.PositiveIntegerField(default=0)  # Dias seguidos com check-in até o último
+    longest_streak = models.PositiveIntegerField(default=0)  # Maior sequência de dias já alcançada
+
+    objects = BubbleQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Bubble"
@@ -60,6 +196,12 @@ class Bubble(models.Model):
     def __str__(self):
         return f"Bolha de {self.user}"
 
+    def active_streak(self, today):
+        """ Sequência atual vista na data local `today`: vale até o fim do dia seguinte ao último check-in. """
+        if self.last_checkin_local_date is None or today - self.last_checkin_local_date > timedelta(days=1):
+            return 0
+        return self.current_streak
+
 
 class CheckIn(models.Model):
     """
@@ -73,6 +215,10 @@ class CheckIn(models.Model):
     class Meta:
         verbose_name = "Check-In"
         verbose_name_plural = "Check-Ins"
+        indexes = [
+            # Histórico por bolha em ordem cronológica (paginação por keyset e filtros por data)
+            models.Index(fields=['bubble', 'created_at', 'id'], name='bubble_checkin_history_idx'),
+        ]
 
     def __str__(self):
         return f"Check-In {self.pk}"
@@ -109,25 +255,13 @@ def create_default_ranks(sender, **kwargs):
         for rank_name, difficulty, points in ranks:
             Rank.objects.get_or_create(name=rank_name, difficulty=difficulty, points=points)
 
-@receiver(models.signals.pre_save, sender=CheckIn)
-def increment_points_for_bubble(sender, instance, **kwargs):
-    bubble = instance.bubble  
-    difficulty = bubble.rank.difficulty  
-
-    if difficulty:  
-        # Atualiza o progresso da bolha  
-        bubble.progress += difficulty.points_for_activity  
-        bubble.save()  
-
-@receiver(models.signals.post_save, sender=CheckIn)
-def upgrade_rank(sender, instance, **kwargs):
-    bubble = instance.bubble  
-
-    next_rank = Rank.objects.filter(points__lte=bubble.progress).order_by('-points').first()  
-    if next_rank and next_rank != bubble.rank:  
-        bubble.rank = next_rank  
-        bubble.progress = 0  
-        bubble.save()  
+@receiver(models.signals.post_save, sender=Rank)
+@receiver(models.signals.post_delete, sender=Rank)
+@receiver(models.signals.post_save, sender=Difficulty)
+@receiver(models.signals.post_delete, sender=Difficulty)
+def invalidate_rank_ladder(sender, **kwargs):
+    """ Edições de ranks/dificuldades (ex.: pelo admin) invalidam a escada em todos os processos. """
+    ranks.invalidate()
 
 @receiver(models.signals.post_save, sender=Users)
 def create_bubble(sender, instance, created, **kwargs):
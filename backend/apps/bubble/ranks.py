@@ -0,0 +1,126 @@
+import threading
+import time
+from bisect import bisect_right
+from types import MappingProxyType
+from typing import NamedTuple
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+"""
+    Escada de ranks em memória.
+
+    Os ranks (com suas dificuldades) são poucas linhas que quase nunca mudam, mas eram consultados a
+    cada check-in e a cada renderização da bolha. Cada processo guarda uma cópia imutável da escada
+    (pontos ordenados + dados da dificuldade) e procura a promoção com bisect.
+
+    A cópia é validada por um número de versão no cache compartilhado: salvar ou excluir um Rank ou
+    uma Difficulty (ex.: pelo admin) incrementa a versão via sinais em models.py, e cada processo
+    recarrega a escada na próxima leitura. O cache precisa ser compartilhado entre os workers (a
+    verificação ecoviva.E001 falha caso contrário); como rede de segurança, para escritas que não
+    passam pelos sinais (ex.: update() direto), cada processo também recarrega a escada depois de
+    BUBBLE_RANKS_TTL segundos.
+
+    - get_ladder: Escada atual (uma leitura do cache; o banco só é consultado quando a versão muda).
+    - invalidate: Incrementa a versão, forçando a recarga em todos os processos.
+"""
+
+VERSION_KEY = 'bubble:ranks:version'
+
+
+class RankEntry(NamedTuple):
+    id: int
+    name: str
+    points: int
+    difficulty_id: int
+    difficulty_name: str
+    points_for_activity: int
+    cooldown_hours: int
+
+
+class RankLadder:
+    """ Ranks ordenados por pontos. Imutável: uma nova versão gera uma nova instância. """
+
+    def __init__(self, entries, version=None):
+        self.loaded_at = time.monotonic()
+        self.entries = tuple(sorted(entries, key=lambda entry: (entry.points, entry.id)))
+        self.points = tuple(entry.points for entry in self.entries)
+        self.by_id = MappingProxyType({entry.id: entry for entry in self.entries})
+        self.version = version
+
+    def __getitem__(self, rank_id):
+        return self.by_id[rank_id]
+
+    def __contains__(self, rank_id):
+        return rank_id in self.by_id
+
+    def reached(self, progress):
+        """ Maior rank cuja pontuação é alcançada por `progress` (ou None). """
+        index = bisect_right(self.points, progress) - 1
+        return self.entries[index] if index >= 0 else None
+
+    def promotion(self, rank_id, progress):
+        """ Rank para o qual a bolha deve ser promovida com `progress`, ou None se continuar no atual. """
+        reached = self.reached(progress)
+        if reached is None or reached.points <= self.by_id[rank_id].points:
+            return None
+        return reached
+
+
+_lock = threading.Lock()
+_ladder = None
+
+
+def _load(version):
+    Rank = apps.get_model('bubble', 'Rank')
+    rows = Rank.objects.values_list(
+        'id', 'name', 'points', 'difficulty_id', 'difficulty__name', 'difficulty__points_for_activity',
+        'difficulty__cooldown_hours',
+    )
+    return RankLadder((RankEntry(*row) for row in rows), version)
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)  # Recomeça num valor que não coincide com o anterior
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _is_stale(ladder, version):
+    return (
+        ladder is None
+        or ladder.version != version
+        or time.monotonic() - ladder.loaded_at >= settings.BUBBLE_RANKS_TTL
+    )
+
+
+def get_ladder():
+    global _ladder
+    version = get_version()
+    ladder = _ladder
+    if _is_stale(ladder, version):
+        with _lock:
+            if _is_stale(_ladder, version):
+                _ladder = _load(version)
+            ladder = _ladder
+    return ladder
+
+
+def _bump():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:  # Sem versão no cache: a próxima leitura cria uma nova
+        pass
+
+
+def invalidate():
+    """
+    Incrementa na hora e de novo após o commit, descartando uma escada antiga que outro processo
+    tenha carregado enquanto a transação estava aberta.
+    """
+    _bump()
+    transaction.on_commit(_bump)
@@ -1,8 +1,8 @@
-from rest_framework import serializers
 from django.utils import timezone
-from datetime import timedelta
+from rest_framework import serializers
 
-from . import models
+from apps.users.models import local_date
+from . import models, ranks
 
 """
     Serializers responsáveis pela conversão dos dados dos models em JSON e vice-versa.
@@ -10,7 +10,8 @@ from . import models
     Este arquivo contém os serializers para os modelos:
     - Difficulty: Serializa os níveis de dificuldade.
     - Rank: Serializa os ranks, incluindo a dificuldade associada.
-    - CheckIn: Valida a criação de check-ins e atribui pontos automaticamente.
+    - LadderRankField: Rank da bolha a partir da escada de ranks em memória.
+    - CheckIn: Serializa os check-ins (a criação é feita por `Bubble.objects.check_in`).
     - Bubble: Serializa as bolhas, incluindo rank e check-ins associados.
 """
 
@@ -40,47 +41,44 @@ class RankSerializer(serializers.ModelSerializer):
         model = models.Rank
         fields = '__all__'  # Inclui todos os campos do modelo
 
+class LadderRankField(serializers.Field):
+    """
+    Rank da bolha lido da escada em memória (apps.bubble.ranks) pelo `rank_id`, sem JOIN com Rank
+    e Difficulty. Mantém o formato do RankSerializer.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = 'rank_id'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, rank_id):
+        rank = ranks.get_ladder()[rank_id]
+        return {
+            'id': rank.id,
+            'difficulty': {
+                'id': rank.difficulty_id,
+                'name': rank.difficulty_name,
+                'points_for_activity': rank.points_for_activity,
+                'cooldown_hours': rank.cooldown_hours,
+            },
+            'name': rank.name,
+            'points': rank.points,
+        }
+
 # Serializer para o modelo CheckIn
 class CheckInSerializer(serializers.ModelSerializer):
     """
-    Serializa o modelo CheckIn e implementa validações.
+    Serializa o modelo CheckIn.
 
-    - Impede que um usuário faça mais de um Check-In dentro de 24 horas.
-    - Atribui automaticamente a quantidade de pontos ao Check-In.
+    Na criação só a descrição é recebida: bolha, XP e data são definidos por
+    `Bubble.objects.check_in`, que também aplica o intervalo mínimo da dificuldade.
     """
     
     class Meta:
         model = models.CheckIn
         fields = '__all__'  # Inclui todos os campos do modelo
-        read_only_fields = ['created_at', 'xp_earned']  # Impede edição da data e do XP
-
-    def validate(self, data):
-        """
-        Valida se o último Check-In foi feito há menos de 24 horas.
-
-        - Obtém o último Check-In da bolha associada.
-        - Se o último Check-In tiver menos de 24 horas, impede a criação de um novo.
-        """
-        bubble = data.get('bubble')  
-        ultimo_checkin = models.CheckIn.objects.filter(bubble=bubble).order_by('-created_at').first()
-
-        if ultimo_checkin:
-            tempo_desde_ultimo = timezone.now() - ultimo_checkin.created_at
-            if tempo_desde_ultimo < timedelta(days=1):
-                raise serializers.ValidationError("Um novo Check-in só pode ser feito após 24 horas.")
-
-        return data
-    
-    def create(self, validated_data):
-        """
-        Atribui automaticamente a quantidade de pontos ao criar um Check-In.
-
-        - Obtém a bolha associada ao Check-In.
-        - Define o XP ganho com base na dificuldade do rank da bolha.
-        """
-        bubble = validated_data.get('bubble')
-        validated_data['xp_earned'] = bubble.rank.difficulty.points_for_activity
-        return super().create(validated_data)
+        read_only_fields = ['bubble', 'created_at', 'xp_earned']  # Definidos pelo registro do check-in
 
 # Serializer para o modelo Bubble
 class BubbleSerializer(serializers.ModelSerializer):
@@ -88,22 +86,34 @@ class BubbleSerializer(serializers.ModelSerializer):
     Serializa o modelo Bubble.
 
     - Inclui a relação com o modelo Rank.
-    - Recupera e exibe os Check-Ins associados à bolha.
+    - summary: Totais de check-ins e XP, sequências de dias e último check-in, todos lidos de colunas
+      da própria bolha (a bolha deve vir com `user` carregado, para o fuso da sequência atual).
+    - check_ins: Apenas os `recent_limit` check-ins mais recentes; o histórico completo fica no
+      endpoint paginado `check-in/history/`.
     """
-    rank = RankSerializer()  # Serializa o rank associado
-    check_ins = serializers.SerializerMethodField()  # Campo personalizado para exibir os check-ins da bolha
+    recent_limit = 10
+
+    rank = LadderRankField()  # Rank associado, vindo da escada em memória
+    summary = serializers.SerializerMethodField()
+    check_ins = serializers.SerializerMethodField()  # Check-ins mais recentes da bolha
 
     class Meta:
         model = models.Bubble
-        fields = ('user', 'progress', 'rank', 'check_ins')  # Campos incluídos na serialização
-        read_only_fields = ['rank', 'check_ins']  # Define rank e check-ins como somente leitura
+        fields = ('user', 'progress', 'rank', 'summary', 'check_ins')  # Campos incluídos na serialização
+        read_only_fields = ['rank', 'summary', 'check_ins']  # Define rank, resumo e check-ins como somente leitura
+
+    def get_summary(self, obj):
+        return {
+            'total_check_ins': obj.checkin_count,
+            'total_xp': obj.total_xp,
+            'current_streak': obj.active_streak(local_date(timezone.now(), obj.user.timezone)),
+            'longest_streak': obj.longest_streak,
+            'last_check_in': serializers.DateTimeField().to_representation(obj.last_checkin_at),
+        }
 
     def get_check_ins(self, obj):
         """
-        Retorna todos os Check-Ins associados à bolha.
-
-        - Obtém os Check-Ins filtrando pelo ID da bolha.
-        - Serializa os Check-Ins e retorna os dados.
+        Retorna os check-ins mais recentes da bolha (do mais novo para o mais antigo).
         """
-        check_ins = models.CheckIn.objects.filter(bubble=obj)
-        return CheckInSerializer(check_ins, many=True).data  # Serializa múltiplos check-ins
+        queryset = models.CheckIn.objects.filter(bubble=obj).order_by('-created_at', '-id')[:self.recent_limit]
+        return CheckInSerializer(queryset, many=True).data  # Serializa múltiplos check-ins
@@ -1,10 +1,23 @@
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+
+from django.test import override_settings
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework.test import APITestCase
 from rest_framework import status
 from apps.users.tests import UsersMixin
 from apps.users.models import Users  
 from apps.study.models import Achievement, AchievementLog
-from apps.bubble.models import Bubble,CheckIn
+from apps.bubble import ranks
+from apps.bubble.models import (
+    Bubble, BubbleQuerySet, CheckIn, CheckInContention, CheckInNotAllowed, Difficulty, Rank,
+)
+from apps.bubble.serializers import BubbleSerializer
 
 """
     Area Responsável por testar as funcionalidades da API, detectar erros e indentifica-los, de modo
@@ -35,7 +48,94 @@ class BubbleViewTests(APITestCase, UsersMixin):
 
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
         self.assertEqual(response.json().get('detail'), 'As credenciais de autenticação não foram fornecidas.')
-    
+
+    def test_get_bubble_not_modified(self):
+        url = reverse('users:bubble:bubble_profile')
+        etag = self.client.get(url)['ETag']
+
+        # Só a consulta agregada dos validadores; a serialização não roda
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Bubble.objects.check_in(self.user.pk)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertNotIn('Last-Modified', response)
+
+    def test_get_bubble_etag_changes_with_ladder_and_local_date(self):
+        url = reverse('users:bubble:bubble_profile')
+        etag = self.client.get(url)['ETag']
+
+        ranks.invalidate()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+        etag = self.client.get(url)['ETag']
+        with mock.patch('apps.bubble.views.timezone.now', return_value=timezone.now() + timedelta(days=1)):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_get_bubble_summary_and_recent_window(self):
+        url = reverse('users:bubble:bubble_profile')
+        bubble = Bubble.objects.get(user=self.user)
+        now = timezone.now()
+        for days_ago in (0, 1, 2, 5, 6, 7, 8):
+            CheckIn.objects.create(bubble=bubble, xp_earned=10, created_at=now - timedelta(days=days_ago))
+        for _ in range(5):
+            CheckIn.objects.create(bubble=bubble, xp_earned=10, created_at=now)
+        Bubble.objects.filter(pk=bubble.pk).update(checkin_count=12, total_xp=120, last_checkin_at=now)
+        call_command('backfill_checkin_streaks', stdout=StringIO())
+
+        data = self.client.get(url).json()
+
+        self.assertEqual(len(data['check_ins']), BubbleSerializer.recent_limit)
+        self.assertEqual(data['summary']['total_check_ins'], 12)
+        self.assertEqual(data['summary']['total_xp'], 120)
+        self.assertEqual(data['summary']['current_streak'], 3)
+        self.assertEqual(data['summary']['longest_streak'], 4)
+        self.assertIsNotNone(data['summary']['last_check_in'])
+
+    def test_checkin_history_paginated_and_filtered(self):
+        url = reverse('users:bubble:check_in_history')
+        bubble = Bubble.objects.get(user=self.user)
+        now = timezone.now()
+        created = [CheckIn.objects.create(bubble=bubble, xp_earned=10) for _ in range(5)]
+        for days_ago, check_in in enumerate(created):
+            CheckIn.objects.filter(pk=check_in.pk).update(created_at=now - timedelta(days=days_ago * 10))
+
+        first = self.client.get(url, {'page_size': 3}).json()
+        second = self.client.get(first['next']).json()
+        self.assertEqual([item['id'] for item in first['results'] + second['results']], [c.pk for c in created])
+        self.assertIsNone(second['next'])
+
+        since = (timezone.localdate() - timedelta(days=25)).isoformat()
+        response = self.client.get(url, {'since': since})
+        self.assertEqual([item['id'] for item in response.json()['results']], [c.pk for c in created[:3]])
+
+        response = self.client.get(url, {'until': 'ontem'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('until', response.json()['detail'])
+
+    def test_checkin_history_date_bounds_cover_whole_local_day(self):
+        url = reverse('users:bubble:check_in_history')
+        bubble = Bubble.objects.get(user=self.user)
+        self.user.timezone = 'Asia/Tokyo'
+        self.user.save(update_fields=['timezone'])
+
+        # 2026-03-02 em Tóquio: de 2026-03-01T15:00Z a 2026-03-02T15:00Z
+        moments = ['2026-03-01T14:59:00Z', '2026-03-01T15:00:00Z', '2026-03-02T09:00:00Z', '2026-03-02T15:00:00Z']
+        created = [
+            CheckIn.objects.create(bubble=bubble, xp_earned=10, created_at=parse_datetime(moment)) for moment in moments
+        ]
+
+        response = self.client.get(url, {'until': '2026-03-02'})
+        self.assertEqual([item['id'] for item in response.json()['results']], [c.pk for c in reversed(created[:3])])
+
+        response = self.client.get(url, {'since': '2026-03-02', 'until': '2026-03-02'})
+        self.assertEqual([item['id'] for item in response.json()['results']], [c.pk for c in reversed(created[1:3])])
 
 
 class CheckInViewTest(APITestCase, UsersMixin):
@@ -115,10 +215,11 @@ class CheckInViewTest(APITestCase, UsersMixin):
         """Deve incrementar o progresso da bolha ao criar um CheckIn"""
         self.assertEqual(self.bubble.progress, 0)
 
-        CheckIn.objects.create(bubble=self.bubble, xp_earned = self.bubble.rank.difficulty.points_for_activity)
+        check_in = Bubble.objects.check_in(self.user.pk)
 
         self.bubble.refresh_from_db()
         self.assertEqual(self.bubble.progress, 50)
+        self.assertEqual(check_in.xp_earned, 50)
 
     def test_upgrade_rank(self):
         """Deve mudar o rank da bolha se progresso atingir novo rank"""
@@ -126,8 +227,155 @@ class CheckInViewTest(APITestCase, UsersMixin):
         self.bubble.progress = 100
         self.bubble.save()
 
-        CheckIn.objects.create(bubble=self.bubble, xp_earned = self.bubble.rank.difficulty.points_for_activity)
+        Bubble.objects.check_in(self.user.pk)
 
         self.bubble.refresh_from_db()
         self.assertEqual(self.bubble.rank.pk, 2)
-        self.assertEqual(self.bubble.progress, 0)
\ No newline at end of file
+        self.assertEqual(self.bubble.progress, 0)
+
+    def test_post_checkin_fixed_query_count(self):
+        url = reverse('users:bubble:check_in_create')
+        Achievement.objects.all().delete()
+        ranks.get_ladder()  # Escada já carregada no processo
+
+        # Conquistas (1) + SELECT da bolha e SAVEPOINT/UPDATE condicional/INSERT/RELEASE; nada em Rank
+        with self.assertNumQueries(6):
+            self.client.post(url, data={'description': 'Reciclei'}, format='json')
+
+    def test_bubble_rank_served_from_ladder(self):
+        url = reverse('users:bubble:bubble_profile')
+        self.client.get(url)
+
+        # Validadores + bolha (com o usuário) + check-ins recentes; rank e sequências não fazem consultas
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+
+        self.assertEqual(response.json()['rank']['name'], 'Iniciante Verde')
+        self.assertEqual(response.json()['rank']['difficulty']['points_for_activity'], 50)
+
+    def test_rank_edit_invalidates_ladder(self):
+        self.addCleanup(ranks.invalidate)  # O rollback do teste desfaz a edição, mas não a escada
+        rank = Rank.objects.get(pk=1)
+        rank.name = 'Semente'
+        rank.save()
+
+        self.assertEqual(ranks.get_ladder()[1].name, 'Semente')
+        self.assertEqual(ranks.get_ladder().promotion(1, 150).id, 2)
+        self.assertIsNone(ranks.get_ladder().promotion(2, 150))
+
+    def test_checkin_cooldown_uses_last_checkin_at(self):
+        Bubble.objects.check_in(self.user.pk)
+        self.bubble.refresh_from_db()
+        last = CheckIn.objects.get(bubble=self.bubble)
+        self.assertEqual(self.bubble.last_checkin_at, last.created_at)
+
+        with self.assertRaises(CheckInNotAllowed):
+            Bubble.objects.check_in(self.user.pk)
+
+        Bubble.objects.filter(pk=self.bubble.pk).update(last_checkin_at=timezone.now() - timedelta(hours=24))
+        Bubble.objects.check_in(self.user.pk)
+        self.assertEqual(CheckIn.objects.filter(bubble=self.bubble).count(), 2)
+
+    def test_checkin_cooldown_per_difficulty(self):
+        self.addCleanup(ranks.invalidate)
+        Difficulty.objects.filter(pk=ranks.get_ladder()[1].difficulty_id).update(cooldown_hours=0)
+        ranks.invalidate()  # update() não dispara os sinais
+
+        Bubble.objects.check_in(self.user.pk)
+        Bubble.objects.check_in(self.user.pk)
+
+        self.bubble.refresh_from_db()
+        self.assertEqual((self.bubble.checkin_count, self.bubble.progress), (2, 100))
+
+    def test_checkin_conditional_update_rejects_stale_read(self):
+        # Simula um segundo envio que leu a bolha antes do primeiro gravar last_checkin_at
+        stale = Bubble.objects.filter(user_id=self.user.pk).values(
+            'pk', 'rank_id', 'progress', 'last_checkin_at', 'last_checkin_local_date',
+            'current_streak', 'longest_streak', 'user__timezone',
+        ).first()
+        Bubble.objects.check_in(self.user.pk)
+
+        current = Bubble.objects.filter(pk=self.bubble.pk).values('rank_id', 'last_checkin_at').first()
+
+        # Três tentativas com a leitura antiga; a leitura final mostra o check-in recente
+        with mock.patch.object(BubbleQuerySet, 'first', side_effect=[stale, stale, stale, current]):
+            with self.assertRaises(CheckInNotAllowed):
+                Bubble.objects.check_in(self.user.pk)
+
+        self.assertEqual(CheckIn.objects.filter(bubble=self.bubble).count(), 1)
+
+    def test_checkin_contention_is_not_reported_as_cooldown(self):
+        stale = Bubble.objects.filter(user_id=self.user.pk).values(
+            'pk', 'rank_id', 'progress', 'last_checkin_at', 'last_checkin_local_date',
+            'current_streak', 'longest_streak', 'user__timezone',
+        ).first()
+        Bubble.objects.filter(pk=self.bubble.pk).update(progress=10)  # Outra escrita, fora do intervalo
+
+        with mock.patch.object(BubbleQuerySet, 'first', side_effect=[stale, stale, stale, stale]):
+            with self.assertRaises(CheckInContention):
+                Bubble.objects.check_in(self.user.pk)
+
+        self.assertFalse(CheckIn.objects.filter(bubble=self.bubble).exists())
+
+    def test_post_checkin_contention_returns_conflict(self):
+        error = CheckInContention('A bolha foi alterada por outra requisição. Tente novamente.')
+        with mock.patch.object(BubbleQuerySet, 'check_in', side_effect=error):
+            response = self.client.post(reverse('users:bubble:check_in_create'), {'description': 'Teste'})
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.json(), {'detail': 'A bolha foi alterada por outra requisição. Tente novamente.'})
+
+    def test_checkin_maintains_streaks_in_user_timezone(self):
+        self.addCleanup(ranks.invalidate)
+        Difficulty.objects.filter(pk=ranks.get_ladder()[1].difficulty_id).update(cooldown_hours=0)
+        ranks.invalidate()
+        Users.objects.filter(pk=self.user.pk).update(timezone='Asia/Tokyo')
+
+        # 20h UTC: ainda dia 1 em São Paulo, já dia 2 em Tóquio
+        moments = ['2026-03-01T20:00:00Z', '2026-03-02T20:00:00Z', '2026-03-03T16:00:00Z', '2026-03-06T01:00:00Z']
+        for moment in moments:
+            with mock.patch('apps.bubble.models.timezone.now', return_value=parse_datetime(moment)):
+                Bubble.objects.check_in(self.user.pk)
+
+        self.bubble.refresh_from_db()
+        self.assertEqual(self.bubble.last_checkin_local_date, date(2026, 3, 6))
+        self.assertEqual((self.bubble.current_streak, self.bubble.longest_streak), (1, 3))
+        self.assertEqual(self.bubble.active_streak(date(2026, 3, 7)), 1)
+        self.assertEqual(self.bubble.active_streak(date(2026, 3, 8)), 0)
+
+        # O backfill chega ao mesmo resultado a partir do histórico
+        Bubble.objects.filter(pk=self.bubble.pk).update(current_streak=0, longest_streak=0, last_checkin_local_date=None)
+        call_command('backfill_checkin_streaks', stdout=StringIO())
+        self.bubble.refresh_from_db()
+        self.assertEqual(
+            (self.bubble.current_streak, self.bubble.longest_streak, self.bubble.last_checkin_local_date),
+            (1, 3, date(2026, 3, 6)),
+        )
+
+    def test_checkin_streak_achievement(self):
+        Achievement.objects.create(name='Semana', category='Check-In', condition='checkin_7_days', description='7 dias')
+        Bubble.objects.filter(pk=self.bubble.pk).update(
+            current_streak=6, longest_streak=6, last_checkin_local_date=timezone.localdate() - timedelta(days=1)
+        )
+
+        response = self.client.post(reverse('users:bubble:check_in_create'), data={'description': 'Dia 7'}, format='json')
+
+        self.assertIn('Semana', [badge['name'] for badge in response.json()['new_badges']])
+
+    def test_ladder_reloads_after_ttl_without_version_bump(self):
+        self.addCleanup(ranks.invalidate)
+        ranks.get_ladder()
+        Rank.objects.filter(pk=1).update(name='Semente')  # Sem sinais: a versão não muda
+
+        self.assertEqual(ranks.get_ladder()[1].name, 'Iniciante Verde')
+        with override_settings(BUBBLE_RANKS_TTL=0):
+            self.assertEqual(ranks.get_ladder()[1].name, 'Semente')
+
+    def test_checkin_does_not_demote_rank(self):
+        self.bubble.rank_id = 5
+        self.bubble.save()
+
+        Bubble.objects.check_in(self.user.pk)
+
+        self.bubble.refresh_from_db()
+        self.assertEqual((self.bubble.rank_id, self.bubble.progress), (5, 30))
\ No newline at end of file
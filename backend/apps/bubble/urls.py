@@ -9,6 +9,7 @@ from . import views
 
     - Check-in:
       - check-in/create/     → Registra um novo check-in em uma bolha.
+      - check-in/history/    → Lista o histórico de check-ins da bolha (paginado, filtrável por período).
 """
 
 app_name = 'bubble'  # Define o namespace para as URLs deste aplicativo
@@ -19,4 +20,5 @@ urlpatterns = [
 
     # Rotas para check-in
     path('check-in/create/', views.CheckInCreateView.as_view(), name="check_in_create"),  # Cria um novo check-in em uma bolha
+    path('check-in/history/', views.CheckInHistoryView.as_view(), name="check_in_history"),  # Histórico paginado de check-ins
 ]
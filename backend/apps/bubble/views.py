@@ -1,13 +1,19 @@
 from django.shortcuts import get_object_or_404  
 from rest_framework.generics import GenericAPIView
-from rest_framework.mixins import ( RetrieveModelMixin, CreateModelMixin, UpdateModelMixin, DestroyModelMixin)
+from rest_framework.mixins import ( RetrieveModelMixin, CreateModelMixin, ListModelMixin, UpdateModelMixin, DestroyModelMixin)
+from datetime import datetime, time, timedelta
+from django.utils import dateparse, timezone
 from django.http import Http404  
 from rest_framework.response import Response  
 from rest_framework import status, permissions  
+from rest_framework.settings import api_settings
 
 from apps.study.serializers import AchievementSerializer
-from apps.bubble import models, serializers  
+from apps.bubble import models, ranks, serializers  
+from apps.users.models import get_zone, local_date
 from utils.check_achievement import CheckAchievementsCheckIn
+from utils.conditional import ConditionalGetMixin, make_etag
+from utils.pagination import KeysetPagination
 
 """
     Este módulo define as views da aplicação "Bubble", responsáveis por processar requisições HTTP 
@@ -15,24 +21,49 @@ from utils.check_achievement import CheckAchievementsCheckIn
 
     - BubbleProfileView    → Obtém a bolha do usuário autenticado.
     - CheckInCreateView    → Permite a criação de um novo check-in.
+    - CheckInHistoryView   → Lista o histórico de check-ins, paginado por cursor.
 """  
 
-class BubbleProfileView(GenericAPIView, RetrieveModelMixin):  
+class BubbleProfileView(ConditionalGetMixin, GenericAPIView, RetrieveModelMixin):  
     """
     Retorna a bolha do usuário autenticado.
     Apenas o dono da bolha pode acessar esta rota.
+
+    Responde 304 quando progresso, rank, check-ins e a data local do usuário não mudaram desde o
+    ETag enviado pelo cliente. Não envia Last-Modified: a resposta também muda com edições da
+    escada de ranks e com a virada do dia (sequência atual), que não têm um instante na bolha.
     """
     permission_classes = [permissions.IsAuthenticated]  
     serializer_class = serializers.BubbleSerializer
+    state = None
+
+    def get_state(self):
+        """ Valores que mudam junto com a resposta, lidos das colunas da própria bolha e do fuso do usuário. """
+        if self.state is None:
+            self.state = (
+                models.Bubble.objects.filter(user=self.request.user.id)
+                .values('pk', 'progress', 'rank_id', 'checkin_count', 'last_checkin_at', 'user__timezone')
+                .first()
+            ) or {}
+        return self.state
+
+    def get_etag(self, request):
+        state = self.get_state()
+        if not state:
+            return None
+        # A versão da escada cobre edições de ranks/dificuldades exibidos na resposta; a data local
+        # cobre a sequência atual, que zera com a virada do dia sem escrita na bolha
+        today = local_date(timezone.now(), state['user__timezone'])
+        return make_etag('bubble', ranks.get_version(), today, *state.values())
 
     def get_object(self):
         try:  
-            return get_object_or_404(models.Bubble, user=self.request.user.id)  
+            return get_object_or_404(models.Bubble.objects.select_related('user'), user=self.request.user.id)  
         except Http404:  
             return Response('A Bolha não foi encontrada', status=status.HTTP_404_NOT_FOUND)  
     
     def get(self, request, *args, **kwargs):  
-        return self.retrieve(request, *args, **kwargs)
+        return self.conditional_get(request, self.retrieve, *args, **kwargs)
     
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -46,15 +77,13 @@ class CheckInCreateView(GenericAPIView, CreateModelMixin):
     Cria um novo check-in para a bolha do usuário autenticado.
     Atualiza o progresso da bolha e verifica se houve mudança de rank.
     Apenas o dono da bolha pode acessar esta rota.
+
+    Validação, inserção, progresso e promoção de rank ficam em `Bubble.objects.check_in`,
+    em uma única transação (ver apps.bubble.models). Um check-in antes do intervalo devolve 400;
+    se a bolha não parou de mudar por escritas concorrentes, 409 (o envio pode ser repetido).
     """
     permission_classes = [permissions.IsAuthenticated]  
     serializer_class = serializers.CheckInSerializer
-    
-    def get_object(self):
-        try:  
-            return get_object_or_404(models.Bubble, user=self.request.user.id)  
-        except Http404:  
-            return Response('A Bolha não foi encontrada', status=status.HTTP_404_NOT_FOUND) 
 
     def get_badge(self):
         check_badge = CheckAchievementsCheckIn()
@@ -65,19 +94,87 @@ class CheckInCreateView(GenericAPIView, CreateModelMixin):
         return self.create(request, *args, **kwargs)
     
     def create(self, request, *args, **kwargs):
-        bubble = self.get_object()
-
-        data = request.data  
-        data['bubble'] = bubble.id
-        data['xp_earned'] = bubble.rank.difficulty.points_for_activity 
-
-        serializer = self.get_serializer(data=data)
+        serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        self.perform_create(serializer)
+
+        try:
+            models.Bubble.objects.check_in(request.user.pk, serializer.validated_data.get('description', ''))
+        except models.Bubble.DoesNotExist:
+            return Response('A Bolha não foi encontrada', status=status.HTTP_404_NOT_FOUND)
+        except models.CheckInNotAllowed as error:
+            return Response({api_settings.NON_FIELD_ERRORS_KEY: [str(error)]}, status=status.HTTP_400_BAD_REQUEST)
+        except models.CheckInContention as error:
+            return Response({'detail': str(error)}, status=status.HTTP_409_CONFLICT)
 
         new_badges = self.get_badge()
         
         return Response(
             {"detail": "Check-in criado com sucesso!", "new_badges": new_badges}, status=status.HTTP_201_CREATED
             )
-  
\ No newline at end of file
+
+
+class CheckInHistoryView(GenericAPIView, ListModelMixin):
+    """
+    Histórico completo de check-ins da bolha do usuário autenticado, do mais recente para o mais
+    antigo, paginado por cursor (índice em (bubble, created_at, id)).
+
+    `?since=` e `?until=` limitam o período (data `AAAA-MM-DD` ou data/hora ISO 8601; datas
+    valem pelo dia inteiro no fuso do usuário).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = serializers.CheckInSerializer
+    pagination_class = KeysetPagination
+
+    def get_keyset_ordering(self):
+        return ('-created_at', '-id')
+
+    def get_queryset(self):
+        queryset = models.CheckIn.objects.filter(bubble__user_id=self.request.user.pk)
+        if self.since is not None:
+            queryset = queryset.filter(created_at__gte=self.since)
+        if self.until is not None:
+            queryset = queryset.filter(created_at__lt=self.until)
+        return queryset
+
+    def parse_bound(self, name, end=False):
+        """
+        Converte o parâmetro em datetime no fuso do usuário. Uma data vale pelo dia inteiro: vira o
+        início do dia (ou do dia seguinte, se `end`); uma data/hora sem fuso é lida no fuso do usuário.
+        """
+        raw = self.request.query_params.get(name)
+        if not raw:
+            return None
+        zone = get_zone(self.request.user.timezone)
+
+        # A data pura vem antes: parse_datetime também aceita '2024-01-01' (como meia-noite)
+        try:
+            day = dateparse.parse_date(raw)
+        except ValueError:
+            day = None
+        if day is not None:
+            if end:
+                day += timedelta(days=1)
+            return datetime.combine(day, time.min, tzinfo=zone)
+
+        try:
+            value = dateparse.parse_datetime(raw)
+        except ValueError:
+            value = None
+        if value is None:
+            raise ValueError(name)
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value, zone)
+        if end:
+            value += timedelta(microseconds=1)  # `until` com data/hora inclui o próprio instante
+        return value
+
+    def get(self, request, *args, **kwargs):
+        try:
+            self.since = self.parse_bound('since')
+            self.until = self.parse_bound('until', end=True)
+        except ValueError as error:
+            return Response(
+                {'detail': f'Parâmetro "{error}" inválido. Use AAAA-MM-DD ou data/hora ISO 8601.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return self.list(request, *args, **kwargs)
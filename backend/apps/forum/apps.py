@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class PostsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.forum'
+
+    def ready(self):
+        from utils.checks import check_shared_cache
+
+        # As versões de cache das threads e do feed precisam ser vistas por todos os workers
+        checks.register(check_shared_cache, checks.Tags.caches)
@@ -0,0 +1,106 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+"""
+    Cache das respostas de detalhe das threads.
+
+    Cada thread tem um número de versão no cache; a resposta serializada é guardada sob uma chave que
+    inclui essa versão. Qualquer escrita na thread, nos seus posts, curtidas ou tags incrementa a
+    versão (via sinais em models.py), e as entradas antigas simplesmente deixam de ser lidas e
+    expiram pelo timeout. Não é preciso apagar chaves nem conhecer todas as variações guardadas.
+
+    Além da versão de cada thread existe uma versão global do feed, incrementada junto, e ambas
+    guardam o momento da última mudança; esses valores alimentam o ETag/Last-Modified das views.
+
+    O payload guardado é independente do usuário: o estado `liked` é sobreposto na view.
+
+    As versões só invalidam todos os workers se o cache padrão for compartilhado entre processos
+    (ver CACHES em settings e a verificação ecoviva.E001 em utils/checks.py).
+"""
+
+KEY_PREFIX = 'forum'
+FEED_SCOPE = 'threads'
+
+
+def thread_scope(thread_id):
+    return f'thread:{thread_id}'
+
+
+def version_key(scope):
+    return f'{KEY_PREFIX}:{scope}:version'
+
+
+def modified_key(scope):
+    return f'{KEY_PREFIX}:{scope}:modified'
+
+
+def detail_key(thread_id, version):
+    return f'{KEY_PREFIX}:{thread_scope(thread_id)}:detail:{version}'
+
+
+def get_state(scope):
+    """
+    Retorna (versão, última modificação) do escopo. Se as chaves sumiram do cache (evicção/reinício),
+    recomeça de um valor baseado no relógio, que nunca coincide com versões antigas ainda guardadas,
+    e considera o escopo modificado agora.
+    """
+    keys = version_key(scope), modified_key(scope)
+    values = cache.get_many(keys)
+    if len(values) < 2:
+        cache.add(keys[0], time.time_ns(), timeout=None)
+        cache.add(keys[1], timezone.now(), timeout=None)
+        values = cache.get_many(keys)
+    return values.get(keys[0]), values.get(keys[1])
+
+
+def get_version(thread_id):
+    return get_state(thread_scope(thread_id))[0]
+
+
+def _bump(scope):
+    try:
+        cache.incr(version_key(scope))
+    except ValueError:  # Chave inexistente: nenhum payload em cache depende dela
+        cache.add(version_key(scope), time.time_ns(), timeout=None)
+    cache.set(modified_key(scope), timezone.now(), timeout=None)
+
+
+def _bump_threads(thread_ids):
+    for thread_id in thread_ids:
+        _bump(thread_scope(thread_id))
+    _bump(FEED_SCOPE)
+
+
+def bump_version(*thread_ids):
+    """
+    Invalida o cache das threads informadas (e a versão do feed).
+
+    Incrementa na hora (a própria requisição já lê dados novos) e de novo após o commit, descartando
+    um payload antigo que outra requisição tenha guardado enquanto a transação estava aberta.
+    """
+    if not thread_ids:
+        return
+    _bump_threads(thread_ids)
+    transaction.on_commit(lambda: _bump_threads(thread_ids))
+
+
+def bump_feed():
+    """ Invalida só a versão do feed (ex.: mudança de ordenação sem alterar nenhuma thread). """
+    _bump(FEED_SCOPE)
+    transaction.on_commit(lambda: _bump(FEED_SCOPE))
+
+
+def get_detail(thread_id, version):
+    return cache.get(detail_key(thread_id, version))
+
+
+def set_detail(thread_id, version, payload):
+    """
+    Guarda o payload sob a versão lida *antes* da consulta: se a thread mudar no meio do caminho,
+    o payload fica associado à versão antiga e nunca é servido.
+    """
+    cache.set(detail_key(thread_id, version), payload, settings.FORUM_CACHE_TIMEOUT)
@@ -0,0 +1,211 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+
+"""
+    Eventos em tempo real das threads (novos posts, edições, curtidas).
+
+    As escritas publicam pequenos deltas no canal da thread depois do commit; a view de streaming
+    (`ThreadEventsView`, SSE) assina o canal e repassa os eventos aos navegadores conectados, que
+    assim não precisam recarregar o detalhe inteiro.
+
+    - publish: Publica um evento de uma thread após o commit da transação atual.
+    - get_broker: Broker configurado em FORUM_EVENTS_BROKER (caminho pontuado da classe).
+    - InMemoryBroker: Pub/sub dentro do próprio processo, sem serviços externos. Só entrega eventos
+      publicados no mesmo processo: serve para desenvolvimento e para um único worker.
+    - PostgresBroker: Entre processos, via LISTEN/NOTIFY do PostgreSQL. Use com mais de um worker
+      (FORUM_EVENTS_BROKER=apps.forum.events.PostgresBroker).
+
+    O stream só é servido sob ASGI (ver ThreadEventsView): sob WSGI cada conexão prenderia um
+    worker síncrono enquanto estivesse aberta.
+
+    Interface de um broker:
+    - publish(channel, message): Chamado de código síncrono (views, sinais), de qualquer thread.
+    - subscribe(channel): Retorna uma assinatura usada como context manager dentro do event loop,
+      com `await subscription.get()` para receber a próxima mensagem.
+"""
+
+logger = logging.getLogger(__name__)
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def thread_channel(thread_id):
+    return f'forum:thread:{thread_id}'
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.FORUM_EVENTS_BROKER)()
+    return _broker
+
+
+def publish(thread_id, event, data):
+    """ Publica `{'event': ..., 'data': ...}` no canal da thread quando a transação for confirmada. """
+    message = {'event': event, 'data': data}
+    transaction.on_commit(lambda: get_broker().publish(thread_channel(thread_id), message))
+
+
+def format_sse(message):
+    """ Serializa uma mensagem no formato text/event-stream. """
+    data = json.dumps(message['data'], ensure_ascii=False, default=str)
+    return f"event: {message['event']}\ndata: {data}\n\n"
+
+
+class Subscription:
+    """
+    Assinatura de um canal no InMemoryBroker: uma fila ligada ao event loop do assinante.
+
+    A fila é limitada (FORUM_EVENTS_QUEUE_SIZE); um cliente lento perde os eventos mais antigos em
+    vez de acumular memória sem limite.
+    """
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = None
+        self.queue = None
+
+    def __enter__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=settings.FORUM_EVENTS_QUEUE_SIZE)
+        self.broker.register(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.broker.unregister(self)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def offer(self, message):
+        """ Executado no event loop do assinante. """
+        if self.queue.full():
+            self.queue.get_nowait()  # Descarta o evento mais antigo
+        self.queue.put_nowait(message)
+
+
+class InMemoryBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, channel):
+        return Subscription(self, channel)
+
+    def register(self, subscription):
+        with self._lock:
+            self._subscriptions[subscription.channel].add(subscription)
+
+    def unregister(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, message)
+            except RuntimeError:  # Loop já encerrado: a assinatura será removida ao sair
+                pass
+
+
+class PostgresBroker(InMemoryBroker):
+    """
+    Broker entre processos com LISTEN/NOTIFY do PostgreSQL (sem serviços além do banco).
+
+    - publish: `SELECT pg_notify(...)` no canal único FORUM_EVENTS_PG_CHANNEL, com o canal lógico
+      dentro do payload; o NOTIFY é entregue a todos os processos que escutam, inclusive este.
+    - Cada processo abre uma conexão dedicada na primeira assinatura e a escuta numa thread daemon,
+      repassando as mensagens às assinaturas locais (a entrega local é a do InMemoryBroker).
+
+    O NOTIFY limita o payload a 8000 bytes: mensagens maiores seguem só com o `id` de `data` e
+    `truncated: true`, para o cliente buscar o item completo.
+    """
+    max_payload = 7900
+    reconnect_delay = 5  # Segundos antes de reconectar após uma falha na escuta
+
+    def __init__(self):
+        super().__init__()
+        self.pg_channel = settings.FORUM_EVENTS_PG_CHANNEL
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def register(self, subscription):
+        super().register(subscription)
+        self._ensure_listener()
+
+    def publish(self, channel, message):
+        payload = self.encode(channel, message)
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.pg_channel, payload])
+
+    def encode(self, channel, message):
+        payload = json.dumps({'c': channel, 'm': message}, ensure_ascii=False, default=str)
+        if len(payload.encode()) > self.max_payload:
+            data = message.get('data') or {}
+            reduced = {'event': message['event'], 'data': {'id': data.get('id')}, 'truncated': True}
+            payload = json.dumps({'c': channel, 'm': reduced}, default=str)
+        return payload
+
+    def dispatch(self, payload):
+        """ Entrega às assinaturas locais uma notificação recebida do banco. """
+        try:
+            decoded = json.loads(payload)
+            channel, message = decoded['c'], decoded['m']
+        except (ValueError, KeyError, TypeError):
+            logger.warning('Notificação de evento inválida ignorada: %r', payload[:200])
+            return
+        super().publish(channel, message)
+
+    def _ensure_listener(self):
+        if self._listener is not None:
+            return
+        with self._listener_lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen_forever, name='forum-events-listener', daemon=True)
+                self._listener.start()
+
+    def _listen_forever(self):
+        while True:
+            try:
+                self._listen()
+            except Exception:
+                logger.exception('Falha na escuta dos eventos do fórum; reconectando')
+                time.sleep(self.reconnect_delay)
+
+    def _listen(self):
+        import psycopg2
+
+        params = connections['default'].get_connection_params()
+        connection = psycopg2.connect(**params)
+        try:
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.pg_channel}"')
+            while True:
+                if select.select([connection], [], [], settings.FORUM_EVENTS_KEEPALIVE) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    self.dispatch(connection.notifies.pop(0).payload)
+        finally:
+            connection.close()
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.forum import cache as thread_cache
+from apps.forum.models import Thread
+
+"""
+    Comando que aplica o decaimento da pontuação "em alta" das threads.
+
+    Uso: python manage.py decay_hot_scores [--hours 1]
+
+    Deve ser agendado (cron) a cada `--hours` horas. Multiplica `hot_score` de todas as threads por
+    0.5 ** (horas / FORUM_HOT_HALF_LIFE_HOURS) em um único UPDATE; curtidas e posts novos somam seu
+    peso cheio, então a ordenação `?order=hot` favorece a atividade recente.
+"""
+
+
+class Command(BaseCommand):
+    help = 'Aplica o decaimento exponencial da pontuação "em alta" das threads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=1.0, help='Horas desde a última execução.')
+
+    def handle(self, *args, **options):
+        hours = options['hours']
+        if hours <= 0:
+            raise CommandError('--hours deve ser maior que zero.')
+
+        factor = 0.5 ** (hours / settings.FORUM_HOT_HALF_LIFE_HOURS)
+        updated = Thread.objects.decay_hot_scores(factor)
+        thread_cache.bump_feed()  # A ordem do feed mudou, mas nenhuma thread individual
+
+        self.stdout.write(self.style.SUCCESS(f'{updated} threads com pontuação atualizada (fator {factor:.4f}).'))
@@ -0,0 +1,69 @@
+import os
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from utils.image import VARIANT_FORMAT, VARIANT_SIZES, generate_instance_variants, variants_flag
+
+"""
+    Comando para gerar as miniaturas que faltam das imagens do fórum e dos usuários.
+
+    Uso: python manage.py generate_image_variants [--batch-size 500]
+
+    As variantes são geradas em segundo plano após cada upload; este comando cobre imagens antigas,
+    falhas na geração e a troca do formato do nome das variantes (`foto_256.webp` → `foto.jpg_256.webp`,
+    ver `utils.image.variant_name`). Percorre em lotes por faixa de id as linhas com
+    `<campo>_variants_ready` desmarcado, gera as variantes e marca o campo (enviando `variants_ready`);
+    arquivos que não puderem ser lidos são informados e ignorados.
+    Variantes com o nome antigo são removidas: elas podiam ser compartilhadas por originais de
+    extensões diferentes e nenhuma URL as usa mais.
+"""
+
+
+class Command(BaseCommand):
+    help = 'Gera as miniaturas que faltam das capas das threads e das fotos dos usuários.'
+
+    images = (('forum.Thread', 'cover'), ('users.Users', 'photo'))
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Quantidade de imagens por lote.')
+
+    def handle(self, *args, **options):
+        for model_label, field_name in self.images:
+            total = self.generate(model_label, field_name, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'{total} imagens processadas em {model_label}.{field_name}.'))
+
+    def generate(self, model_label, field_name, batch_size):
+        model = apps.get_model(model_label)
+        storage = model._meta.get_field(field_name).storage
+        pending = (
+            model._base_manager.filter(**{variants_flag(field_name): False})
+            .exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            .order_by('pk')
+        )
+        last_id = 0
+        total = 0
+
+        while True:
+            rows = list(pending.filter(pk__gt=last_id).values_list('pk', field_name)[:batch_size])
+            if not rows:
+                break
+
+            for pk, name in rows:
+                try:
+                    generate_instance_variants(model_label, pk, field_name, name)
+                except (OSError, SyntaxError, ValueError) as error:  # Arquivo ausente ou que não é imagem
+                    self.stderr.write(f'{model_label} {pk}: {name} ignorado ({error}).')
+                    continue
+                self.remove_legacy_variants(storage, name)
+                total += 1
+            last_id = rows[-1][0]
+
+        return total
+
+    def remove_legacy_variants(self, storage, name):
+        root, _ = os.path.splitext(name)
+        for size in VARIANT_SIZES:
+            legacy = f'{root}_{size}.{VARIANT_FORMAT.lower()}'
+            if storage.exists(legacy):
+                storage.delete(legacy)
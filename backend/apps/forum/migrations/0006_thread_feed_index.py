@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0005_remove_post_parent_post_remove_thread_likes_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['-created_at', '-id'], name='forum_thread_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:44
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    """ Preenche os contadores das threads já existentes. """
+    Thread = apps.get_model('forum', 'Thread')
+    Post = apps.get_model('forum', 'Post')
+
+    likes = Thread.likes.through.objects.filter(thread=OuterRef('pk')).values('thread')
+    posts = Post.objects.filter(thread=OuterRef('pk')).values('thread')
+
+    Thread.objects.update(
+        like_count=Coalesce(Subquery(likes.annotate(total=Count('*')).values('total')), 0),
+        post_count=Coalesce(Subquery(posts.annotate(total=Count('*')).values('total')), 0),
+        last_activity_at=Coalesce(Subquery(posts.annotate(last=Max('created_at')).values('last')), 'created_at'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0006_thread_feed_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['-like_count', '-id'], name='forum_thread_liked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['-last_activity_at', '-id'], name='forum_thread_active_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:52
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+FTS5_TOKENIZER = "unicode61 remove_diacritics 2"
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Cria a estrutura de busca do banco em uso e indexa as linhas existentes.
+
+    - PostgreSQL: índices GIN sobre `search_vector` (configuração 'portuguese').
+    - SQLite: tabelas virtuais FTS5 espelhando título/conteúdo.
+    """
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "UPDATE forum_thread SET search_vector = "
+            "setweight(to_tsvector('portuguese', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('portuguese', coalesce(content, '')), 'B')"
+        )
+        schema_editor.execute("UPDATE forum_post SET search_vector = to_tsvector('portuguese', coalesce(content, ''))")
+        schema_editor.execute('CREATE INDEX forum_thread_search_idx ON forum_thread USING gin (search_vector)')
+        schema_editor.execute('CREATE INDEX forum_post_search_idx ON forum_post USING gin (search_vector)')
+
+    elif vendor == 'sqlite':
+        schema_editor.execute(f"CREATE VIRTUAL TABLE forum_thread_fts USING fts5(title, content, tokenize='{FTS5_TOKENIZER}')")
+        schema_editor.execute(f"CREATE VIRTUAL TABLE forum_post_fts USING fts5(content, tokenize='{FTS5_TOKENIZER}')")
+        schema_editor.execute('INSERT INTO forum_thread_fts (rowid, title, content) SELECT id, title, content FROM forum_thread')
+        schema_editor.execute('INSERT INTO forum_post_fts (rowid, content) SELECT id, content FROM forum_post')
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS forum_thread_search_idx')
+        schema_editor.execute('DROP INDEX IF EXISTS forum_post_search_idx')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS forum_thread_fts')
+        schema_editor.execute('DROP TABLE IF EXISTS forum_post_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0007_thread_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # O índice GIN fica fora de Meta.indexes porque não existe no SQLite usado em desenvolvimento
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:57
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_tag_counts(apps, schema_editor):
+    """ Preenche o contador de threads das tags já existentes. """
+    Tags = apps.get_model('forum', 'Tags')
+    Thread = apps.get_model('forum', 'Thread')
+
+    links = Thread.tags.through.objects.filter(tags=OuterRef('pk')).values('tags')
+    Tags.objects.update(thread_count=Coalesce(Subquery(links.annotate(total=Count('*')).values('total')), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0008_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tags',
+            name='thread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='tags',
+            index=models.Index(fields=['-thread_count', '-id'], name='forum_tags_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tags',
+            index=models.Index(fields=['name'], name='forum_tags_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(backfill_tag_counts, migrations.RunPython.noop),
+    ]
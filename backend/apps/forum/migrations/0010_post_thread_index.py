@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0009_tag_counts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['thread', 'created_at', 'id'], name='forum_post_thread_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:22
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+BATCH_SIZE = 500
+
+
+def backfill_hot_scores(apps, schema_editor):
+    """
+    Estima a pontuação das threads existentes: pesos de criação, curtidas e posts (3/1/2), decaídos
+    pelo tempo desde a última atividade.
+    """
+    Thread = apps.get_model('forum', 'Thread')
+    now = timezone.now()
+    half_life = settings.FORUM_HOT_HALF_LIFE_HOURS
+
+    batch = []
+    for thread in Thread.objects.only('id', 'like_count', 'post_count', 'last_activity_at').iterator(BATCH_SIZE):
+        hours = max((now - thread.last_activity_at).total_seconds() / 3600, 0)
+        score = (3.0 + thread.like_count * 1.0 + thread.post_count * 2.0) * 0.5 ** (hours / half_life)
+        thread.hot_score = score if score >= 0.01 else 0.0
+        batch.append(thread)
+        if len(batch) == BATCH_SIZE:
+            Thread.objects.bulk_update(batch, ['hot_score'])
+            batch = []
+    Thread.objects.bulk_update(batch, ['hot_score'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0010_post_thread_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='hot_score',
+            field=models.FloatField(default=3.0),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['-hot_score', '-id'], name='forum_thread_hot_idx'),
+        ),
+        migrations.RunPython(backfill_hot_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0011_thread_hot_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='view_count',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0012_thread_view_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1,12 +1,21 @@
 import os
-from django.db import models
+import re
+from django.db import IntegrityError, models, transaction
+from django.db.models import BooleanField, Case, Count, Exists, F, Max, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest, Left, Length
 from django.utils import timezone
 from django.utils.text import slugify
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import FileExtensionValidator
 from django.dispatch import receiver
 
-from utils.image import validate_image_dimensions, validate_image_size
+from utils.image import (
+    delete_variants, normalize_image, reset_variants, schedule_removal, schedule_variants, validate_image_dimensions,
+    validate_image_size, variants_ready,
+)
+from utils.tracking import FieldTrackerMixin
 from apps.users.models import Users
+from apps.forum import cache as thread_cache, events, search
 
 """
     Modelos da aplicação para Threads, Posts e Tags.
@@ -16,29 +25,290 @@ from apps.users.models import Users
     - Post: Representa as respostas dentro de uma thread.
 """
 
+SLUG_SUFFIX_RESERVE = 6  # Espaço reservado no slug para sufixos como "-12345"
+SLUG_MAX_ATTEMPTS = 5  # Tentativas ao colidir com outra thread criada ao mesmo tempo
+
+# Pesos da pontuação "em alta" (hot_score); o decaimento periódico reduz a pontuação acumulada
+HOT_THREAD_WEIGHT = 3.0  # Pontuação inicial de uma thread nova
+HOT_LIKE_WEIGHT = 1.0
+HOT_POST_WEIGHT = 2.0
+HOT_SCORE_FLOOR = 0.01  # Abaixo disso a pontuação é zerada pelo decaimento
+
+
+class TagsQuerySet(models.QuerySet):
+    """
+    Consultas reutilizáveis para tags.
+
+    - resolve: Obtém (criando se preciso) as tags de uma lista de nomes em poucas consultas.
+    - adjust_counts: Soma `delta` ao contador de threads das tags informadas.
+    - recount_counts: Recalcula o contador a partir da tabela de ligação (ignorando threads excluídas).
+    """
+
+    def resolve(self, names):
+        """
+        Retorna as tags com os nomes informados: um SELECT com IN para as existentes e, se faltar
+        alguma, um INSERT em lote (ignorando conflitos com criações concorrentes) e um novo SELECT.
+        """
+        names = set(names)
+        if not names:
+            return []
+
+        tags = list(self.filter(name__in=names))
+        missing = names - {tag.name for tag in tags}
+        if missing:
+            self.bulk_create([self.model(name=name) for name in missing], ignore_conflicts=True)
+            tags += list(self.filter(name__in=missing))
+        return tags
+
+    def adjust_counts(self, ids, delta):
+        if not ids or not delta:
+            return 0
+        return self.filter(pk__in=ids).update(thread_count=Greatest(F('thread_count') + delta, 0))
+
+    def recount_counts(self):
+        links = self.model.thread_set.through.objects.filter(
+            tags=OuterRef('pk'), thread__deleted_at__isnull=True
+        ).values('tags')
+        return self.update(thread_count=Coalesce(Subquery(links.annotate(total=Count('*')).values('total')), 0))
+
+
 class Tags(models.Model):
     """
     Modelo que representa uma tag utilizada para categorizar threads.
 
     - name: Nome único da tag.
+    - thread_count: Quantidade de threads com a tag (contador desnormalizado).
     """
 
     name = models.CharField(max_length=100, unique=True)
+    thread_count = models.PositiveIntegerField(default=0)  # Mantido por Thread.set_tags e pelos sinais abaixo
+
+    objects = TagsQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Listagem das tags mais usadas
+            models.Index(fields=['-thread_count', '-id'], name='forum_tags_popular_idx'),
+            # Autocomplete por prefixo (LIKE 'abc%'); no PostgreSQL o opclass permite usar o índice
+            # mesmo com collation diferente de "C"
+            models.Index(fields=['name'], name='forum_tags_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ]
 
     def __str__(self):
         return self.name  # Retorna o nome da tag para facilitar a identificação
 
 
-class Thread(models.Model):
+class ThreadQuerySet(models.QuerySet):
+    """
+    Consultas reutilizáveis para as listagens de threads.
+
+    - with_like_state: Anota se o usuário atual curtiu a thread.
+    - with_summary: Carrega apenas o necessário para o card da thread (sem posts e sem o conteúdo completo).
+    - add_like / remove_like: Curtem/descurtem de forma idempotente, em um único INSERT/DELETE.
+    - increment_counters: Atualiza os contadores desnormalizados (e a pontuação "em alta") com expressões F().
+    - recount_counters: Recalcula os contadores a partir das tabelas de origem.
+    - decay_hot_scores: Aplica o decaimento da pontuação "em alta" em um único UPDATE.
+    - recompute_hot_scores: Recalcula a pontuação "em alta" a partir dos contadores e da última atividade.
+    - mark_deleted: Exclusão lógica em lote (a remoção definitiva fica com `apps.forum.purge`).
+    - add_views: Soma visualizações acumuladas a várias threads em um único UPDATE.
+    """
+
+    EXCERPT_LENGTH = 200
+
+    def with_like_state(self, user=None):
+        """
+        Anota `is_liked` na própria consulta principal (o total vem da coluna `like_count`).
+
+        Para usuários anônimos `is_liked` é a constante False, sem consultar a tabela de curtidas.
+        """
+        if user is not None and user.is_authenticated:
+            likes = self.model.likes.through.objects.filter(thread=OuterRef('pk'), users=user.pk)
+            is_liked = Exists(likes)
+        else:
+            is_liked = Value(False, output_field=BooleanField())
+
+        return self.annotate(is_liked=is_liked)
+
+    def with_summary(self, user=None):
+        """
+        Seleciona as colunas do card e o trecho do conteúdo, de modo que uma página inteira saia
+        de uma única consulta (mais o prefetch das tags).
+        """
+        return (
+            self.select_related('author')
+            .only(
+                'id', 'title', 'slug', 'cover', 'like_count', 'post_count', 'last_activity_at', 'hot_score',
+                'view_count', 'created_at', 'updated_at', 'cover_variants_ready',
+                'author__id', 'author__username', 'author__photo', 'author__photo_variants_ready',
+            )
+            .prefetch_related('tags')
+            .with_like_state(user)
+            # Um caractere extra indica ao serializer que o conteúdo foi truncado
+            .annotate(excerpt=Left('content', self.EXCERPT_LENGTH + 1))
+        )
+
+    def add_like(self, pk, user_id):
+        """
+        Registra a curtida com um único INSERT, tolerando conflito com a restrição única (thread, usuário).
+        Retorna True se a curtida foi criada agora e False se ela já existia.
+        """
+        Like = self.model.likes.through
+
+        with transaction.atomic():
+            try:
+                with transaction.atomic():  # Savepoint: o conflito não invalida a transação externa
+                    Like.objects.create(thread_id=pk, users_id=user_id)
+            except IntegrityError:
+                return False
+
+            self.increment_counters(pk, likes=1)
+        thread_cache.bump_version(pk)  # Escrita direta na tabela de ligação não dispara m2m_changed
+        return True
+
+    def remove_like(self, pk, user_id):
+        """
+        Remove a curtida com um único DELETE. Retorna True se havia uma curtida para remover.
+        """
+        Like = self.model.likes.through
+
+        with transaction.atomic():
+            deleted, _ = Like.objects.filter(thread_id=pk, users_id=user_id).delete()
+            if not deleted:
+                return False
+
+            self.increment_counters(pk, likes=-1)
+        thread_cache.bump_version(pk)
+        return True
+
+    def liked_slugs(self, user, slugs):
+        """ Retorna, em uma consulta, quais dos slugs informados o usuário curtiu. """
+        Like = self.model.likes.through
+        return set(
+            Like.objects.filter(users_id=user.pk, thread__slug__in=slugs).values_list('thread__slug', flat=True)
+        )
+
+    def increment_counters(self, pk, likes=0, posts=0, touch=False):
+        """
+        Soma `likes`/`posts` aos contadores da thread em um único UPDATE atômico.
+
+        A pontuação "em alta" recebe o peso de cada curtida/post com valor cheio; como ela decai com o
+        tempo, uma remoção pode subtrair mais do que a curtida antiga ainda valia (limitado a zero).
+
+        - touch: Atualiza também `last_activity_at` para o momento atual.
+        """
+        updates = {}
+        if likes:
+            updates['like_count'] = Greatest(F('like_count') + likes, 0)
+        if posts:
+            updates['post_count'] = Greatest(F('post_count') + posts, 0)
+        if likes or posts:
+            updates['hot_score'] = Greatest(F('hot_score') + (likes * HOT_LIKE_WEIGHT + posts * HOT_POST_WEIGHT), 0.0)
+        if touch:
+            updates['last_activity_at'] = timezone.now()
+
+        if not updates:
+            return 0
+        return self.filter(pk=pk).update(**updates)
+
+    def recount_counters(self):
+        """
+        Recalcula `like_count`, `post_count` e `last_activity_at` das threads do queryset
+        com subconsultas correlacionadas, em um único UPDATE.
+        """
+        likes = self.model.likes.through.objects.filter(thread=OuterRef('pk')).values('thread')
+        posts = Post.objects.filter(thread=OuterRef('pk')).values('thread')
+
+        return self.update(
+            like_count=Coalesce(Subquery(likes.annotate(total=Count('*')).values('total')), 0),
+            post_count=Coalesce(Subquery(posts.annotate(total=Count('*')).values('total')), 0),
+            last_activity_at=Coalesce(Subquery(posts.annotate(last=Max('created_at')).values('last')), 'created_at'),
+        )
+
+    def add_views(self, counts):
+        """
+        Soma `{thread_id: visualizações}` a `view_count` com um único UPDATE ... CASE
+        (usado por `apps.forum.view_counter`).
+        """
+        if not counts:
+            return 0
+        whens = [When(pk=pk, then=F('view_count') + views) for pk, views in counts.items()]
+        return self.filter(pk__in=counts).update(
+            view_count=Case(*whens, default=F('view_count'), output_field=models.PositiveBigIntegerField())
+        )
+
+    def decay_hot_scores(self, factor):
+        """
+        Multiplica a pontuação "em alta" das threads do queryset por `factor` (0 < factor < 1) em um
+        único UPDATE. Pontuações que ficariam abaixo de HOT_SCORE_FLOOR são zeradas, e as que já são
+        zero não são reescritas.
+        """
+        return self.filter(hot_score__gt=0).update(
+            hot_score=Case(
+                When(hot_score__lt=HOT_SCORE_FLOOR / factor, then=Value(0.0)),
+                default=F('hot_score') * factor,
+            )
+        )
+
+    def recompute_hot_scores(self, half_life_hours):
+        """
+        Recalcula a pontuação "em alta" das threads do queryset a partir dos contadores já
+        reconciliados: pesos de criação, curtidas e posts, decaídos pelo tempo desde `last_activity_at`
+        (meia-vida de `half_life_hours`). Usado depois de `recount_counters`, que corrige os contadores
+        mas não a pontuação acumulada por `increment_counters`. Retorna as linhas atualizadas.
+        """
+        now = timezone.now()
+        threads = list(self.only('id', 'like_count', 'post_count', 'last_activity_at'))
+        for thread in threads:
+            hours = max((now - thread.last_activity_at).total_seconds() / 3600, 0)
+            weight = HOT_THREAD_WEIGHT + thread.like_count * HOT_LIKE_WEIGHT + thread.post_count * HOT_POST_WEIGHT
+            score = weight * 0.5 ** (hours / half_life_hours)
+            thread.hot_score = score if score >= HOT_SCORE_FLOOR else 0.0
+        return self.model.all_objects.bulk_update(threads, ['hot_score'])
+
+    def mark_deleted(self):
+        """
+        Marca as threads do queryset como excluídas em um único UPDATE. Elas deixam de aparecer na
+        hora (listagens, detalhe, busca e contadores das tags); posts, curtidas e arquivos continuam
+        no banco até a remoção definitiva em segundo plano. Retorna os ids marcados.
+        """
+        ids = list(self.filter(deleted_at__isnull=True).values_list('pk', flat=True))
+        if not ids:
+            return []
+
+        Link = self.model.tags.through
+        with transaction.atomic():
+            self.model.all_objects.filter(pk__in=ids).update(deleted_at=timezone.now())
+            Tags.objects.filter(pk__in=Link.objects.filter(thread_id__in=ids).values('tags_id')).recount_counts()
+        search.unindex(self.model, ids)
+        thread_cache.bump_version(*ids)
+        return ids
+
+
+class ThreadManager(models.Manager.from_queryset(ThreadQuerySet)):
+    """ Manager padrão das threads: esconde as excluídas que aguardam a remoção definitiva. """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class Thread(FieldTrackerMixin, models.Model):
     """
     Modelo que representa uma thread (tópico de discussão).
 
     - cover: Imagem de capa da thread.
+    - cover_variants_ready: Indica que as miniaturas da capa atual já foram geradas.
     - title: Título da thread.
     - slug: Identificador único baseado no título.
     - content: Conteúdo da thread.
     - tags: Tags associadas à thread.
     - author: Usuário que criou a thread.
+    - like_count / post_count: Contadores desnormalizados de curtidas e posts.
+    - last_activity_at: Data do último post (ou da criação, se não houver posts).
+    - hot_score: Pontuação "em alta": soma dos pesos de curtidas e posts, com decaimento exponencial
+      aplicado periodicamente pelo comando `decay_hot_scores`.
+    - view_count: Visualizações do detalhe, gravadas em lote (ver `apps.forum.view_counter`).
+    - deleted_at: Momento da exclusão lógica; a linha é apagada depois, em segundo plano.
+    - search_vector: Vetor de busca textual (título com peso A, conteúdo com peso B).
     - created_at: Data de criação.
     - updated_at: Data da última modificação.
     """
@@ -53,6 +323,7 @@ class Thread(models.Model):
         null=True, 
         blank=True
     )
+    cover_variants_ready = models.BooleanField(default=False, editable=False)  # Miniaturas da capa atual geradas
     title = models.CharField(max_length=255)
     slug = models.SlugField(unique=True, blank=False)
     content = models.TextField()
@@ -61,29 +332,119 @@ class Thread(models.Model):
     author = models.ForeignKey(Users, on_delete=models.CASCADE)  # Relaciona a thread a um usuário
     created_at = models.DateTimeField(default=timezone.now)  # Define a data de criação automaticamente
     updated_at = models.DateTimeField(auto_now=True)  # Atualiza a data toda vez que a thread for alterada
+    like_count = models.PositiveIntegerField(default=0)  # Mantido pelas views de curtida
+    post_count = models.PositiveIntegerField(default=0)  # Mantido pelas views de criação/remoção de posts
+    last_activity_at = models.DateTimeField(default=timezone.now)  # Atualizado a cada novo post
+    hot_score = models.FloatField(default=HOT_THREAD_WEIGHT)  # Mantido por increment_counters/decay_hot_scores
+    view_count = models.PositiveBigIntegerField(default=0)  # Atualizado em lote, com atraso
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)  # Mantido por apps.forum.search (PostgreSQL)
+
+    objects = ThreadManager()  # Apenas threads não excluídas
+    all_objects = ThreadQuerySet.as_manager()  # Inclui as excluídas (remoção definitiva, slugs)
+    # Usados para recalcular o slug, reindexar a busca e limpar a capa antiga
+    tracked_fields = ('title', 'content', 'cover')
+
+    class Meta:
+        indexes = [
+            # Índice do feed paginado por keyset (ordem: mais recentes primeiro)
+            models.Index(fields=['-created_at', '-id'], name='forum_thread_feed_idx'),
+            models.Index(fields=['-like_count', '-id'], name='forum_thread_liked_idx'),
+            models.Index(fields=['-last_activity_at', '-id'], name='forum_thread_active_idx'),
+            models.Index(fields=['-hot_score', '-id'], name='forum_thread_hot_idx'),
+        ]
+
+    @classmethod
+    def next_free_slug(cls, base):
+        """
+        Encontra o próximo slug livre para `base` com uma única consulta indexada.
+
+        Busca, por prefixo, o maior sufixo numérico já usado (`base`, `base-1`, `base-2`, ...)
+        ordenando por tamanho e valor, e devolve o seguinte.
+        """
+        last = (
+            cls.all_objects.filter(
+                models.Q(slug=base) | models.Q(slug__startswith=f'{base}-', slug__regex=rf'^{base}-[0-9]+$')
+            )
+            .annotate(slug_length=Length('slug'))
+            .order_by('-slug_length', '-slug')
+            .values_list('slug', flat=True)
+            .first()
+        )
+
+        if last is None:
+            return base
+        if last == base:
+            return f'{base}-1'
+        return f'{base}-{int(last.rsplit("-", 1)[1]) + 1}'
+
+    def slug_base(self):
+        """ Slug do título, truncado para sobrar espaço para o sufixo numérico. """
+        max_length = self._meta.get_field('slug').max_length - SLUG_SUFFIX_RESERVE
+        return slugify(self.title)[:max_length].strip('-') or 'thread'
 
     def save(self, *args, **kwargs):
         """ 
         Gera um slug único baseado no título da thread e evita duplicações. 
+
+        O slug só é recalculado na criação ou quando o título muda para outro slug (uma edição que só
+        troca maiúsculas ou pontuação mantém o slug atual, inclusive o sufixo). Se outra requisição ocupar o
+        mesmo slug entre a consulta e o INSERT, a restrição única dispara e o slug é recalculado.
         """
-        self.slug = slugify(self.title)  # Converte o título para um slug formatado
+        if self._state.adding:
+            self.last_activity_at = self.created_at  # Sem posts, a última atividade é a criação
+
+        if not (self._state.adding or self.has_changed('title') or not self.slug):
+            super().save(*args, **kwargs)  # Chama o método padrão de salvamento
+            return
+
+        base = self.slug_base()
+        if not self._state.adding and self.slug and re.fullmatch(rf'{re.escape(base)}(-[0-9]+)?', self.slug):
+            super().save(*args, **kwargs)  # O título mudou, mas o slug atual já serve para ele
+            return
+
+        for attempt in range(SLUG_MAX_ATTEMPTS):
+            self.slug = self.next_free_slug(base)
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                break
+            except IntegrityError:
+                slug_taken = self.__class__.all_objects.filter(slug=self.slug).exclude(pk=self.pk).exists()
+                if not slug_taken or attempt == SLUG_MAX_ATTEMPTS - 1:
+                    raise
 
-        unique_slug = self.slug
-        counter = 1
+    def set_tags(self, names):
+        """
+        Define as tags da thread aplicando apenas a diferença na tabela de ligação:
+        um INSERT em lote para as novas e um DELETE para as removidas. Os contadores das
+        tags afetadas são ajustados na mesma transação.
+        """
+        Link = self.tags.through
+        wanted = {tag.pk for tag in Tags.objects.resolve(names)}
+        current = set(Link.objects.filter(thread_id=self.pk).values_list('tags_id', flat=True))
 
-        # Garante que o slug seja único
-        while self.__class__.objects.filter(slug=unique_slug).exists():
-            unique_slug = f"{self.slug}-{counter}"
-            counter += 1
-        
-        self.slug = unique_slug  # Atualiza o slug com um valor único
+        added, removed = wanted - current, current - wanted
+        with transaction.atomic():
+            if added:
+                Link.objects.bulk_create(
+                    [Link(thread_id=self.pk, tags_id=tag_id) for tag_id in added], ignore_conflicts=True
+                )
+                Tags.objects.adjust_counts(added, 1)
+            if removed:
+                Link.objects.filter(thread_id=self.pk, tags_id__in=removed).delete()
+                Tags.objects.adjust_counts(removed, -1)
 
-        super().save(*args, **kwargs)  # Chama o método padrão de salvamento
+        if hasattr(self, '_prefetched_objects_cache'):
+            self._prefetched_objects_cache.pop('tags', None)
+        if added or removed:
+            thread_cache.bump_version(self.pk)
+        return added, removed
 
     def __str__(self):
         return self.title  # Retorna o título da thread para facilitar a identificação
 
-class Post(models.Model):
+class Post(FieldTrackerMixin, models.Model):
     """
     Modelo que representa um post dentro de uma thread.
 
@@ -92,6 +453,7 @@ class Post(models.Model):
     - author: Usuário que criou o post.
     - created_at: Data de criação.
     - updated_at: Data da última modificação.
+    - search_vector: Vetor de busca textual do conteúdo.
     - parent_post: Post ao qual este post está respondendo (caso seja uma resposta).
     """
 
@@ -100,6 +462,15 @@ class Post(models.Model):
     author = models.ForeignKey(Users, on_delete=models.CASCADE)  # Relaciona o post a um usuário
     created_at = models.DateTimeField(default=timezone.now)  # Define a data de criação automaticamente
     updated_at = models.DateTimeField(auto_now=True)  # Atualiza a data toda vez que o post for alterado
+    search_vector = SearchVectorField(null=True, editable=False)  # Mantido por apps.forum.search (PostgreSQL)
+
+    tracked_fields = ('content',)  # Usado para reindexar a busca só quando o texto muda
+
+    class Meta:
+        indexes = [
+            # Posts de uma thread em ordem cronológica (paginação por keyset e salto até um post)
+            models.Index(fields=['thread', 'created_at', 'id'], name='forum_post_thread_idx'),
+        ]
 
     def __str__(self):
         """
@@ -114,11 +485,21 @@ class Post(models.Model):
 @receiver(models.signals.post_delete, sender=Thread)
 def deletar_imagem_apos_excluir(sender, instance, **kwargs):
     """ 
-    Remove a imagem de capa do servidor quando a thread for excluída.
+    Agenda a remoção da imagem de capa (e das miniaturas) quando a thread for excluída.
     """
     if instance.cover:  # Verifica se a thread possui uma imagem de capa
-        if os.path.isfile(instance.cover.path):  # Garante que o arquivo existe
-            os.remove(instance.cover.path)  # Exclui o arquivo de imagem
+        schedule_removal(instance.cover.storage, instance.cover.name)
+
+
+@receiver(models.signals.pre_save, sender=Thread)
+def normalize_uploaded_image(sender, instance, **kwargs):
+    """ 
+    Recodifica o novo arquivo da capa antes de gravá-lo (sem EXIF e com qualidade limitada).
+    """
+    normalized = normalize_image(instance.cover)
+    if normalized is not None:
+        instance.cover = normalized
+    reset_variants(instance, 'cover')
 
 
 @receiver(models.signals.pre_save, sender=Thread)
@@ -126,15 +507,150 @@ def delete_old_image(sender, instance, **kwargs):
     """ 
     Remove a imagem antiga quando a capa da thread for alterada. 
     """
-    if not instance.pk:  # Se a thread ainda não existir no banco de dados, não faz nada
+    # Só age se a capa mudou desde o carregamento; o valor antigo vem do snapshot, sem nova consulta
+    if not instance.pk or not instance.has_changed('cover'):
         return
 
-    try:
-        old_instance = sender.objects.get(pk=instance.pk)  # Obtém a versão anterior da thread
-    except sender.DoesNotExist:
+    old_cover = instance.get_initial('cover')
+    if old_cover:  # Se a thread já tinha uma imagem e o campo foi atualizado
+        old_path = instance.cover.storage.path(old_cover)
+        if os.path.isfile(old_path):  # Verifica se a imagem antiga existe
+            os.remove(old_path)  # Exclui a imagem antiga do servidor
+        delete_variants(instance.cover.storage, old_cover)
+
+
+@receiver(models.signals.post_save, sender=Thread)
+def generate_cover_variants(sender, instance, created, **kwargs):
+    """
+    Agenda a geração das miniaturas da capa quando ela é enviada ou trocada.
+    """
+    if instance.cover and (created or instance.has_changed('cover')):
+        schedule_variants(instance.cover)
+
+
+@receiver(variants_ready, sender=Thread)
+def invalidate_cover_variants(sender, pk, **kwargs):
+    """ As miniaturas da capa ficaram prontas: detalhe e feed passam a exibir as URLs delas. """
+    thread_cache.bump_version(pk)
+
+
+@receiver(variants_ready, sender=Users)
+def invalidate_author_photo_variants(sender, pk, **kwargs):
+    """ As miniaturas da foto ficaram prontas: invalida as threads em que o usuário aparece como autor. """
+    thread_ids = (
+        Thread.all_objects.filter(Q(author_id=pk) | Q(posts__author_id=pk)).values_list('pk', flat=True).distinct()
+    )
+    thread_cache.bump_version(*thread_ids)
+
+
+# ----- Sinais para manter os contadores das tags -----
+
+@receiver(models.signals.pre_delete, sender=Thread)
+def decrement_tag_counts(sender, instance, **kwargs):
+    """ Desconta a thread das suas tags antes que a ligação seja removida em cascata. """
+    tag_ids = list(sender.tags.through.objects.filter(thread_id=instance.pk).values_list('tags_id', flat=True))
+    Tags.objects.adjust_counts(tag_ids, -1)
+
+
+@receiver(models.signals.m2m_changed, sender=Thread.tags.through)
+def sync_tag_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Mantém os contadores quando as tags são alteradas via `thread.tags.add/remove/clear`
+    (ex.: pelo admin). `Thread.set_tags` escreve direto na tabela de ligação e já ajusta os contadores.
+    """
+    if reverse:  # Alterações feitas a partir da tag (tag.thread_set) ficam para o reconcile_forum_counters
+        return
+
+    if action == 'pre_clear':
+        instance._cleared_tag_ids = list(instance.tags.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        Tags.objects.adjust_counts(getattr(instance, '_cleared_tag_ids', []), -1)
+    elif action in ('post_add', 'post_remove'):
+        # Em post_add o Django já removeu de pk_set as tags que a thread tinha
+        Tags.objects.adjust_counts(pk_set, 1 if action == 'post_add' else -1)
+
+
+# ----- Sinais para invalidar o cache de detalhe das threads -----
+
+@receiver(models.signals.post_save, sender=Thread)
+@receiver(models.signals.post_delete, sender=Thread)
+def invalidate_thread_cache(sender, instance, **kwargs):
+    thread_cache.bump_version(instance.pk)
+
+
+@receiver(models.signals.post_save, sender=Post)
+@receiver(models.signals.post_delete, sender=Post)
+def invalidate_thread_cache_for_post(sender, instance, **kwargs):
+    thread_cache.bump_version(instance.thread_id)
+
+
+@receiver(models.signals.m2m_changed, sender=Thread.likes.through)
+@receiver(models.signals.m2m_changed, sender=Thread.tags.through)
+def invalidate_thread_cache_for_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
         return
 
-    # Se a thread já tinha uma imagem e o campo for atualizado com uma nova imagem
-    if old_instance.cover and old_instance.cover != instance.cover:  
-        if os.path.isfile(old_instance.cover.path):  # Verifica se a imagem antiga existe
-            os.remove(old_instance.cover.path)  # Exclui a imagem antiga do servidor
\ No newline at end of file
+    if not reverse:
+        thread_cache.bump_version(instance.pk)
+    elif pk_set:  # Alteração feita a partir do usuário/tag: pk_set contém as threads
+        thread_cache.bump_version(*pk_set)
+    else:  # clear() reverso não informa as threads afetadas
+        thread_cache.bump_version(*getattr(instance, '_cleared_thread_ids', []))
+
+
+@receiver(models.signals.m2m_changed, sender=Thread.likes.through)
+@receiver(models.signals.m2m_changed, sender=Thread.tags.through)
+def remember_cleared_threads(sender, instance, action, reverse, model, **kwargs):
+    """ Guarda as threads ligadas antes de um clear() reverso para poder invalidá-las depois. """
+    if action == 'pre_clear' and reverse:
+        # Na tabela de ligação o campo do outro lado tem o nome do modelo ('users' ou 'tags')
+        related = sender.objects.filter(**{instance._meta.model_name: instance})
+        instance._cleared_thread_ids = list(related.values_list('thread_id', flat=True))
+
+
+# ----- Sinais que publicam os eventos em tempo real (ver apps.forum.events) -----
+
+def post_event_data(post):
+    return {
+        'id': post.pk,
+        'content': post.content,
+        'author': {'id': post.author_id, 'username': post.author.username},
+        'created_at': post.created_at,
+        'updated_at': post.updated_at,
+    }
+
+
+@receiver(models.signals.post_save, sender=Post)
+def publish_post_saved(sender, instance, created, **kwargs):
+    if created:
+        events.publish(instance.thread_id, 'post.created', post_event_data(instance))
+    elif instance.has_changed('content'):
+        events.publish(instance.thread_id, 'post.updated', post_event_data(instance))
+
+
+@receiver(models.signals.post_delete, sender=Post)
+def publish_post_deleted(sender, instance, **kwargs):
+    events.publish(instance.thread_id, 'post.deleted', {'id': instance.pk})
+
+
+# ----- Sinais para manter o índice de busca -----
+
+@receiver(models.signals.post_save, sender=Thread)
+def index_thread_search(sender, instance, created, **kwargs):
+    """ Reindexa a thread na criação ou quando título/conteúdo mudam. """
+    if created or instance.has_changed('title') or instance.has_changed('content'):
+        search.index_thread(instance)
+
+
+@receiver(models.signals.post_save, sender=Post)
+def index_post_search(sender, instance, created, **kwargs):
+    """ Reindexa o post na criação ou quando o conteúdo muda. """
+    if created or instance.has_changed('content'):
+        search.index_post(instance)
+
+
+@receiver(models.signals.post_delete, sender=Thread)
+@receiver(models.signals.post_delete, sender=Post)
+def unindex_search(sender, instance, **kwargs):
+    """ Remove a entrada correspondente do índice FTS5 (apenas SQLite). """
+    search.unindex(sender, [instance.pk])
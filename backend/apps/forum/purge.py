@@ -0,0 +1,50 @@
+from django.conf import settings
+
+from apps.forum import cache as thread_cache, search
+from apps.forum.models import Post, Thread
+from utils.bulk import delete_in_chunks
+
+"""
+    Remoção definitiva, em segundo plano, do conteúdo do fórum já excluído logicamente.
+
+    - purge_thread: Apaga posts, curtidas e tags de uma thread marcada com `deleted_at` em DELETEs
+      por lote e, por fim, a própria thread (cujo sinal agenda a remoção da capa).
+    - purge_user_content: Apaga as threads, posts e curtidas de um usuário e recalcula os
+      contadores das threads de outros usuários que ele afetou.
+
+    As funções são idempotentes: se o processo cair no meio, basta executá-las de novo
+    (ver o comando `purge_deleted`).
+"""
+
+
+def purge_thread(thread_id):
+    if not Thread.all_objects.filter(pk=thread_id, deleted_at__isnull=False).exists():
+        return  # Não existe mais ou não foi excluída
+
+    delete_in_chunks(Post.objects.filter(thread_id=thread_id), before_delete=lambda ids: search.unindex(Post, ids))
+    delete_in_chunks(Thread.likes.through.objects.filter(thread_id=thread_id))
+    delete_in_chunks(Thread.tags.through.objects.filter(thread_id=thread_id))  # Contadores já ajustados na exclusão
+
+    # Sem dependentes, o delete do ORM é um único DELETE, mantendo os sinais da capa, do cache e da busca
+    for thread in Thread.all_objects.filter(pk=thread_id):
+        thread.delete()
+
+
+def purge_user_content(user_id):
+    for thread_id in Thread.all_objects.filter(author_id=user_id).values_list('pk', flat=True):
+        purge_thread(thread_id)
+
+    posts = Post.objects.filter(author_id=user_id)
+    likes = Thread.likes.through.objects.filter(users_id=user_id)
+    affected = set(posts.values_list('thread_id', flat=True).distinct())
+    affected |= set(likes.values_list('thread_id', flat=True).distinct())
+
+    delete_in_chunks(posts, before_delete=lambda ids: search.unindex(Post, ids))
+    delete_in_chunks(likes)
+
+    # Os DELETEs em lote não passam pelos contadores: recalcula as threads afetadas
+    affected = sorted(affected)
+    for start in range(0, len(affected), settings.PURGE_CHUNK_SIZE):
+        chunk = affected[start:start + settings.PURGE_CHUNK_SIZE]
+        Thread.all_objects.filter(pk__in=chunk).recount_counters()
+        thread_cache.bump_version(*chunk)
@@ -0,0 +1,191 @@
+import re
+
+from django.apps import apps
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, Q, Value
+from django.utils.html import escape
+
+"""
+    Busca textual em threads e posts.
+
+    - PostgreSQL: coluna `search_vector` (tsvector, configuração 'portuguese') com índice GIN,
+      atualizada a cada save; ranking com ts_rank e trechos com ts_headline.
+    - SQLite (desenvolvimento/testes): tabelas virtuais FTS5 `forum_thread_fts` e `forum_post_fts`,
+      mantidas pelos mesmos sinais; ranking com bm25 e trechos com snippet().
+    - Outros bancos: busca simples com icontains, sem ranking.
+
+    As funções de busca retornam instâncias dos modelos com os atributos `search_rank` e
+    `search_snippet` (HTML já escapado, com os termos encontrados entre <mark></mark>).
+"""
+
+SEARCH_CONFIG = 'portuguese'  # LANGUAGE_CODE = 'pt-br'
+SNIPPET_WORDS = 24
+
+# Marcadores neutros usados pelo banco; o trecho é escapado e só depois convertido em <mark>
+MARK_START = '\x02'
+MARK_STOP = '\x03'
+
+
+def _thread_model():
+    return apps.get_model('forum', 'Thread')
+
+
+def _post_model():
+    return apps.get_model('forum', 'Post')
+
+
+def fts_table(model):
+    return f'{model._meta.db_table}_fts'
+
+
+def render_snippet(raw):
+    """ Escapa o trecho vindo do banco e destaca os termos encontrados. """
+    return escape(raw or '').replace(MARK_START, '<mark>').replace(MARK_STOP, '</mark>')
+
+
+def fts5_query(text):
+    """ Converte o texto digitado em uma consulta FTS5 segura (termos entre aspas, todos obrigatórios). """
+    return ' '.join(f'"{term}"' for term in re.findall(r'\w+', text))
+
+
+# ----- Indexação incremental -----
+
+def index_thread(thread):
+    """ Atualiza o índice de busca da thread após a criação ou mudança de título/conteúdo. """
+    Thread = _thread_model()
+
+    if connection.vendor == 'postgresql':
+        Thread.objects.filter(pk=thread.pk).update(
+            search_vector=SearchVector('title', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('content', weight='B', config=SEARCH_CONFIG)
+        )
+    elif connection.vendor == 'sqlite':
+        table = fts_table(Thread)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT OR REPLACE INTO {table} (rowid, title, content) VALUES (%s, %s, %s)',
+                [thread.pk, thread.title, thread.content],
+            )
+
+
+def index_post(post):
+    """ Atualiza o índice de busca do post após a criação ou mudança de conteúdo. """
+    Post = _post_model()
+
+    if connection.vendor == 'postgresql':
+        Post.objects.filter(pk=post.pk).update(search_vector=SearchVector('content', config=SEARCH_CONFIG))
+    elif connection.vendor == 'sqlite':
+        table = fts_table(Post)
+        with connection.cursor() as cursor:
+            cursor.execute(f'INSERT OR REPLACE INTO {table} (rowid, content) VALUES (%s, %s)', [post.pk, post.content])
+
+
+def unindex(model, pks):
+    """ Remove entradas do índice FTS5 (no PostgreSQL o vetor some junto com a linha). """
+    if connection.vendor != 'sqlite' or not pks:
+        return
+
+    placeholders = ', '.join(['%s'] * len(pks))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {fts_table(model)} WHERE rowid IN ({placeholders})', list(pks))
+
+
+# ----- Consultas -----
+
+def search_threads(text, limit, offset=0):
+    Thread = _thread_model()
+    queryset = Thread.objects.select_related('author')
+
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+        rows = (
+            queryset.filter(search_vector=query)
+            .annotate(
+                search_rank=SearchRank(F('search_vector'), query),
+                search_snippet=SearchHeadline(
+                    'content', query, config=SEARCH_CONFIG, start_sel=MARK_START, stop_sel=MARK_STOP,
+                    max_words=SNIPPET_WORDS, min_words=SNIPPET_WORDS // 2,
+                ),
+            )
+            .order_by('-search_rank', '-id')[offset:offset + limit]
+        )
+        return _with_rendered_snippets(rows)
+
+    if connection.vendor == 'sqlite':
+        # Pesos do bm25: título vale mais que o conteúdo
+        return _fts5_search(queryset, text, limit, offset, rank='bm25({table}, 10.0, 1.0)', snippet_column=-1)
+
+    return _fallback_search(queryset, Q(title__icontains=text) | Q(content__icontains=text), limit, offset)
+
+
+def search_posts(text, limit, offset=0):
+    Post = _post_model()
+    queryset = Post.objects.filter(thread__deleted_at__isnull=True).select_related('author', 'thread')
+
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+        rows = (
+            queryset.filter(search_vector=query)
+            .annotate(
+                search_rank=SearchRank(F('search_vector'), query),
+                search_snippet=SearchHeadline(
+                    'content', query, config=SEARCH_CONFIG, start_sel=MARK_START, stop_sel=MARK_STOP,
+                    max_words=SNIPPET_WORDS, min_words=SNIPPET_WORDS // 2,
+                ),
+            )
+            .order_by('-search_rank', '-id')[offset:offset + limit]
+        )
+        return _with_rendered_snippets(rows)
+
+    if connection.vendor == 'sqlite':
+        return _fts5_search(queryset, text, limit, offset, rank='bm25({table})', snippet_column=0)
+
+    return _fallback_search(queryset, Q(content__icontains=text), limit, offset)
+
+
+def _with_rendered_snippets(rows):
+    rows = list(rows)
+    for row in rows:
+        row.search_snippet = render_snippet(row.search_snippet)
+    return rows
+
+
+def _fts5_search(queryset, text, limit, offset, rank, snippet_column):
+    match = fts5_query(text)
+    if not match:
+        return []
+
+    table = fts_table(queryset.model)
+    rank = rank.format(table=table)
+    # Os filtros do queryset (ex.: threads excluídas) entram na própria consulta, antes do LIMIT/OFFSET,
+    # para que linhas ocultas não encurtem a página
+    visible_sql, visible_params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, {rank} AS score, snippet({table}, {snippet_column}, %s, %s, '…', {SNIPPET_WORDS}) "
+            f'FROM {table} WHERE {table} MATCH %s AND rowid IN ({visible_sql}) '
+            f'ORDER BY score, rowid DESC LIMIT %s OFFSET %s',
+            [MARK_START, MARK_STOP, match, *visible_params, limit, offset],
+        )
+        hits = cursor.fetchall()
+
+    objects = queryset.in_bulk([pk for pk, _, _ in hits])
+    rows = []
+    for pk, score, snippet in hits:
+        row = objects.get(pk)
+        if row is None:  # Índice ainda não sincronizado com uma remoção
+            continue
+        row.search_rank = -score  # bm25 é menor para resultados melhores
+        row.search_snippet = render_snippet(snippet)
+        rows.append(row)
+    return rows
+
+
+def _fallback_search(queryset, condition, limit, offset):
+    rows = list(
+        queryset.filter(condition).annotate(search_rank=Value(0.0)).order_by('-created_at', '-id')[offset:offset + limit]
+    )
+    for row in rows:
+        row.search_snippet = escape(row.content[:200])
+    return rows
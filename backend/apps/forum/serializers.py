@@ -1,22 +1,71 @@
 from rest_framework import serializers
-from apps.users.serializers import UsersSerializer
 from apps.users.models import Users
+from utils.image import ImageVariantsField
 from . import models
 
 """
     Serializers responsáveis por converter os dados dos modelos em JSON e vice-versa.
 
+    - AuthorCardSerializer / AuthorCardField:
+      Card compacto do autor (id, username, foto e miniaturas). O campo monta cada card uma única vez
+      por resposta, reaproveitando-o para os demais objetos do mesmo autor.
+
     - PostsSerializer:
       Serializa os dados dos posts, incluindo respostas associadas.
 
     - ThreadsSerializer:
       Serializa os dados das threads, gerenciando tags e garantindo a criação/atualização adequada.
+
+    - ThreadSummarySerializer:
+      Representação resumida da thread para listagens (sem posts embutidos).
+
+    - TagsSerializer:
+      Tag com o total de threads (contador desnormalizado).
+
+    - ThreadSearchSerializer / PostSearchSerializer:
+      Resultados da busca textual, com relevância e trecho destacado.
 """
 
+class AuthorCardSerializer(serializers.ModelSerializer):
+    """
+    Dados mínimos do autor exibidos nos cards do fórum (com as miniaturas da foto).
+    """
+    photo_variants = ImageVariantsField(source='photo')
+
+    class Meta:
+        model = Users
+        fields = ['id', 'username', 'photo', 'photo_variants']
+
+class AuthorCardField(serializers.PrimaryKeyRelatedField):
+    """
+    Autor: recebe o id na escrita e é exibido como card (AuthorCardSerializer) na leitura.
+
+    Os cards ficam num mapa `{id: card}` guardado no contexto do serializer raiz, que é compartilhado
+    pelos serializers aninhados e pelos itens de uma lista: um autor com vários posts na mesma resposta
+    é serializado uma vez só. O autor deve vir no `select_related`/`prefetch_related` do queryset.
+    """
+    CONTEXT_KEY = 'author_cards'
+
+    def use_pk_only_optimization(self):
+        return False  # O card precisa do objeto completo
+
+    def to_representation(self, value):
+        context = self.context
+        cards = context.setdefault(self.CONTEXT_KEY, {})
+        card = cards.get(value.pk)
+        if card is None:
+            card = cards[value.pk] = AuthorCardSerializer(value, context=context).data
+        return card
+
+class TagsSerializer(serializers.ModelSerializer):
+    threads = serializers.IntegerField(source='thread_count', read_only=True)
+
+    class Meta:
+        model = models.Tags
+        fields = ['id', 'name', 'threads']
+
 class PostsSerializer(serializers.ModelSerializer):
-    author = serializers.PrimaryKeyRelatedField(
-        queryset=Users.objects.all(), write_only=True
-    )
+    author = AuthorCardField(queryset=Users.objects.all())
     thread = serializers.SlugRelatedField(
         slug_field='slug',
         queryset=models.Thread.objects.all()
@@ -27,16 +76,8 @@ class PostsSerializer(serializers.ModelSerializer):
         fields = ['id', 'thread', 'content', 'author', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']  # Campos que não podem ser alterados manualmente
 
-    def to_representation(self, instance):
-        """
-        Exibe o autor como objeto completo na resposta (GET).
-        """
-        rep = super().to_representation(instance)
-        rep['author'] = UsersSerializer(instance.author).data
-        return rep
-
 class ThreadReadSerializer(serializers.ModelSerializer):
-    author = serializers.SerializerMethodField()
+    author = AuthorCardField(read_only=True)
     tags = serializers.SlugRelatedField(
         many=True,
         slug_field='name',  
@@ -45,40 +86,99 @@ class ThreadReadSerializer(serializers.ModelSerializer):
     posts = serializers.SerializerMethodField()
     liked = serializers.SerializerMethodField()
     likes = serializers.SerializerMethodField()
+    views = serializers.IntegerField(source='view_count', read_only=True)
+    cover_variants = ImageVariantsField(source='cover')
 
     class Meta:
         model = models.Thread
         fields = [
-            'id', 'cover', 'title', 'content', 'likes', 'liked',
+            'id', 'cover', 'cover_variants', 'title', 'content', 'likes', 'liked', 'views',
             'tags', 'author', 'slug', 'posts', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['slug', 'posts', 'likes', 'liked', 'created_at', 'updated_at']
-
-    def to_representation(self, instance):
-        # Representação customizada para 'author' e 'tags'
-        rep = super().to_representation(instance)
-        rep['author'] = UsersSerializer(instance.author).data
-        return rep
-
-    def get_author(self, obj):
-        return {
-            "username": obj.author.username,
-            "photo": obj.author.photo,
-        }
-    
+        read_only_fields = ['slug', 'posts', 'likes', 'liked', 'views', 'created_at', 'updated_at']
+
     def get_liked(self, obj):
-        # Verifica se o usuário atual curtiu o thread
+        # Usa a anotação de `with_like_state` quando disponível, evitando carregar os usuários que curtiram
+        if hasattr(obj, 'is_liked'):
+            return obj.is_liked
+
         request = self.context.get('request')
-        user = request.user
-        return user in obj.likes.all()
+        user = getattr(request, 'user', None)
+        if not user or not user.is_authenticated:
+            return False
+        return obj.likes.filter(pk=user.pk).exists()
     
     def get_posts(self, instance): 
         posts = instance.posts.all() 
-        return PostsSerializer(posts, many=True).data
+        return PostsSerializer(posts, many=True, context=self.context).data
 
     def get_likes(self, obj):
-        # Conta o número de likes no thread
-        return obj.likes.count()
+        # Contador desnormalizado, mantido pelas views de curtida
+        return obj.like_count
+
+class ThreadSummarySerializer(serializers.ModelSerializer):
+    """
+    Card da thread usado nas listagens.
+
+    Espera um queryset preparado com `Thread.objects.with_summary()`, que já traz o estado de curtida
+    e o trecho do conteúdo; contagens e última atividade vêm das colunas desnormalizadas. Os posts só são retornados pelo endpoint de detalhe.
+    """
+    author = AuthorCardField(read_only=True)
+    tags = serializers.SlugRelatedField(many=True, slug_field='name', read_only=True)
+    excerpt = serializers.SerializerMethodField()
+    likes = serializers.IntegerField(source='like_count', read_only=True)
+    liked = serializers.BooleanField(source='is_liked', read_only=True)
+    posts_count = serializers.IntegerField(source='post_count', read_only=True)
+    views = serializers.IntegerField(source='view_count', read_only=True)
+    last_activity = serializers.DateTimeField(source='last_activity_at', read_only=True)
+    cover_variants = ImageVariantsField(source='cover')
+
+    class Meta:
+        model = models.Thread
+        fields = [
+            'id', 'cover', 'cover_variants', 'title', 'slug', 'excerpt', 'tags', 'author',
+            'likes', 'liked', 'posts_count', 'views', 'last_activity', 'created_at', 'updated_at'
+        ]
+
+    def get_excerpt(self, obj):
+        excerpt = obj.excerpt
+        limit = models.ThreadQuerySet.EXCERPT_LENGTH
+        if len(excerpt) > limit:
+            return excerpt[:limit].rstrip() + '…'
+        return excerpt
+
+class ThreadSearchSerializer(serializers.ModelSerializer):
+    """
+    Resultado da busca de threads (ver `apps.forum.search`).
+
+    - snippet: Trecho do conteúdo já escapado, com os termos encontrados em <mark>.
+    - rank: Relevância calculada pelo banco (maior é melhor).
+    """
+    author = AuthorCardField(read_only=True)
+    snippet = serializers.CharField(source='search_snippet', read_only=True)
+    rank = serializers.FloatField(source='search_rank', read_only=True)
+    likes = serializers.IntegerField(source='like_count', read_only=True)
+    posts_count = serializers.IntegerField(source='post_count', read_only=True)
+
+    class Meta:
+        model = models.Thread
+        fields = ['id', 'title', 'slug', 'snippet', 'rank', 'author', 'likes', 'posts_count', 'created_at']
+
+class PostSearchSerializer(serializers.ModelSerializer):
+    """
+    Resultado da busca de posts, com a thread de origem para montar o link.
+    """
+    author = AuthorCardField(read_only=True)
+    thread = serializers.SerializerMethodField()
+    snippet = serializers.CharField(source='search_snippet', read_only=True)
+    rank = serializers.FloatField(source='search_rank', read_only=True)
+
+    class Meta:
+        model = models.Post
+        fields = ['id', 'thread', 'snippet', 'rank', 'author', 'created_at']
+
+    def get_thread(self, obj):
+        return {'slug': obj.thread.slug, 'title': obj.thread.title}
 
 class ThreadWriteSerializer(serializers.ModelSerializer):
     author = serializers.PrimaryKeyRelatedField(queryset=Users.objects.all())
@@ -109,18 +209,14 @@ class ThreadWriteSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         tags = validated_data.pop('tags', [])
         thread = super().create(validated_data)
-        self.add_tags_to_thread(thread, tags)
+        if tags:
+            thread.set_tags(tags)
         return thread
 
     def update(self, instance, validated_data):
         tags = validated_data.pop('tags', None)
         thread = super().update(instance, validated_data)
         if tags is not None:
-            thread.tags.clear()
-            self.add_tags_to_thread(thread, tags)
+            # Só as tags adicionadas/removidas tocam a tabela de ligação
+            thread.set_tags(tags)
         return thread
-
-    def add_tags_to_thread(self, thread, tag_names):
-        for tag_name in tag_names:
-            tag, _ = models.Tags.objects.get_or_create(name=tag_name)
-            thread.tags.add(tag)
\ No newline at end of file
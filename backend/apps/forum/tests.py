@@ -1,14 +1,27 @@
+import json
 import os
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
 from rest_framework import status
 from rest_framework.test import APITestCase
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import override_settings
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.text import slugify
 
 from django.core.files.uploadedfile import SimpleUploadedFile
 from io import BytesIO
 from PIL import Image
 
-from apps.forum.models import Thread, Post
+from apps.forum import events, view_counter
+from apps.forum.models import Thread, Post, Tags
+from utils.checks import check_shared_cache
+from utils.image import VARIANT_SIZES, delete_variants, generate_instance_variants, variant_name
+from apps.users.models import Users
 from apps.users.tests import UsersMixin
 
 class ThreadTests(APITestCase,UsersMixin ):
@@ -42,6 +55,201 @@ class ThreadTests(APITestCase,UsersMixin ):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_get_thread_list_keyset_pagination(self):
+        url = reverse('forum:list_thread')
+        created_at = timezone.now()
+
+        # Threads com o mesmo created_at para garantir o desempate pelo id
+        for index in range(4):
+            Thread.objects.create(title=f'Thread {index}', content='Conteúdo', author=self.user, created_at=created_at)
+
+        response = self.client.get(url, {'page_size': 2})
+        first_page = response.json()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(first_page['results']), 2)
+        self.assertIsNone(first_page['previous'])
+
+        slugs = [thread['slug'] for thread in first_page['results']]
+        next_url = first_page['next']
+        while next_url:
+            page = self.client.get(next_url).json()
+            slugs += [thread['slug'] for thread in page['results']]
+            next_url = page['next']
+
+        expected = list(Thread.objects.order_by('-created_at', '-id').values_list('slug', flat=True))
+        self.assertEqual(slugs, expected)
+
+        previous_page = self.client.get(self.client.get(first_page['next']).json()['previous']).json()
+        self.assertEqual([thread['slug'] for thread in previous_page['results']], slugs[:2])
+
+    def test_get_thread_list_summary_queries(self):
+        url = reverse('forum:list_thread')
+
+        for index in range(5):
+            thread = Thread.objects.create(title=f'Thread {index}', content='x' * 300, author=self.user)
+            thread.likes.add(self.user, self.user2)
+            Post.objects.create(thread=thread, content='Resposta', author=self.user2)
+
+        Thread.objects.recount_counters()
+
+        # Uma consulta para a página (contadores e estado de curtida inclusos) e uma para o prefetch das tags
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+
+        thread = response.json()['results'][0]
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('posts', thread)
+        self.assertEqual(thread['likes'], 2)
+        self.assertEqual(thread['posts_count'], 1)
+        self.assertEqual(thread['author']['username'], self.user.username)
+        self.assertEqual(len(thread['excerpt']), 201)
+        self.assertTrue(thread['excerpt'].endswith('…'))
+
+    def test_get_thread_list_order_by_likes(self):
+        url = reverse('forum:list_thread')
+        popular = Thread.objects.create(title='Popular', content='Conteúdo', author=self.user2)
+
+        self.client.post(reverse('forum:like_thread', args=[popular.slug]))
+
+        response = self.client.get(url, {'order': 'liked'})
+
+        self.assertEqual(response.json()['results'][0]['slug'], popular.slug)
+        self.assertEqual(response.json()['results'][0]['likes'], 1)
+
+    def test_get_thread_list_order_by_hot(self):
+        url = reverse('forum:list_thread')
+        hot = Thread.objects.create(title='Em alta', content='Conteúdo', author=self.user2)
+        Thread.objects.filter(pk=self.thread.pk).update(hot_score=0)
+
+        self.client.post(reverse('forum:like_thread', args=[hot.slug]))
+        hot.refresh_from_db()
+
+        self.assertEqual(hot.hot_score, 4.0)
+        response = self.client.get(url, {'order': 'hot'})
+        self.assertEqual([thread['slug'] for thread in response.json()['results']][:2], [hot.slug, self.thread.slug])
+
+    def test_get_thread_list_order_by_hot_pages_over_snapshot(self):
+        url = reverse('forum:list_thread')
+        second = Thread.objects.create(title='Segunda', content='Conteúdo', author=self.user)
+        Thread.objects.filter(pk=self.thread.pk).update(hot_score=10.0)
+        Thread.objects.filter(pk=second.pk).update(hot_score=5.0)
+
+        first_page = self.client.get(url, {'order': 'hot', 'page_size': 1}).json()
+        self.assertEqual([thread['slug'] for thread in first_page['results']], [self.thread.slug])
+
+        # A pontuação muda entre as páginas: a segunda página segue a ordem da primeira
+        Thread.objects.filter(pk=second.pk).update(hot_score=50.0)
+        second_page = self.client.get(first_page['next']).json()
+        self.assertEqual([thread['slug'] for thread in second_page['results']], [second.slug])
+        self.assertIsNone(second_page['next'])
+
+        previous_page = self.client.get(second_page['previous']).json()
+        self.assertEqual([thread['slug'] for thread in previous_page['results']], [self.thread.slug])
+
+    def test_decay_hot_scores_command(self):
+        Thread.objects.filter(pk=self.thread.pk).update(hot_score=8.0)
+        faded = Thread.objects.create(title='Antiga', content='Conteúdo', author=self.user)
+        Thread.objects.filter(pk=faded.pk).update(hot_score=0.015)
+
+        with override_settings(FORUM_HOT_HALF_LIFE_HOURS=24):
+            call_command('decay_hot_scores', hours=48, stdout=StringIO())
+
+        self.thread.refresh_from_db()
+        faded.refresh_from_db()
+        self.assertAlmostEqual(self.thread.hot_score, 2.0)
+        self.assertEqual(faded.hot_score, 0.0)
+
+    def test_post_thread_like_updates_counter(self):
+        url = reverse('forum:like_thread', args=[self.thread.slug])
+
+        self.client.post(url)
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.like_count, 1)
+
+        self.client.post(url)
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.like_count, 0)
+
+    def test_put_delete_thread_like_idempotent(self):
+        url = reverse('forum:like_thread', args=[self.thread.slug])
+
+        self.client.put(url)
+        response = self.client.put(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {'liked': True, 'likes': 1})
+        self.assertEqual(self.thread.likes.count(), 1)
+
+        self.client.delete(url)
+        response = self.client.delete(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {'liked': False, 'likes': 0})
+        self.assertEqual(self.thread.likes.count(), 0)
+
+    def test_put_thread_like_fail_for_404(self):
+        url = reverse('forum:like_thread', args=['nao-existe'])
+
+        response = self.client.put(url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.json().get('detail'), 'Thread não encontrada!')
+
+    def test_get_liked_threads_status(self):
+        other = Thread.objects.create(title='Outra', content='Conteúdo', author=self.user2)
+        self.client.put(reverse('forum:like_thread', args=[self.thread.slug]))
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('forum:liked_threads'), {'slugs': f'{self.thread.slug},{other.slug}'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {'liked': {self.thread.slug: True, other.slug: False}})
+
+    def test_reconcile_forum_counters_command(self):
+        self.thread.likes.add(self.user, self.user2)
+        Post.objects.create(thread=self.thread, content='Resposta', author=self.user2)
+        Thread.objects.filter(pk=self.thread.pk).update(like_count=10, post_count=10)
+
+        call_command('reconcile_forum_counters', batch_size=1, stdout=StringIO())
+
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.like_count, 2)
+        self.assertEqual(self.thread.post_count, 1)
+        # Criação + 2 curtidas + 1 post, com atividade agora: praticamente sem decaimento
+        self.assertAlmostEqual(self.thread.hot_score, 3.0 + 2 * 1.0 + 1 * 2.0, places=2)
+
+    def test_reconcile_forum_counters_recomputes_hot_score_and_feed(self):
+        newer = Thread.objects.create(title='Recente', content='Conteúdo', author=self.user)
+        two_days_ago = timezone.now() - timedelta(hours=48)
+        Thread.objects.filter(pk=self.thread.pk).update(
+            hot_score=500.0, created_at=two_days_ago, last_activity_at=two_days_ago,
+        )
+        Thread.objects.filter(pk=newer.pk).update(hot_score=0.1)
+        url = reverse('forum:list_thread')
+        response = self.client.get(url, {'order': 'hot'})  # Feed em cache com as pontuações divergentes
+        self.assertEqual(response.json()['results'][0]['slug'], self.thread.slug)
+
+        with override_settings(FORUM_HOT_HALF_LIFE_HOURS=24):
+            call_command('reconcile_forum_counters', stdout=StringIO())
+
+        self.thread.refresh_from_db()
+        newer.refresh_from_db()
+        # Sem curtidas nem posts: peso de criação, decaído por duas meias-vidas na thread antiga
+        self.assertAlmostEqual(self.thread.hot_score, 0.75, places=2)
+        self.assertAlmostEqual(newer.hot_score, 3.0, places=2)
+
+        response = self.client.get(url, {'order': 'hot'})
+        self.assertEqual(response.json()['results'][0]['slug'], newer.slug)
+
+    def test_get_thread_list_fail_for_invalid_cursor(self):
+        url = reverse('forum:list_thread')
+
+        response = self.client.get(url, {'cursor': 'invalido'})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.json().get('detail'), 'Cursor inválido.')
 
     def test_post_thread_create(self):
         url = reverse('forum:create_thread')
@@ -96,7 +304,79 @@ class ThreadTests(APITestCase,UsersMixin ):
         thread = Thread.objects.get(title = data['title'])
 
         thread.cover.delete()        
+
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_post_thread_create_with_cover_generates_variants(self):
+        image_file = BytesIO()
+        Image.new('RGB', (1000, 500), color='green').save(image_file, format='JPEG')
+        cover = SimpleUploadedFile('variant_cover.jpg', image_file.getvalue(), content_type='image/jpeg')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('forum:create_thread'), {'title': 'Capa', 'content': 'Conteúdo', 'cover': cover}, format='multipart')
+
+        thread = Thread.objects.get(title='Capa')
+        storage, name = thread.cover.storage, thread.cover.name
+        for size in VARIANT_SIZES:
+            with Image.open(storage.path(variant_name(name, size))) as variant:
+                self.assertEqual((variant.format, max(variant.size)), ('WEBP', min(size, 1000)))
+
+        response = self.client.get(reverse('forum:detail_thread', args=[thread.slug]))
+        self.assertTrue(response.json()['cover_variants']['256'].endswith(variant_name(name, 256)))
+
+        with self.captureOnCommitCallbacks(execute=True):  # A remoção dos arquivos roda após o commit
+            thread.delete()
+
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(any(storage.exists(variant_name(name, size)) for size in VARIANT_SIZES))
     
+    def test_cover_variants_fall_back_to_original_until_generated(self):
+        image_file = BytesIO()
+        Image.new('RGB', (600, 300), color='blue').save(image_file, format='JPEG')
+        thread = Thread.objects.create(
+            title='Capa pendente', content='Conteúdo', author=self.user,
+            cover=SimpleUploadedFile('pending_cover.jpg', image_file.getvalue(), content_type='image/jpeg'),
+        )
+        self.addCleanup(thread.cover.storage.delete, thread.cover.name)
+        self.addCleanup(delete_variants, thread.cover.storage, thread.cover.name)
+        url = reverse('forum:detail_thread', args=[thread.slug])
+
+        # A tarefa ainda não rodou (o commit do teste nunca acontece): todas as chaves apontam para o original
+        response = self.client.get(url)
+        self.assertEqual(set(response.json()['cover_variants'].values()), {response.json()['cover']})
+
+        generate_instance_variants('forum.Thread', thread.pk, 'cover', thread.cover.name)
+
+        refreshed = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(refreshed.status_code, status.HTTP_200_OK)
+        self.assertTrue(refreshed.json()['cover_variants']['256'].endswith(variant_name(thread.cover.name, 256)))
+
+    def test_cover_variants_are_not_shared_across_extensions(self):
+        threads = []
+        for extension, image_format, color in (('jpg', 'JPEG', 'red'), ('png', 'PNG', 'blue')):
+            image_file = BytesIO()
+            Image.new('RGB', (300, 300), color=color).save(image_file, format=image_format)
+            thread = Thread.objects.create(
+                title=f'Capa {extension}', content='Conteúdo', author=self.user,
+                cover=SimpleUploadedFile(f'shared_cover.{extension}', image_file.getvalue()),
+            )
+            self.addCleanup(thread.cover.storage.delete, thread.cover.name)
+            self.addCleanup(delete_variants, thread.cover.storage, thread.cover.name)
+            threads.append(thread)
+
+        call_command('generate_image_variants', stdout=StringIO(), stderr=StringIO())
+
+        red, blue = threads
+        storage = red.cover.storage
+        self.assertNotEqual(variant_name(red.cover.name, 64), variant_name(blue.cover.name, 64))
+        for thread, channel in ((red, 0), (blue, 2)):  # Cada miniatura tem a cor da própria capa
+            with Image.open(storage.path(variant_name(thread.cover.name, 64))) as variant:
+                pixel = variant.convert('RGB').getpixel((0, 0))
+                self.assertEqual(max(range(3), key=pixel.__getitem__), channel)
+        self.assertTrue(Thread.objects.get(pk=blue.pk).cover_variants_ready)
+
+        delete_variants(storage, red.cover.name)
+        self.assertTrue(storage.exists(variant_name(blue.cover.name, 64)))
+
     def test_post_thread_create_fail_for_unauthorized(self):
         url = reverse('forum:create_thread')
 
@@ -272,6 +552,161 @@ class ThreadTests(APITestCase,UsersMixin ):
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         self.assertEqual(response.json(), {'detail': 'Você não tem permissão para fazer essa ação no post'})
 
+    def test_thread_slug_allocation(self):
+        second = Thread.objects.create(title='Test Thread', content='Conteúdo', author=self.user)
+        third = Thread.objects.create(title='Test Thread', content='Conteúdo', author=self.user)
+
+        self.assertEqual(self.thread.slug, 'test-thread')
+        self.assertEqual(second.slug, 'test-thread-1')
+        self.assertEqual(third.slug, 'test-thread-2')
+
+        # Um título longo gera um slug que cabe na coluna, com espaço para o sufixo
+        long_thread = Thread.objects.create(title='a' * 255, content='Conteúdo', author=self.user)
+        self.assertLessEqual(len(long_thread.slug), Thread._meta.get_field('slug').max_length)
+
+    def test_thread_slug_allocation_constant_queries(self):
+        for _ in range(5):
+            Thread.objects.create(title='Reciclagem', content='Conteúdo', author=self.user)
+
+        # Uma consulta para achar o sufixo livre + savepoint, INSERT e release + indexação da busca
+        with self.assertNumQueries(5):
+            thread = Thread.objects.create(title='Reciclagem', content='Conteúdo', author=self.user)
+
+        self.assertEqual(thread.slug, 'reciclagem-5')
+
+    def test_thread_slug_kept_when_title_edit_keeps_slug_base(self):
+        second = Thread.objects.create(title='Test Thread', content='Conteúdo', author=self.user)
+
+        self.thread.title = 'Test thread!'
+        self.thread.save()
+        second.title = 'TEST THREAD'
+        second.save()
+
+        self.thread.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(self.thread.slug, 'test-thread')
+        self.assertEqual(second.slug, 'test-thread-1')
+
+    def test_thread_slug_kept_on_update(self):
+        thread = Thread.objects.get(pk=self.thread.pk)
+        thread.content = 'Conteúdo editado'
+        thread.save()
+
+        self.assertEqual(thread.slug, self.thread.slug)
+
+        thread.title = 'Outro título'
+        thread.save()
+
+        self.assertEqual(thread.slug, 'outro-titulo')
+
+    def test_thread_save_without_cover_change_single_query(self):
+        thread = Thread.objects.get(pk=self.thread.pk)
+        thread.content = 'Conteúdo editado'
+
+        # Nem o slug nem a limpeza da capa precisam consultar o banco; só a busca é reindexada
+        with self.assertNumQueries(2):
+            thread.save()
+
+        thread.like_count = 3
+
+        # Sem mudança de texto a busca não é reindexada
+        with self.assertNumQueries(1):
+            thread.save()
+
+    def test_thread_set_tags_bulk_queries(self):
+        Tags.objects.create(name='reciclagem')
+
+        # SELECT das existentes, INSERT em lote + SELECT das novas, SELECT da ligação atual,
+        # e o INSERT da diferença + UPDATE dos contadores dentro de um savepoint
+        with self.assertNumQueries(8):
+            self.thread.set_tags(['reciclagem', 'compostagem', 'energia'])
+
+        self.assertEqual(
+            sorted(self.thread.tags.values_list('name', flat=True)), ['compostagem', 'energia', 'reciclagem']
+        )
+
+    def test_thread_set_tags_applies_only_diff(self):
+        self.thread.set_tags(['reciclagem', 'compostagem'])
+        Link = Thread.tags.through
+        kept = Link.objects.get(thread=self.thread, tags__name='reciclagem').pk
+
+        added, removed = self.thread.set_tags(['reciclagem', 'energia'])
+
+        self.assertEqual(len(added), 1)
+        self.assertEqual(len(removed), 1)
+        # A ligação mantida não é apagada e recriada
+        self.assertTrue(Link.objects.filter(pk=kept).exists())
+        self.assertEqual(sorted(self.thread.tags.values_list('name', flat=True)), ['energia', 'reciclagem'])
+
+    def test_tag_counts_follow_thread_writes(self):
+        self.client.post(reverse('forum:create_thread'), {
+            'title': 'Hortas', 'content': 'Conteúdo', 'tags': ['Hortas', 'Compostagem'],
+        }, format='json')
+        thread = Thread.objects.get(title='Hortas')
+        counts = lambda: dict(Tags.objects.values_list('name', 'thread_count'))
+
+        self.assertEqual(counts(), {'hortas': 1, 'compostagem': 1})
+
+        self.client.patch(reverse('forum:update_thread', args=[thread.slug]), {'tags': ['hortas']}, format='json')
+        self.assertEqual(counts(), {'hortas': 1, 'compostagem': 0})
+
+        self.thread.tags.add(Tags.objects.get(name='compostagem'))
+        self.assertEqual(counts(), {'hortas': 1, 'compostagem': 1})
+
+        thread.delete()
+        self.assertEqual(counts(), {'hortas': 0, 'compostagem': 1})
+
+    def test_get_tag_list_and_autocomplete(self):
+        other = Thread.objects.create(title='Outra', content='Conteúdo', author=self.user)
+        self.thread.set_tags(['reciclagem', 'residuos'])
+        other.set_tags(['reciclagem'])
+
+        response = self.client.get(reverse('forum:list_tags'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(tag['name'], tag['threads']) for tag in response.json()['results']], [('reciclagem', 2), ('residuos', 1)]
+        )
+
+        response = self.client.get(reverse('forum:autocomplete_tags'), {'q': 'Rec'})
+        self.assertEqual([tag['name'] for tag in response.json()], ['reciclagem'])
+
+    def test_get_thread_list_filtered_by_tags(self):
+        other = Thread.objects.create(title='Outra', content='Conteúdo', author=self.user)
+        Thread.objects.create(title='Sem tag', content='Conteúdo', author=self.user)
+        self.thread.set_tags(['reciclagem'])
+        other.set_tags(['energia', 'reciclagem'])
+
+        response = self.client.get(reverse('forum:list_thread'), {'tags': 'reciclagem,energia', 'page_size': 1})
+        body = response.json()
+        slugs = [item['slug'] for item in body['results']]
+        slugs += [item['slug'] for item in self.client.get(body['next']).json()['results']]
+
+        self.assertEqual(slugs, [other.slug, self.thread.slug])
+
+    def test_reconcile_forum_counters_fixes_tag_counts(self):
+        self.thread.set_tags(['reciclagem'])
+        Tags.objects.update(thread_count=7)
+
+        call_command('reconcile_forum_counters', stdout=StringIO())
+
+        self.assertEqual(Tags.objects.get(name='reciclagem').thread_count, 1)
+
+    def test_thread_slug_retry_on_conflict(self):
+        # Simula outra requisição ocupando o slug entre a consulta e o INSERT
+        with patch.object(Thread, 'next_free_slug', side_effect=['test-thread', 'test-thread-1']):
+            thread = Thread.objects.create(title='Test Thread', content='Conteúdo', author=self.user)
+
+        self.assertEqual(thread.slug, 'test-thread-1')
+
+    def test_thread_slug_retry_on_conflict_with_deleted_thread(self):
+        Thread.objects.filter(pk=self.thread.pk).mark_deleted()  # O slug continua ocupado até a remoção
+
+        with patch.object(Thread, 'next_free_slug', side_effect=['test-thread', 'test-thread-1']):
+            thread = Thread.objects.create(title='Test Thread', content='Conteúdo', author=self.user)
+
+        self.assertEqual(thread.slug, 'test-thread-1')
+
     def test_get_thread_detail(self):
         url = reverse('forum:detail_thread', args=[self.thread.slug])
 
@@ -282,6 +717,158 @@ class ThreadTests(APITestCase,UsersMixin ):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.json().get('slug'), self.thread.slug)
 
+    def test_get_thread_detail_author_cards(self):
+        url = reverse('forum:detail_thread', args=[self.thread.slug])
+        for index in range(3):
+            Post.objects.create(thread=self.thread, content=f'Resposta {index}', author=self.user2)
+
+        # Id pelo slug, curtida, thread + autor, tags, posts + autores: nada de interesses
+        with self.assertNumQueries(5):
+            body = self.client.get(url).json()
+
+        self.assertEqual(set(body['author']), {'id', 'username', 'photo', 'photo_variants'})
+        authors = [post['author'] for post in body['posts']]
+        self.assertEqual(authors[-1]['username'], self.user2.username)
+        self.assertNotIn('email', authors[-1])
+
+    def test_get_thread_detail_counts_views_in_batches(self):
+        url = reverse('forum:detail_thread', args=[self.thread.slug])
+        other = Thread.objects.create(title='Outra', content='Conteúdo', author=self.user)
+        view_counter.flush()  # Descarta o que outros testes deixaram pendente
+        Thread.objects.update(view_count=0)
+
+        with override_settings(FORUM_VIEW_FLUSH_INTERVAL=3600, FORUM_VIEW_FLUSH_TIMER=False):
+            self.client.get(url)
+            # Payload em cache: id pelo slug e curtida, nenhuma escrita no caminho de leitura
+            with self.assertNumQueries(2):
+                self.client.get(url)
+            self.client.get(reverse('forum:detail_thread', args=[other.slug]))
+
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.view_count, 0)
+
+        # Um único UPDATE para todas as threads pendentes
+        with self.assertNumQueries(1):
+            view_counter.flush()
+
+        self.thread.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.thread.view_count, other.view_count), (2, 1))
+
+    def test_view_counter_timer_flushes_without_new_views(self):
+        view_counter.flush()
+        Thread.objects.update(view_count=0)
+
+        with override_settings(FORUM_VIEW_FLUSH_INTERVAL=3600, FORUM_VIEW_FLUSH_TIMER=False):
+            self.client.get(reverse('forum:detail_thread', args=[self.thread.slug]))
+
+        # O que a thread periódica faz: o intervalo já passou e nenhuma nova visualização chegou
+        with override_settings(FORUM_VIEW_FLUSH_INTERVAL=0):
+            self.assertEqual(view_counter.flush_if_due(), 1)
+
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.view_count, 1)
+
+    def test_get_thread_detail_like_state(self):
+        url = reverse('forum:detail_thread', args=[self.thread.slug])
+        self.thread.likes.add(self.user, self.user2)
+        Thread.objects.recount_counters()
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.json().get('likes'), 2)
+        self.assertTrue(response.json().get('liked'))
+
+        self.client.logout()
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json().get('likes'), 2)
+        self.assertFalse(response.json().get('liked'))
+
+    def test_get_thread_detail_served_from_cache(self):
+        url = reverse('forum:detail_thread', args=[self.thread.slug])
+        Post.objects.create(thread=self.thread, content='Primeiro post', author=self.user2)
+        self.client.get(url)
+
+        # Só a busca do id pelo slug e o estado de curtida do usuário
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+
+        self.assertEqual(len(response.json()['posts']), 1)
+
+    def test_get_thread_detail_cache_invalidated_by_writes(self):
+        url = reverse('forum:detail_thread', args=[self.thread.slug])
+        self.client.get(url)
+
+        Post.objects.create(thread=self.thread, content='Novo post', author=self.user2)
+        self.assertEqual(len(self.client.get(url).json()['posts']), 1)
+
+        self.client.put(reverse('forum:like_thread', args=[self.thread.slug]))
+        response = self.client.get(url).json()
+        self.assertEqual((response['likes'], response['liked']), (1, True))
+
+        self.client.logout()
+        self.assertFalse(self.client.get(url).json()['liked'])
+
+        Thread.objects.get(pk=self.thread.pk).set_tags(['reciclagem'])
+        self.assertEqual(self.client.get(url).json()['tags'], ['reciclagem'])
+
+    def test_shared_cache_check_fails_for_local_cache_with_workers(self):
+        local = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'ecoviva_cache'}}
+
+        with override_settings(CACHES=local, WEB_CONCURRENCY=4):
+            self.assertEqual([error.id for error in check_shared_cache()], ['ecoviva.E001'])
+        with override_settings(CACHES=local, WEB_CONCURRENCY=1):
+            self.assertEqual(check_shared_cache(), [])
+        with override_settings(CACHES=shared, WEB_CONCURRENCY=4):
+            self.assertEqual(check_shared_cache(), [])
+
+    def test_get_thread_detail_not_modified(self):
+        url = reverse('forum:detail_thread', args=[self.thread.slug])
+        response = self.client.get(url)
+        etag = response['ETag']
+
+        # Id pelo slug e estado de curtida; o payload não é montado
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        self.client.put(reverse('forum:like_thread', args=[self.thread.slug]))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json()['liked'])
+
+    def test_get_thread_list_not_modified(self):
+        url = reverse('forum:list_thread')
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Thread.objects.create(title='Nova', content='Conteúdo', author=self.user)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_get_thread_list_like_state(self):
+        url = reverse('forum:list_thread')
+        liked_thread = Thread.objects.create(title='Curtida', content='Conteúdo', author=self.user2)
+        liked_thread.likes.add(self.user)
+        Thread.objects.recount_counters()
+
+        results = {thread['slug']: thread for thread in self.client.get(url).json()['results']}
+
+        self.assertTrue(results[liked_thread.slug]['liked'])
+        self.assertEqual(results[liked_thread.slug]['likes'], 1)
+        self.assertFalse(results[self.thread.slug]['liked'])
+
     def test_delete_thread_delete(self):
         url = reverse('forum:delete_thread', args=[self.thread.slug])
 
@@ -289,6 +876,33 @@ class ThreadTests(APITestCase,UsersMixin ):
 
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
+    def test_delete_thread_hides_thread_before_purge(self):
+        self.thread.set_tags(['reciclagem'])
+
+        response = self.client.delete(reverse('forum:delete_thread', args=[self.thread.slug]))
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertIsNotNone(Thread.all_objects.get(pk=self.thread.pk).deleted_at)
+        self.assertEqual(self.client.get(reverse('forum:detail_thread', args=[self.thread.slug])).status_code, 404)
+        self.assertEqual(Tags.objects.get(name='reciclagem').thread_count, 0)
+        # Um título igual não colide com o slug da thread excluída
+        self.assertNotEqual(Thread.objects.create(title='Test Thread', content='x', author=self.user).slug, self.thread.slug)
+
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_delete_thread_purges_dependents_in_background(self):
+        self.thread.set_tags(['reciclagem'])
+        self.thread.likes.add(self.user2)
+        for index in range(3):
+            Post.objects.create(thread=self.thread, content=f'Resposta {index}', author=self.user2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('forum:delete_thread', args=[self.thread.slug]))
+
+        self.assertFalse(Thread.all_objects.filter(pk=self.thread.pk).exists())
+        self.assertFalse(Post.objects.filter(thread_id=self.thread.pk).exists())
+        self.assertFalse(Thread.likes.through.objects.filter(thread_id=self.thread.pk).exists())
+        self.assertEqual(Tags.objects.get(name='reciclagem').thread_count, 0)
+
     def test_delete_thread_delete_fail_for_not_found(self):
         url = reverse('forum:delete_thread', args=['asasas'])
 
@@ -345,6 +959,109 @@ class PostTests(APITestCase, UsersMixin):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.json().get('detail'), 'Post criado com sucesso!')
 
+    def test_get_thread_posts_paginated(self):
+        for index in range(4):
+            Post.objects.create(thread=self.thread, content=f'Resposta {index}', author=self.user2)
+        url = reverse('forum:thread_posts', args=[self.thread.slug])
+
+        # Thread pelo slug + página (autores no mesmo JOIN)
+        with self.assertNumQueries(2):
+            body = self.client.get(url, {'page_size': 3}).json()
+        contents = [post['content'] for post in body['results']]
+        contents += [post['content'] for post in self.client.get(body['next']).json()['results']]
+
+        self.assertEqual(contents, ['Test content for post'] + [f'Resposta {index}' for index in range(4)])
+
+    def test_get_thread_posts_jump_to_post(self):
+        posts = [Post.objects.create(thread=self.thread, content=f'Resposta {index}', author=self.user2) for index in range(4)]
+        url = reverse('forum:thread_posts', args=[self.thread.slug])
+
+        response = self.client.get(url, {'post': posts[2].pk, 'page_size': 2})
+        body = response.json()
+
+        self.assertEqual([post['id'] for post in body['results']], [posts[2].pk, posts[3].pk])
+        self.assertNotIn('post=', body['previous'])
+        previous = self.client.get(body['previous']).json()
+        self.assertEqual([post['id'] for post in previous['results']], [posts[0].pk, posts[1].pk])
+
+    def test_get_thread_posts_jump_fail_for_post_from_other_thread(self):
+        other = Thread.objects.create(title='Outra', content='Conteúdo', author=self.user)
+        url = reverse('forum:thread_posts', args=[other.slug])
+
+        response = self.client.get(url, {'post': self.post.pk})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.json(), {'detail': 'Post não encontrado!'})
+
+    def test_post_create_publishes_event(self):
+        with patch.object(events.get_broker(), 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse('forum:create_post'), {'thread': self.thread.slug, 'content': 'Ao vivo'})
+
+        channel, message = publish.call_args.args
+        self.assertEqual(channel, events.thread_channel(self.thread.pk))
+        self.assertEqual(message['event'], 'post.created')
+        self.assertEqual(message['data']['content'], 'Ao vivo')
+        self.assertEqual(message['data']['author']['username'], self.user.username)
+
+    async def test_get_thread_events_stream(self):
+        response = await self.async_client.get(reverse('forum:thread_events', args=[self.thread.slug]))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+
+        events.get_broker().publish(events.thread_channel(self.thread.pk), {'event': 'thread.likes', 'data': {'likes': 3}})
+        self.assertEqual(await anext(stream), b'event: thread.likes\ndata: {"likes": 3}\n\n')
+        await stream.aclose()
+
+    def test_get_thread_events_fail_under_wsgi(self):
+        response = self.client.get(reverse('forum:thread_events', args=[self.thread.slug]))
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    def test_post_update_event_loads_author_with_post(self):
+        url = reverse('forum:post_update', args=[self.post.pk])
+        with patch.object(events.get_broker(), 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+                self.client.patch(url, {'content': 'Editado'})
+
+        self.assertEqual(publish.call_args.args[1]['data']['author']['username'], self.user.username)
+        users_table = Users._meta.db_table
+        self.assertEqual(sum(f'FROM "{users_table}"' in query['sql'] for query in queries.captured_queries), 0)
+
+    async def test_postgres_broker_dispatches_notifications_locally(self):
+        broker = events.PostgresBroker()
+        broker._ensure_listener = lambda: None  # Sem PostgreSQL nos testes: só a entrega local
+        channel = events.thread_channel(self.thread.pk)
+
+        with broker.subscribe(channel) as subscription:
+            broker.dispatch(broker.encode(channel, {'event': 'thread.likes', 'data': {'likes': 2}}))
+            self.assertEqual(await subscription.get(), {'event': 'thread.likes', 'data': {'likes': 2}})
+
+        payload = json.loads(broker.encode(channel, {'event': 'post.created', 'data': {'id': 7, 'content': 'x' * 9000}}))
+        self.assertEqual(payload['m'], {'event': 'post.created', 'data': {'id': 7}, 'truncated': True})
+
+    async def test_get_thread_events_fail_for_unknown_thread(self):
+        response = await self.async_client.get(reverse('forum:thread_events', args=['nao-existe']))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.json(), {'detail': 'Thread não encontrada!'})
+
+    def test_post_create_and_delete_update_thread_counters(self):
+        previous_activity = self.thread.last_activity_at
+
+        self.client.post(reverse('forum:create_post'), {'thread': self.thread.slug, 'content': 'Novo post'})
+        self.thread.refresh_from_db()
+
+        self.assertEqual(self.thread.post_count, 1)
+        self.assertGreater(self.thread.last_activity_at, previous_activity)
+
+        self.client.delete(reverse('forum:post_delete', args=[self.post.pk]))
+        self.thread.refresh_from_db()
+
+        self.assertEqual(self.thread.post_count, 0)
+
     def test_post_post_create_fail_for_unauthorized(self):
         url = reverse('forum:create_post')
         self.client.logout()
@@ -432,4 +1149,84 @@ class PostTests(APITestCase, UsersMixin):
         response = self.client.delete(url)
 
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
-        self.assertEqual(response.json(), {'detail': 'Você não tem permissão para fazer essa ação no post'})
\ No newline at end of file
+        self.assertEqual(response.json(), {'detail': 'Você não tem permissão para fazer essa ação no post'})
+
+class SearchTests(APITestCase, UsersMixin):
+    def setUp(self):
+        self.user = self.make_user()
+        self.url = reverse('forum:search')
+
+        self.compost = Thread.objects.create(
+            title='Compostagem doméstica', content='Como montar uma composteira em apartamento.', author=self.user
+        )
+        self.recycling = Thread.objects.create(
+            title='Reciclagem de vidro', content='Dicas de compostagem e separação de <b>resíduos</b>.', author=self.user
+        )
+        self.post = Post.objects.create(
+            thread=self.recycling, content='Uso a compostagem com minhocas há dois anos.', author=self.user
+        )
+
+    def test_search_threads_ranks_title_matches_first(self):
+        response = self.client.get(self.url, {'q': 'compostagem'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        slugs = [item['slug'] for item in response.json()['results']]
+        self.assertEqual(slugs, [self.compost.slug, self.recycling.slug])
+
+    def test_search_snippet_is_escaped_and_highlighted(self):
+        response = self.client.get(self.url, {'q': 'resíduos'})
+
+        snippet = response.json()['results'][0]['snippet']
+        self.assertIn('<mark>resíduos</mark>', snippet)
+        self.assertIn('&lt;b&gt;', snippet)
+
+    def test_search_posts(self):
+        response = self.client.get(self.url, {'q': 'minhocas', 'type': 'posts'})
+
+        results = response.json()['results']
+        self.assertEqual([item['id'] for item in results], [self.post.pk])
+        self.assertEqual(results[0]['thread']['slug'], self.recycling.slug)
+
+    def test_search_index_follows_updates_and_deletes(self):
+        self.compost.content = 'Agora sobre hortas verticais.'
+        self.compost.save()
+        self.recycling.delete()
+
+        threads = self.client.get(self.url, {'q': 'compostagem'}).json()['results']
+        self.assertEqual([item['slug'] for item in threads], [self.compost.slug])
+        self.assertEqual(len(self.client.get(self.url, {'q': 'hortas'}).json()['results']), 1)
+        self.assertEqual(self.client.get(self.url, {'q': 'minhocas', 'type': 'posts'}).json()['results'], [])
+
+    def test_search_pagination(self):
+        response = self.client.get(self.url, {'q': 'compostagem', 'page_size': 1})
+        body = response.json()
+
+        self.assertEqual(len(body['results']), 1)
+        self.assertIsNotNone(body['next'])
+        self.assertIsNone(body['previous'])
+
+        body = self.client.get(body['next']).json()
+        self.assertEqual(body['results'][0]['slug'], self.recycling.slug)
+        self.assertIsNone(body['next'])
+
+    def test_search_pagination_skips_posts_of_deleted_threads(self):
+        for _ in range(2):
+            Post.objects.create(thread=self.compost, content='Compostagem, compostagem e mais compostagem.', author=self.user)
+        # Os posts da thread excluída continuam no índice até a remoção definitiva
+        Thread.objects.filter(pk=self.compost.pk).mark_deleted()
+
+        body = self.client.get(self.url, {'q': 'compostagem', 'type': 'posts', 'page_size': 1}).json()
+
+        self.assertEqual([item['id'] for item in body['results']], [self.post.pk])
+        self.assertIsNone(body['next'])
+
+    def test_search_requires_query(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {'detail': 'Informe o termo de busca no parâmetro "q".'})
+
+    def test_search_ignores_fts_syntax(self):
+        response = self.client.get(self.url, {'q': 'vidro" OR NEAR(*'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
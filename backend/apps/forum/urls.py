@@ -5,14 +5,24 @@ from . import views
     Este arquivo define as rotas (URLs) para as funcionalidades do fórum, incluindo Threads e Posts.
 
     - Threads:
-      - list/                 → Lista todas as Threads.
+      - list/                 → Lista todas as Threads (`?tags=a,b` filtra por tags).
       - create/               → Cria uma nova Thread.
+      - liked/?slugs=a,b      → Informa quais das Threads o usuário curtiu.
       - detail/<slug:slug>/   → Exibe detalhes de uma Thread específica.
+      - detail/<slug:slug>/like/    → Curte (PUT), descurte (DELETE) ou alterna (POST) a curtida.
       - detail/<slug:slug>/update/  → Atualiza parcialmente uma Thread.
       - detail/<slug:slug>/delete/  → Exclui uma Thread.
+      - detail/<slug:slug>/events/  → Stream SSE com novos posts, edições e curtidas (requer ASGI).
+
+    - Tags:
+      - tag/list/             → Lista as tags mais usadas com o total de threads.
+      - tag/autocomplete/?q=  → Sugere tags pelo prefixo do nome.
+
+    - Busca:
+      - search/?q=termos&type=threads|posts → Busca textual ordenada por relevância.
 
     - Posts:
-      - detail/<slug:slug>/posts/   → Lista todos os Posts dentro de uma Thread.
+      - thread/<slug:slug>/posts/   → Lista os Posts de uma Thread, paginados (`?post=<id>` pula até o post).
       - post/create/         → Cria um novo Post.
       - post/<int:id_post>/update/  → Atualiza parcialmente um Post.
       - post/<int:id_post>/delete/  → Exclui um Post.
@@ -24,10 +34,20 @@ urlpatterns = [
     # Rotas para Threads
     path('thread/list/', views.ThreadListView.as_view(), name="list_thread"),  
     path('thread/create/', views.ThreadCreateView.as_view(), name='create_thread'), 
+    path('thread/liked/', views.ThreadLikedStatusView.as_view(), name='liked_threads'), 
     path('thread/<slug:slug>/', views.ThreadDetailView.as_view(), name='detail_thread'), 
     path('thread/<slug:slug>/like/', views.ThreadLikeView.as_view(), name='like_thread'), 
     path('thread/<slug:slug>/update/', views.ThreadUpdateView.as_view(), name='update_thread'), 
     path('thread/<slug:slug>/delete/', views.ThreadDeleteView.as_view(), name='delete_thread'), 
+    path('thread/<slug:slug>/posts/', views.ThreadPostsView.as_view(), name='thread_posts'),
+    path('thread/<slug:slug>/events/', views.ThreadEventsView.as_view(), name='thread_events'),
+
+    # Rotas para Tags
+    path('tag/list/', views.TagListView.as_view(), name='list_tags'),
+    path('tag/autocomplete/', views.TagAutocompleteView.as_view(), name='autocomplete_tags'),
+
+    # Busca textual
+    path('search/', views.SearchView.as_view(), name='search'),
 
     # Rotas para Posts
     path('post/create/', views.PostCreateView.as_view(), name='create_post'),  
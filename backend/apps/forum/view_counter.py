@@ -0,0 +1,125 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections
+
+from utils.tasks import run_in_background
+
+"""
+    Contador de visualizações das threads com escrita adiada (write-behind).
+
+    Um UPDATE por GET do detalhe transformaria a leitura mais frequente do fórum em disputa por lock
+    na linha da thread. Em vez disso, cada processo acumula as visualizações em memória e as grava em
+    lote, com um único UPDATE ... CASE para todas as threads pendentes:
+
+    - a cada FORUM_VIEW_FLUSH_INTERVAL segundos, verificado a cada visualização registrada e por uma
+      thread daemon do processo (FORUM_VIEW_FLUSH_TIMER), que grava mesmo sem novas visualizações;
+    - quando há mais de FORUM_VIEW_FLUSH_MAX threads pendentes;
+    - ao encerrar o processo (atexit) e no hook `worker_exit` do gunicorn (gunicorn.conf.py).
+
+    A contagem é aproximada: se o processo morrer sem encerrar normalmente (SIGKILL, falta de
+    memória, timeout do worker), as visualizações do último intervalo são perdidas. Ela também não
+    invalida o cache do detalhe: o valor exibido pode atrasar até FORUM_CACHE_TIMEOUT segundos.
+"""
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pending = Counter()
+_last_flush = time.monotonic()
+_timer_pid = None  # Processo em que a thread de gravação periódica foi iniciada
+
+
+def record_view(thread_id):
+    """ Registra uma visualização e agenda a gravação do lote se o intervalo já passou. """
+    global _last_flush
+
+    _start_timer()
+    with _lock:
+        _pending[thread_id] += 1
+        now = time.monotonic()
+        due = now - _last_flush >= settings.FORUM_VIEW_FLUSH_INTERVAL or len(_pending) >= settings.FORUM_VIEW_FLUSH_MAX
+        if due:
+            _last_flush = now
+            counts = _take_pending()
+
+    if due:
+        run_in_background(write_views, counts)
+
+
+def flush():
+    """ Grava imediatamente as visualizações pendentes deste processo. Retorna as linhas atualizadas. """
+    with _lock:
+        counts = _take_pending()
+    return write_views(counts)
+
+
+def _start_timer():
+    """ Inicia a thread de gravação periódica, uma vez por processo (de novo após um fork). """
+    global _timer_pid
+
+    if _timer_pid == os.getpid():
+        return
+    with _lock:
+        if _timer_pid != os.getpid():
+            _timer_pid = os.getpid()
+            threading.Thread(target=_run_timer, name='ecoviva-view-counter', daemon=True).start()
+
+
+def _run_timer():
+    while True:
+        time.sleep(settings.FORUM_VIEW_FLUSH_INTERVAL)
+        if not settings.FORUM_VIEW_FLUSH_TIMER:
+            continue
+        try:
+            flush_if_due()
+        except Exception:
+            logger.exception('Falha na gravação periódica das visualizações')
+        finally:
+            close_old_connections()  # Esta thread não passa pelo request_finished
+
+
+def flush_if_due():
+    """ Grava as visualizações pendentes se o intervalo já passou desde a última gravação. """
+    global _last_flush
+
+    with _lock:
+        now = time.monotonic()
+        if now - _last_flush < settings.FORUM_VIEW_FLUSH_INTERVAL:
+            return 0
+        _last_flush = now
+        counts = _take_pending()
+    return write_views(counts)
+
+
+def write_views(counts):
+    if not counts:
+        return 0
+    Thread = apps.get_model('forum', 'Thread')
+    try:
+        return Thread.objects.add_views(counts)
+    except Exception:
+        # Devolve o lote para a próxima tentativa em vez de descartá-lo
+        with _lock:
+            _pending.update(counts)
+        raise
+
+
+def _take_pending():
+    global _pending
+    counts, _pending = _pending, Counter()
+    return dict(counts)
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        flush()
+    except Exception:
+        logger.exception('Falha ao gravar as visualizações pendentes no encerramento')
@@ -1,55 +1,100 @@
-from django.shortcuts import get_list_or_404, get_object_or_404  
-from django.http import Http404  
+import asyncio
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.shortcuts import get_object_or_404  
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views import View
 from rest_framework.generics import GenericAPIView
 from rest_framework.mixins import ( RetrieveModelMixin, ListModelMixin, CreateModelMixin, UpdateModelMixin, DestroyModelMixin)
 from rest_framework.response import Response  
 from rest_framework import status, permissions  
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 
 from apps.users.auth.permissions import IsPostOwner  
-from . import models, serializers  
+from utils.conditional import ConditionalGetMixin, make_etag
+from utils.pagination import KeysetPagination, SnapshotPagination
+from utils.tasks import run_in_background
+from utils.uploads import UploadSizeLimitMixin
+from . import cache as thread_cache, events, models, purge, search, serializers, view_counter  
 
 """
     Este módulo define as views responsáveis por processar as requisições HTTP da API de 'Threads' e 'Posts'.  
     Cada classe manipula operações específicas sobre threads e posts, interagindo com os modelos e retornando  
     as respostas apropriadas para as APIs.
 
-    - ThreadListView       → Lista todas as threads cadastradas.  
+    - ThreadListView       → Lista as threads cadastradas, paginadas por cursor (filtro opcional por tags).  
     - ThreadCreateView     → Cria uma nova thread.  
     - ThreadUpdateView     → Atualiza parcialmente uma thread.  
     - ThreadDeleteView     → Deleta uma thread.  
     - ThreadDetailView     → Retorna detalhes de uma thread específica.  
+    - ThreadLikeView       → Curte/descurte uma thread.  
+    - ThreadLikedStatusView → Estado de curtida de várias threads de uma vez.  
+    - SearchView           → Busca textual em threads e posts, ordenada por relevância.  
+    - TagListView          → Lista as tags mais usadas com o total de threads.  
+    - TagAutocompleteView  → Sugere tags pelo prefixo do nome.  
+    - ThreadPostsView      → Lista os posts de uma thread, paginados por cursor (com salto até um post).  
+    - ThreadEventsView     → Stream (SSE) de novos posts, edições e curtidas de uma thread.  
     - PostCreateView      → Cria um novo post.  
     - PostUpdateView      → Atualiza parcialmente um post.  
     - PostDeleteView      → Deleta um post.  
 """
 
-class ThreadListView(GenericAPIView, ListModelMixin):  
-    """ Retorna uma lista com todas as threads cadastradas. """  
+class ThreadListView(ConditionalGetMixin, GenericAPIView, ListModelMixin):  
+    """
+    Retorna o feed de threads, paginado por cursor (mais recentes primeiro; `?order=liked|active|hot` muda
+    a ordenação). Os posts ficam no detalhe.
+
+    A pontuação "em alta" é reescrita entre uma página e outra (curtidas, posts, decaimento), então
+    `?order=hot` pagina sobre um retrato da ordem tirado na primeira página (SnapshotPagination).
+    """
     permission_classes = [permissions.IsAuthenticated]  
-    serializer_class = serializers.ThreadReadSerializer
+    serializer_class = serializers.ThreadSummarySerializer
+    max_tags = 10
+
+    # Ordenações disponíveis via `?order=`; todas servidas por índices compostos em Thread
+    orderings = {
+        'recent': ('-created_at', '-id'),
+        'liked': ('-like_count', '-id'),
+        'active': ('-last_activity_at', '-id'),
+        'hot': ('-hot_score', '-id'),
+    }
+
+    @property
+    def pagination_class(self):
+        return SnapshotPagination if self.request.query_params.get('order') == 'hot' else KeysetPagination
 
     def get_queryset(self):
-        try: 
-            threads = get_list_or_404(models.Thread)
-            return threads  
-        except Http404:  
-            return Response({'detail': 'Não há Threads cadastradas'}, status=status.HTTP_404_NOT_FOUND)  
+        queryset = models.Thread.objects.with_summary(self.request.user)
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
+        # `?tags=a,b` → threads com qualquer uma das tags, resolvidas pela tabela de ligação (índice em tags_id)
+        tags = [tag.strip().lower() for tag in self.request.query_params.get('tags', '').split(',') if tag.strip()]
+        if tags:
+            links = models.Thread.tags.through.objects.filter(
+                tags__in=models.Tags.objects.filter(name__in=tags[:self.max_tags]).values('pk')
+            )
+            queryset = queryset.filter(pk__in=links.values('thread_id'))
+        return queryset
 
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+    def get_keyset_ordering(self):
+        order = self.request.query_params.get('order', 'recent')
+        return self.orderings.get(order, self.orderings['recent'])
+
+    # O feed muda a cada escrita no fórum: a versão global (em cache) valida qualquer página/filtro
+    def get_etag(self, request):
+        version, _ = thread_cache.get_state(thread_cache.FEED_SCOPE)
+        return make_etag('threads', version, request.user.pk, request.get_full_path(), weak=True)
+
+    def get_last_modified(self, request):
+        return thread_cache.get_state(thread_cache.FEED_SCOPE)[1]
 
-        serializer = self.get_serializer(queryset, many=True, context = {'request': request})
-        return Response(serializer.data)
-    
     def get(self, request, *args, **kwargs):  
-        return self.list(request, *args, **kwargs)
+        return self.conditional_get(request, self.list, *args, **kwargs)
 
-class ThreadCreateView(GenericAPIView, CreateModelMixin):  
+class ThreadCreateView(UploadSizeLimitMixin, GenericAPIView, CreateModelMixin):  
     """ Cria uma nova thread. Apenas usuários autenticados podem acessar. """  
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = serializers.ThreadWriteSerializer  
@@ -67,7 +112,7 @@ class ThreadCreateView(GenericAPIView, CreateModelMixin):
     def post(self, request):  
         return self.create(request)
 
-class ThreadUpdateView(GenericAPIView, UpdateModelMixin):  
+class ThreadUpdateView(UploadSizeLimitMixin, GenericAPIView, UpdateModelMixin):  
     """ Atualiza parcialmente uma thread. Apenas o dono da thread pode modificar. """  
     permission_classes = [IsPostOwner]  
     serializer_class = serializers.ThreadWriteSerializer
@@ -96,25 +141,145 @@ class ThreadUpdateView(GenericAPIView, UpdateModelMixin):
         return self.partial_update(request,  *args, **kwargs)
     
 class ThreadLikeView(GenericAPIView):
+    """
+    Curtidas de uma thread.
+
+    - PUT: Curte a thread (idempotente).
+    - DELETE: Remove a curtida (idempotente).
+    - POST: Alterna entre curtir e descurtir (mantido por compatibilidade).
+
+    Todas retornam o estado final e o novo total de curtidas.
+    """
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_thread_id(self, slug):
+        return get_object_or_404(models.Thread.objects.values_list('pk', flat=True), slug=slug)
+
+    def like_response(self, thread_id, liked, changed):
+        likes = models.Thread.objects.filter(pk=thread_id).values_list('like_count', flat=True).first()
+        if changed:
+            events.publish(thread_id, 'thread.likes', {'likes': likes})
+        return Response({'liked': liked, 'likes': likes}, status=status.HTTP_200_OK)
+
+    def put(self, request, slug):
+        try:
+            thread_id = self.get_thread_id(slug)
+        except Http404:
+            return Response({'detail': 'Thread não encontrada!'}, status=status.HTTP_404_NOT_FOUND)
+
+        changed = models.Thread.objects.add_like(thread_id, request.user.pk)
+        return self.like_response(thread_id, True, changed)
+
+    def delete(self, request, slug):
+        try:
+            thread_id = self.get_thread_id(slug)
+        except Http404:
+            return Response({'detail': 'Thread não encontrada!'}, status=status.HTTP_404_NOT_FOUND)
+
+        changed = models.Thread.objects.remove_like(thread_id, request.user.pk)
+        return self.like_response(thread_id, False, changed)
+
     def post(self, request, slug):     
         try:  
-            thread = get_object_or_404(models.Thread, slug=slug)
+            thread_id = self.get_thread_id(slug)
         except Http404:  
             return Response({'detail': 'Thread não encontrada!'}, status=status.HTTP_404_NOT_FOUND) 
-        
-        user = request.user
 
-        if thread.likes.filter(id=user.id).exists():
-            thread.likes.remove(user)
-            return Response({'liked': False}, status=status.HTTP_200_OK)
-        else:
-            thread.likes.add(user)
-            return Response({'liked': True}, status=status.HTTP_200_OK)
+        # Tenta curtir; se a curtida já existia, o toggle remove
+        if models.Thread.objects.add_like(thread_id, request.user.pk):
+            return self.like_response(thread_id, True, True)
+
+        changed = models.Thread.objects.remove_like(thread_id, request.user.pk)
+        return self.like_response(thread_id, False, changed)
+
+class ThreadLikedStatusView(GenericAPIView):
+    """ Informa, em uma única consulta, quais das threads informadas em `?slugs=a,b,c` o usuário curtiu. """
+    permission_classes = [permissions.IsAuthenticated]
+    max_slugs = 100
+
+    def get(self, request):
+        slugs = [slug for slug in request.query_params.get('slugs', '').split(',') if slug][:self.max_slugs]
+        liked = models.Thread.objects.liked_slugs(request.user, slugs) if slugs else set()
+        return Response({'liked': {slug: slug in liked for slug in slugs}}, status=status.HTTP_200_OK)
+
+class SearchView(GenericAPIView):
+    """
+    Busca textual no fórum: `?q=termos&type=threads|posts&page=N&page_size=M`.
+
+    Os resultados vêm ordenados por relevância; a página é buscada com uma linha extra para saber se
+    existe a próxima, sem COUNT sobre o índice de busca.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_page_size = 50
+    searches = {
+        'threads': (search.search_threads, serializers.ThreadSearchSerializer),
+        'posts': (search.search_posts, serializers.PostSearchSerializer),
+    }
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'detail': 'Informe o termo de busca no parâmetro "q".'}, status=status.HTTP_400_BAD_REQUEST)
+
+        kind = request.query_params.get('type', 'threads')
+        if kind not in self.searches:
+            return Response({'detail': 'Tipo de busca inválido. Use "threads" ou "posts".'}, status=status.HTTP_400_BAD_REQUEST)
+
+        page = self.positive_int('page', 1)
+        page_size = min(self.positive_int('page_size', api_settings.PAGE_SIZE or 20), self.max_page_size)
+
+        run_search, serializer_class = self.searches[kind]
+        rows = run_search(query, limit=page_size + 1, offset=(page - 1) * page_size)
+        has_next = len(rows) > page_size
+
+        url = request.build_absolute_uri()
+        return Response({
+            'next': replace_query_param(url, 'page', page + 1) if has_next else None,
+            'previous': replace_query_param(url, 'page', page - 1) if page > 1 else None,
+            'results': serializer_class(rows[:page_size], many=True, context=self.get_serializer_context()).data,
+        }, status=status.HTTP_200_OK)
+
+    def positive_int(self, name, default):
+        try:
+            value = int(self.request.query_params.get(name, default))
+        except ValueError:
+            return default
+        return value if value > 0 else default
+
+class TagListView(GenericAPIView, ListModelMixin):
+    """ Lista as tags mais usadas; o total vem do contador `thread_count`, sem GROUP BY a cada chamada. """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = serializers.TagsSerializer
+    pagination_class = KeysetPagination
+    queryset = models.Tags.objects.all()
+
+    def get_keyset_ordering(self):
+        return ('-thread_count', '-id')
+
+    def get(self, request, *args, **kwargs):
+        return self.list(request, *args, **kwargs)
+
+class TagAutocompleteView(GenericAPIView):
+    """ Sugere até `limit` tags cujo nome começa com `?q=`, servidas pelo índice de prefixo em `name`. """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = serializers.TagsSerializer
+    limit = 10
+
+    def get(self, request):
+        prefix = request.query_params.get('q', '').strip().lower()  # As tags são gravadas em minúsculas
+        if not prefix:
+            return Response([], status=status.HTTP_200_OK)
+
+        tags = models.Tags.objects.filter(name__startswith=prefix).order_by('name')[:self.limit]
+        return Response(self.get_serializer(tags, many=True).data, status=status.HTTP_200_OK)
 
 class ThreadDeleteView(GenericAPIView, DestroyModelMixin):  
-    """ Deleta uma thread. Apenas o dono da thread pode excluir. """  
+    """
+    Deleta uma thread. Apenas o dono da thread pode excluir.
+
+    A thread é marcada como excluída e some na hora; posts, curtidas e a capa são removidos em
+    segundo plano (ver `apps.forum.purge`).
+    """  
     permission_classes = [IsPostOwner]  
 
     def get_object(self):
@@ -130,31 +295,167 @@ class ThreadDeleteView(GenericAPIView, DestroyModelMixin):
             return Response({'detail': 'Thread não encontrada!'}, status=status.HTTP_404_NOT_FOUND)
         self.perform_destroy(instance)
         return Response({'detail': 'Thread deletada com sucesso!'}, status=status.HTTP_204_NO_CONTENT)  
+
+    def perform_destroy(self, instance):
+        models.Thread.objects.filter(pk=instance.pk).mark_deleted()
+        run_in_background(purge.purge_thread, instance.pk)
     
     def delete(self, request, *args, **kwargs):  
         return self.destroy(request,  *args, **kwargs) 
 
-class ThreadDetailView(GenericAPIView, RetrieveModelMixin):  
-    """ Retorna detalhes de uma thread específica. """  
+class ThreadDetailView(ConditionalGetMixin, GenericAPIView, RetrieveModelMixin):  
+    """
+    Retorna detalhes de uma thread específica.
+
+    A parte da resposta que não depende do usuário (thread, posts e autores) fica em cache, versionada
+    por thread (ver `apps.forum.cache`); só o estado `liked` é consultado a cada requisição. A mesma
+    versão gera o ETag, então um `If-None-Match` atualizado recebe 304 sem montar o payload.
+
+    Cada GET conta uma visualização, acumulada em memória e gravada em lote (ver `apps.forum.view_counter`).
+    """  
     permission_classes = [permissions.AllowAny]  
     serializer_class = serializers.ThreadReadSerializer
+    thread_id = None  # Resolvido uma vez por requisição (a view é instanciada a cada chamada)
+    liked = None
+
+    def get_thread_id(self):
+        if self.thread_id is None:
+            slug = self.kwargs.get('slug')
+            self.thread_id = get_object_or_404(models.Thread.objects.values_list('pk', flat=True), slug=slug)
+        return self.thread_id
 
     def get_object(self):
-        slug = self.kwargs.get('slug')
-        instance = get_object_or_404(models.Thread, slug=slug)
-        return instance  
-        
+        # Sem usuário: o payload é compartilhado em cache e o `liked` é sobreposto depois
+        queryset = (
+            models.Thread.objects.select_related('author')
+            .prefetch_related('tags', Prefetch('posts', queryset=models.Post.objects.select_related('author')))
+            .with_like_state(None)
+        )
+        return get_object_or_404(queryset, pk=self.get_thread_id())
+
+    def get_payload(self, thread_id):
+        version = thread_cache.get_version(thread_id)
+        payload = thread_cache.get_detail(thread_id, version)
+        if payload is None:
+            payload = self.get_serializer(self.get_object()).data
+            thread_cache.set_detail(thread_id, version, payload)
+        return payload
+
+    def is_liked(self, thread_id):
+        if self.liked is None:
+            user = self.request.user
+            self.liked = user.is_authenticated and models.Thread.likes.through.objects.filter(
+                thread_id=thread_id, users_id=user.pk
+            ).exists()
+        return self.liked
+
+    def get_etag(self, request):
+        thread_id = self.get_thread_id()
+        version, _ = thread_cache.get_state(thread_cache.thread_scope(thread_id))
+        return make_etag('thread', thread_id, version, self.is_liked(thread_id))
+
+    def get_last_modified(self, request):
+        _, modified = thread_cache.get_state(thread_cache.thread_scope(self.get_thread_id()))
+        return modified
+
     def retrieve(self, request, *args, **kwargs):
-        try:  
-            instance = self.get_object()
-        except Http404:  
-            return Response('A Bolha não foi encontrada', status=status.HTTP_404_NOT_FOUND) 
-        
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        thread_id = self.get_thread_id()
+        payload = self.get_payload(thread_id)
+        return Response({**payload, 'liked': self.is_liked(thread_id)}, status=status.HTTP_200_OK)
     
     def get(self, request, *args, **kwargs):  
-        return self.retrieve(request, *args, **kwargs)
+        try:
+            response = self.conditional_get(request, self.retrieve, *args, **kwargs)
+        except Http404:  
+            return Response('A Bolha não foi encontrada', status=status.HTTP_404_NOT_FOUND) 
+
+        view_counter.record_view(self.thread_id)  # Respostas 304 também contam como visualização
+        return response
+
+class ThreadPostsView(GenericAPIView, ListModelMixin):
+    """
+    Posts de uma thread em ordem cronológica, paginados por cursor.
+
+    `?post=<id>` retorna a página que começa nesse post (ex.: link direto para uma resposta), com
+    `previous` apontando para os posts anteriores.
+    """
+    permission_classes = [permissions.AllowAny]
+    serializer_class = serializers.PostsSerializer
+    pagination_class = KeysetPagination
+    anchor_query_param = 'post'
+
+    def get_keyset_ordering(self):
+        return ('created_at', 'id')  # Servida pelo índice (thread, created_at, id)
+
+    def get_queryset(self):
+        self.thread = get_object_or_404(models.Thread.objects.only('id', 'slug'), slug=self.kwargs['slug'])
+        return models.Post.objects.filter(thread=self.thread).select_related('author')
+
+    def paginate_queryset(self, queryset):
+        post_id = self.request.query_params.get(self.anchor_query_param)
+        if post_id is None:
+            page = super().paginate_queryset(queryset)
+        elif not post_id.isdigit():
+            raise Http404
+        else:
+            page = self.paginator.paginate_to(
+                queryset, self.request, queryset.filter(pk=post_id), view=self, anchor_param=self.anchor_query_param
+            )
+            if not page:  # A página começa no próprio post: vazia só se ele não existir nesta thread
+                raise Http404
+
+        for post in page:
+            post.thread = self.thread  # O serializer usa o slug da thread; evita uma consulta por post
+        return page
+
+    def get(self, request, *args, **kwargs):
+        try:
+            return self.list(request, *args, **kwargs)
+        except Http404:
+            return Response({'detail': 'Post não encontrado!'}, status=status.HTTP_404_NOT_FOUND)
+
+class ThreadEventsView(View):
+    """
+    Stream de eventos de uma thread via Server-Sent Events (`text/event-stream`), servido só pelo
+    ASGI: sob WSGI responde 503, pois a conexão aberta prenderia um worker síncrono indefinidamente.
+
+    Envia deltas pequenos em vez do detalhe inteiro:
+    - post.created / post.updated: `{id, content, author: {id, username}, created_at, updated_at}`
+    - post.deleted: `{id}`
+    - thread.likes: `{likes}`
+
+    View assíncrona do Django (o DRF não suporta views assíncronas): cada conexão aberta fica só
+    aguardando a fila da assinatura no event loop, sem ocupar uma thread. Um comentário de
+    keep-alive é enviado a cada FORUM_EVENTS_KEEPALIVE segundos para manter proxies conectados.
+    """
+    retry_ms = 3000  # Intervalo sugerido ao EventSource para reconectar
+
+    async def get(self, request, slug):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse(
+                {'detail': 'Eventos em tempo real indisponíveis neste servidor.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        thread_id = await models.Thread.objects.filter(slug=slug).values_list('pk', flat=True).afirst()
+        if thread_id is None:
+            return JsonResponse({'detail': 'Thread não encontrada!'}, status=status.HTTP_404_NOT_FOUND)
+
+        response = StreamingHttpResponse(self.stream(thread_id), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Desliga o buffer do nginx
+        return response
+
+    async def stream(self, thread_id):
+        with events.get_broker().subscribe(events.thread_channel(thread_id)) as subscription:
+            yield f'retry: {self.retry_ms}\n\n'
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.get(), settings.FORUM_EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield events.format_sse(message)
 
 class PostCreateView(GenericAPIView, CreateModelMixin):  
     """ Cria um novo post dentro de uma thread. Apenas usuários autenticados podem postar. """  
@@ -170,6 +471,11 @@ class PostCreateView(GenericAPIView, CreateModelMixin):
         self.perform_create(serializer)
         return Response({'detail': 'Post criado com sucesso!'}, status=status.HTTP_201_CREATED)
 
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            post = serializer.save()
+            models.Thread.objects.increment_counters(post.thread_id, posts=1, touch=True)
+
     def post(self, request):  
         return self.create(request)
 
@@ -180,7 +486,8 @@ class PostUpdateView(GenericAPIView, UpdateModelMixin):
 
     def get_object(self):
         id_post = self.kwargs.get('id_post')
-        instance = get_object_or_404(models.Post, id=id_post)
+        # O autor vem no mesmo SELECT: o evento post.updated usa o username (ver models.post_event_data)
+        instance = get_object_or_404(models.Post.objects.select_related('author'), id=id_post)
         self.check_object_permissions(self.request, instance)
         return instance
         
@@ -221,6 +528,12 @@ class PostDeleteView(GenericAPIView, DestroyModelMixin):
 
         self.perform_destroy(instance)
         return Response({'detail': 'Post deletado com sucesso!'}, status=status.HTTP_204_NO_CONTENT)  
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            thread_id = instance.thread_id
+            instance.delete()
+            models.Thread.objects.increment_counters(thread_id, posts=-1)
     
     def delete(self, request, *args, **kwargs):  
         return self.destroy(request,  *args, **kwargs)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from django.contrib.auth.backends import BaseBackend  
+from django.contrib.auth.backends import BaseBackend, ModelBackend  
 from django.contrib.auth import get_user_model  
 from rest_framework.exceptions import PermissionDenied
 
@@ -15,8 +15,8 @@ class EmailBackend(BaseBackend):
         Método que autentica o usuário utilizando o e-mail e senha.
         """
         try:
-            # Tenta buscar o usuário com o e-mail informado
-            user = User.objects.get(email=email)
+            # Tenta buscar o usuário com o e-mail informado (contas excluídas não autenticam)
+            user = User.objects.get(email=email, deleted_at__isnull=True)
         except User.DoesNotExist:
             # Caso não encontre o usuário, retorna None (usuário não autenticado)
             return None
@@ -32,7 +32,7 @@ class EmailBackend(BaseBackend):
         """
         try:
             # Tenta buscar o usuário pelo ID fornecido
-            return User.objects.get(pk=user_id)
+            return User.objects.get(pk=user_id, deleted_at__isnull=True)
         except User.DoesNotExist:
             # Caso o usuário não seja encontrado, retorna None
             return None
@@ -45,3 +45,13 @@ class EmailBackend(BaseBackend):
             return True
         else:
             raise PermissionDenied({'detail': "Autentique seu email para conseguir o acesso!!"})
+
+
+class UndeletedModelBackend(ModelBackend):
+    """
+    ModelBackend padrão (usado pelo admin e como alternativa ao EmailBackend) que também recusa
+    contas excluídas aguardando a remoção definitiva (`deleted_at`).
+    """
+
+    def user_can_authenticate(self, user):
+        return super().user_can_authenticate(user) and getattr(user, 'deleted_at', None) is None
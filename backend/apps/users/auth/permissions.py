@@ -10,4 +10,4 @@ class IsPostOwner(BasePermission):
         return request.user and request.user.is_authenticated
 
     def has_object_permission(self, request, view, obj):
-        return obj.author == request.user
\ No newline at end of file
+        return obj.author_id == request.user.pk  # Compara pela chave, sem carregar o autor
\ No newline at end of file
@@ -4,6 +4,7 @@ from django.urls import reverse
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 from django.core import mail
+from django.utils import timezone
 from apps.users.models import Users
 from apps.users.tests import UsersMixin
 from apps.users.email.tokens import email_confirmation_token
@@ -110,3 +111,28 @@ class EmailConfirmTest(APITestCase, UsersMixin):
         })
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_deleted_account_cannot_be_reactivated(self):
+        uidb64 = urlsafe_base64_encode(force_bytes(self.user.pk))
+        token = email_confirmation_token.make_token(self.user)  # Link enviado antes da exclusão
+        Users.objects.filter(pk=self.user.pk).update(deleted_at=timezone.now())
+
+        response = self.client.get(reverse('confirm_email', args=[uidb64, token]))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+
+        response = self.client.post(reverse('resend_email'), {'email': self.user.email})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.user.is_active = True  # Nem uma conta ativa excluída autentica
+        self.user.save()
+        response = self.client.post(reverse('login'), {
+            'email': self.user.email,
+            'password': self.user_data['password']
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
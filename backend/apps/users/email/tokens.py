@@ -2,7 +2,7 @@ from django.contrib.auth.tokens import PasswordResetTokenGenerator
 
 class EmailConfirmationTokenGenerator(PasswordResetTokenGenerator):
     def _make_hash_value(self, user, timestamp):
-        """Gera um hash único baseado no ID do usuário e no status de ativação."""
-        return f"{user.pk}{timestamp}{user.is_active}"
+        """Gera um hash único baseado no ID do usuário, no status de ativação e na exclusão da conta."""
+        return f"{user.pk}{timestamp}{user.is_active}{user.deleted_at or ''}"
 
 email_confirmation_token = EmailConfirmationTokenGenerator()
\ No newline at end of file
@@ -45,8 +45,9 @@ class EmailConfirmAPIView(APIView):
             # Decodifica o ID do usuário
             uid = force_str(urlsafe_base64_decode(uidb64))
 
-            # Busca o usuário no banco de dados ou retorna 404 se não encontrado
-            user = get_object_or_404(Users, pk=uid)
+            # Busca o usuário no banco de dados ou retorna 404 se não encontrado (contas excluídas
+            # aguardando a remoção definitiva não podem ser reativadas pelo link)
+            user = get_object_or_404(Users, pk=uid, deleted_at__isnull=True)
 
             # Se o usuário já estiver ativo, retorna uma resposta informando isso
             if user.is_active:
@@ -85,8 +86,8 @@ class ResendConfirmationEmailView(APIView):
         email = request.data.get("email")  # Obtém o e-mail enviado na requisição
 
         try:
-            # Busca o usuário pelo e-mail ou retorna erro se não encontrado
-            user = Users.objects.get(email=email)
+            # Busca o usuário pelo e-mail ou retorna erro se não encontrado (ignora contas excluídas)
+            user = Users.objects.get(email=email, deleted_at__isnull=True)
 
             # Se o usuário já estiver ativo, não envia o e-mail novamente
             if user.is_active:
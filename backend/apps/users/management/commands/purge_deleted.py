@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from apps.forum.models import Thread
+from apps.forum.purge import purge_thread
+from apps.users.models import Users
+from apps.users.purge import purge_user
+
+"""
+    Comando que conclui a remoção definitiva de usuários e threads excluídos logicamente.
+
+    Uso: python manage.py purge_deleted
+
+    A remoção normalmente roda em segundo plano logo após a exclusão; este comando retoma as que
+    foram interrompidas (ex.: reinício do servidor) e pode ser agendado periodicamente.
+"""
+
+
+class Command(BaseCommand):
+    help = 'Remove definitivamente os usuários e threads marcados como excluídos.'
+
+    def handle(self, *args, **options):
+        users = list(Users.objects.filter(deleted_at__isnull=False).values_list('pk', flat=True))
+        for user_id in users:
+            purge_user(user_id)
+
+        threads = list(Thread.all_objects.filter(deleted_at__isnull=False).values_list('pk', flat=True))
+        for thread_id in threads:
+            purge_thread(thread_id)
+
+        self.stdout.write(self.style.SUCCESS(f'{len(users)} usuários e {len(threads)} threads removidos.'))
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_alter_users_interests'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='users',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
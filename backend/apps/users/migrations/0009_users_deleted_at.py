@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_users_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='users',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:53
+
+import apps.users.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_users_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='users',
+            name='timezone',
+            field=models.CharField(blank=True, default='', max_length=64, validators=[apps.users.models.validate_timezone]),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:12
+
+from django.db import migrations, models
+
+from utils.image import VARIANT_SIZES, variant_name
+
+
+def mark_existing_variants(apps, schema_editor):
+    """
+    Marca as imagens existentes cujas miniaturas já foram geradas com o nome atual (ver
+    `utils.image.variant_name`). As demais seguem com o original até `generate_image_variants`.
+    """
+    Users = apps.get_model('users', 'Users')
+    storage = Users._meta.get_field('photo').storage
+
+    ready = []
+    images = Users._base_manager.exclude(photo='').exclude(photo__isnull=True)
+    for pk, name in images.values_list('pk', 'photo').iterator():
+        if all(storage.exists(variant_name(name, size)) for size in VARIANT_SIZES):
+            ready.append(pk)
+    Users._base_manager.filter(pk__in=ready).update(photo_variants_ready=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_users_timezone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='users',
+            name='photo_variants_ready',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_existing_variants, migrations.RunPython.noop),
+    ]
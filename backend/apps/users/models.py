@@ -1,11 +1,20 @@
 import os
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError, available_timezones
 
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.core.validators import FileExtensionValidator
 from django.dispatch import receiver
+from django.utils import timezone
 
-from utils.image import validate_image_dimensions, validate_image_size
+from utils.image import (
+    delete_variants, normalize_image, reset_variants, schedule_removal, schedule_variants, validate_image_dimensions,
+    validate_image_size, variants_ready,
+)
+from utils.tracking import FieldTrackerMixin
 
 """
     Modelos para gerenciamento de usuários.
@@ -13,8 +22,29 @@ from utils.image import validate_image_dimensions, validate_image_size
     - UsersManager: Gerenciador customizado para criação de usuários e superusuários.
     - Users: Modelo de usuário customizado baseado no AbstractUser do Django.
     - Interests: Modelo com os campos de interesse que o usuario pode ter
+    - get_zone/local_date: Fuso horário do usuário (TIME_ZONE quando não informado) e a data local
+      de um instante nesse fuso.
 """
 
+
+@lru_cache(maxsize=None)
+def get_zone(name):
+    """ Fuso IANA pelo nome; vazio ou desconhecido usa settings.TIME_ZONE. """
+    try:
+        return ZoneInfo(name or settings.TIME_ZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(settings.TIME_ZONE)
+
+
+def local_date(moment, zone_name):
+    """ Data de `moment` (datetime com fuso) no fuso `zone_name`. """
+    return moment.astimezone(get_zone(zone_name)).date()
+
+
+def validate_timezone(value):
+    if value and value not in available_timezones():
+        raise ValidationError('Fuso horário inválido. Use um nome IANA, ex.: America/Sao_Paulo.')
+
 class Interests(models.Model):
     class Meta:
         verbose_name = "Interest"  # Nome do modelo no singular no Django Admin
@@ -52,7 +82,7 @@ class UsersManager(BaseUserManager):
         return self.create_user(email, password, **extra_fields)
 
 
-class Users(AbstractUser):
+class Users(FieldTrackerMixin, AbstractUser):
     """
     Modelo de usuário customizado.
 
@@ -60,7 +90,11 @@ class Users(AbstractUser):
     - bio: Biografia curta do usuário.
     - phone: Número de telefone obrigatório.
     - photo: Foto de perfil com validações de tamanho e formato.
+    - photo_variants_ready: Indica que as miniaturas da foto atual já foram geradas.
     - is_active: Indica se o usuário está ativo na plataforma.
+    - timezone: Fuso horário IANA do usuário (vazio usa TIME_ZONE), usado nas sequências de check-in.
+    - updated_at: Data da última modificação do perfil (usada nos validadores de cache HTTP).
+    - deleted_at: Momento da exclusão da conta; os dados são apagados depois, em segundo plano.
     - groups/user_permissions: Campos herdados do AbstractUser, mas desativados pois não são utilizados.
     """
 
@@ -83,8 +117,13 @@ class Users(AbstractUser):
         null=True, 
         blank=True
     )  # Foto de perfil do usuário
+    photo_variants_ready = models.BooleanField(default=False, editable=False)  # Miniaturas da foto atual geradas
+    timezone = models.CharField(max_length=64, blank=True, default='', validators=[validate_timezone])  # Fuso horário IANA
     is_active = models.BooleanField(default=False)  # Usuários são inativos por padrão até ativação manual
+    updated_at = models.DateTimeField(auto_now=True)  # Atualiza a data toda vez que o perfil for alterado
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)  # Conta excluída, aguardando remoção
     objects = UsersManager()  # Usa o gerenciador customizado para lidar com usuários
+    tracked_fields = ('photo',)  # Permite limpar a foto antiga sem consultar o banco novamente
 
     # Campos desativados pois não são necessários para este projeto
     groups = None
@@ -104,11 +143,21 @@ class Users(AbstractUser):
 @receiver(models.signals.post_delete, sender=Users)
 def deletar_imagem_apos_excluir(sender, instance, **kwargs):
     """
-    Remove a foto do perfil do usuário quando ele for excluído.
+    Agenda a remoção da foto do perfil (e das miniaturas) quando o usuário for excluído.
     """
     if instance.photo:
-        if os.path.isfile(instance.photo.path):  # Verifica se o arquivo existe no sistema
-            os.remove(instance.photo.path)  # Exclui a imagem do diretório
+        schedule_removal(instance.photo.storage, instance.photo.name)
+
+
+@receiver(models.signals.pre_save, sender=Users)
+def normalize_uploaded_image(sender, instance, **kwargs):
+    """
+    Recodifica o novo arquivo da foto antes de gravá-lo (sem EXIF e com qualidade limitada).
+    """
+    normalized = normalize_image(instance.photo)
+    if normalized is not None:
+        instance.photo = normalized
+    reset_variants(instance, 'photo')
 
 
 @receiver(models.signals.pre_save, sender=Users)
@@ -116,17 +165,31 @@ def delete_old_image(sender, instance, **kwargs):
     """
     Remove a foto de perfil antiga quando o usuário atualiza sua imagem.
     """
-    if not instance.pk:  # Se for um novo usuário, não há imagem antiga para excluir
+    # Se for um novo usuário ou a foto não mudou, não há imagem antiga para excluir
+    if not instance.pk or not instance.has_changed('photo'):
         return
 
-    try:
-        old_instance = sender.objects.get(pk=instance.pk)  # Obtém a versão antiga do usuário
-    except sender.DoesNotExist:
-        return  # Se o usuário não existir, não há nada a excluir
+    old_photo = instance.get_initial('photo')  # Nome da foto carregada do banco (sem nova consulta)
+    if old_photo:
+        old_path = instance.photo.storage.path(old_photo)
+        if os.path.isfile(old_path):  # Verifica se a imagem antiga existe
+            os.remove(old_path)  # Exclui o arquivo da imagem antiga
+        delete_variants(instance.photo.storage, old_photo)
+
+
+@receiver(models.signals.post_save, sender=Users)
+def generate_photo_variants(sender, instance, created, **kwargs):
+    """
+    Agenda a geração das miniaturas da foto quando ela é enviada ou trocada.
+    """
+    if instance.photo and (created or instance.has_changed('photo')):
+        schedule_variants(instance.photo)
+
 
-    if old_instance.photo and old_instance.photo != instance.photo:
-        if os.path.isfile(old_instance.photo.path):  # Verifica se a imagem antiga existe
-            os.remove(old_instance.photo.path)  # Exclui o arquivo da imagem antiga
+@receiver(variants_ready, sender=Users)
+def touch_photo_variants(sender, pk, **kwargs):
+    """ As miniaturas ficaram prontas: atualiza `updated_at`, que alimenta o ETag do perfil. """
+    Users.objects.filter(pk=pk).update(updated_at=timezone.now())
 
 @receiver(models.signals.post_migrate)
 def create_interests(sender, **kwargs):
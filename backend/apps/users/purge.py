@@ -0,0 +1,28 @@
+from apps.bubble.models import Bubble, CheckIn
+from apps.forum.purge import purge_user_content
+from apps.study.models import AchievementLog, LessonLog
+from apps.users.models import Users
+from utils.bulk import delete_in_chunks
+
+"""
+    Remoção definitiva, em segundo plano, de um usuário excluído logicamente (`deleted_at`).
+
+    Os dados dependentes (fórum, bolha e check-ins, lições e conquistas, interesses) são apagados em
+    DELETEs por lote; por último o próprio usuário, cujo sinal agenda a remoção da foto. Idempotente:
+    pode ser repetida pelo comando `purge_deleted` se o processo cair no meio.
+"""
+
+
+def purge_user(user_id):
+    user = Users.objects.filter(pk=user_id, deleted_at__isnull=False).first()
+    if user is None:
+        return
+
+    purge_user_content(user_id)
+    delete_in_chunks(CheckIn.objects.filter(bubble__user_id=user_id))
+    delete_in_chunks(Bubble.objects.filter(user_id=user_id))
+    delete_in_chunks(LessonLog.objects.filter(user_id=user_id))
+    delete_in_chunks(AchievementLog.objects.filter(user_id=user_id))
+    delete_in_chunks(Users.interests.through.objects.filter(users_id=user_id))
+
+    user.delete()
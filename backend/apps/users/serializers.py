@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.contrib.auth import password_validation
 import re
 from apps.bubble.models import Bubble
+from utils.image import ImageVariantsField
 from . import models
 
 """
@@ -43,10 +44,11 @@ class UsersSerializer(serializers.ModelSerializer):
         required=False
     )
     password = serializers.CharField(write_only=True)
+    photo_variants = ImageVariantsField(source='photo')  # Miniaturas da foto (64, 256 e 800 px)
 
     class Meta:
         model = models.Users  # Define o modelo associado ao serializer
-        fields = ['id', 'username', 'first_name', 'last_name', 'password', 'email','bio' ,'interests' ,'phone', 'photo']  # Campos incluídos na serialização
+        fields = ['id', 'username', 'first_name', 'last_name', 'password', 'email','bio' ,'interests' ,'phone', 'timezone', 'photo', 'photo_variants']  # Campos incluídos na serialização
     
     def validate_phone(self, value):
         """
@@ -1,3 +1,8 @@
+import os
+import struct
+import zlib
+from django.core.exceptions import ValidationError
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
@@ -5,8 +10,13 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from io import BytesIO
 from PIL import Image
 
+from utils.image import (
+    JPEG_QUALITY, estimate_jpeg_quality, generate_variants, validate_image_dimensions, variant_name,
+)
 from utils.usermixin import UsersMixin
 from apps.users import models
+from apps.bubble.models import Bubble
+from apps.forum.models import Post, Thread
 
 # Testes da View 'UsersCreateView', que cria novos usuários
 class UsersTest(APITestCase, UsersMixin):
@@ -22,6 +32,19 @@ class UsersTest(APITestCase, UsersMixin):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.json().get('username'), 'username')
 
+    def test_get_user_profile_not_modified(self):
+        url = reverse('users:user_profile')
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.patch(reverse('users:user_update'), {'bio': 'Nova bio'})
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json().get('bio'), 'Nova bio')
+
     def test_get_user_profile_fail_for_unauthorized(self):
         url = reverse('users:user_profile')
 
@@ -179,6 +202,83 @@ class UsersTest(APITestCase, UsersMixin):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(response.json().get('photo')[0], "A extensão de arquivo “gif” não é permitida. As extensões válidas são: jpg, jpeg, png .")
 
+    def test_post_user_create_with_photo_strips_exif(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'  # Make
+        image_file = BytesIO()
+        Image.new('RGB', (100, 100), color='red').save(image_file, format='JPEG', exif=exif, quality=100)
+        photo = SimpleUploadedFile('exif_photo.jpg', image_file.getvalue(), content_type='image/jpeg')
+
+        response = self.client.post(reverse('users:user_create'), data={
+            "first_name": "Novo", "last_name": "Usuário", "username": "novouser", "password": "SenhaCorreta321",
+            "email": "novouser@email.com", "phone": "11987654321", "photo": photo,
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user = models.Users.objects.get(username='novouser')
+        with Image.open(user.photo.path) as stored:
+            self.assertEqual(len(stored.getexif()), 0)
+        self.assertLess(user.photo.size, len(image_file.getvalue()))
+
+        user.photo.delete()
+
+    def test_post_user_create_keeps_clean_photo_untouched(self):
+        image_file = BytesIO()
+        Image.new('RGB', (100, 100), color='blue').save(image_file, format='JPEG', quality=80)
+        photo = SimpleUploadedFile('clean_photo.jpg', image_file.getvalue(), content_type='image/jpeg')
+
+        response = self.client.post(reverse('users:user_create'), data={
+            "first_name": "Novo", "last_name": "Usuário", "username": "novouser", "password": "SenhaCorreta321",
+            "email": "novouser@email.com", "phone": "11987654321", "photo": photo,
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user = models.Users.objects.get(username='novouser')
+        with user.photo.open('rb') as stored:
+            self.assertEqual(stored.read(), image_file.getvalue())
+
+        user.photo.delete()
+
+    def test_post_user_create_caps_quality_of_clean_photo(self):
+        image_file = BytesIO()
+        Image.effect_noise((200, 200), 64).convert('RGB').save(image_file, format='JPEG', quality=98)
+        photo = SimpleUploadedFile('high_quality.jpg', image_file.getvalue(), content_type='image/jpeg')
+
+        response = self.client.post(reverse('users:user_create'), data={
+            "first_name": "Novo", "last_name": "Usuário", "username": "novouser", "password": "SenhaCorreta321",
+            "email": "novouser@email.com", "phone": "11987654321", "photo": photo,
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user = models.Users.objects.get(username='novouser')
+        with Image.open(user.photo.path) as stored:
+            self.assertLessEqual(estimate_jpeg_quality(stored), JPEG_QUALITY)
+        self.assertLess(user.photo.size, len(image_file.getvalue()))
+
+        user.photo.delete()
+
+    @override_settings(MAX_UPLOAD_SIZE=1024)
+    def test_post_user_create_fail_for_upload_too_large(self):
+        photo = SimpleUploadedFile('big_photo.jpg', os.urandom(4096), content_type='image/jpeg')
+
+        response = self.client.post(reverse('users:user_create'), data={
+            "username": "novouser", "password": "SenhaCorreta321", "email": "novouser@email.com",
+            "phone": "11987654321", "photo": photo,
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual(response.json().get('detail'), 'O arquivo enviado é maior que o permitido.')
+
+    def test_validate_image_dimensions_rejects_decompression_bomb(self):
+        # PNG só com o cabeçalho declarando 30000x30000: o validador não pode decodificar os pixels
+        def chunk(kind, data):
+            return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+        png = b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', 30000, 30000, 8, 2, 0, 0, 0)) + chunk(b'IDAT', b'')
+
+        with self.assertRaisesMessage(ValidationError, 'A imagem tem pixels demais para ser processada.'):
+            validate_image_dimensions(BytesIO(png))
+
     # Testando o PATCH para atualização de dados do usuário
     def test_patch_user_update(self):
         api_url = reverse('users:user_update')
@@ -210,6 +310,17 @@ class UsersTest(APITestCase, UsersMixin):
         self.assertEqual(interest.name, 'Reciclagem')
 
     # Testando o PATCH para atualização com nome de usuário duplicado
+    def test_patch_user_update_timezone(self):
+        api_url = reverse('users:user_update')
+
+        response = self.client.patch(api_url, {'timezone': 'Marte/Olympus'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.patch(api_url, {'timezone': 'America/Manaus'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.timezone, 'America/Manaus')
+
     def test_patch_user_update_fail_for_username_duplicate(self):
         api_url = reverse('users:user_update')
 
@@ -237,6 +348,35 @@ class UsersTest(APITestCase, UsersMixin):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
         self.assertEqual(response.json().get('detail'), 'As credenciais de autenticação não foram fornecidas.')
 
+    def test_user_save_without_photo_change_single_query(self):
+        user = models.Users.objects.get(pk=self.user.pk)
+        user.first_name = 'Outro'
+
+        # Sem mudança na foto, o sinal de limpeza não consulta o banco novamente
+        with self.assertNumQueries(1):
+            user.save()
+
+    def test_user_photo_change_removes_old_file(self):
+        image_file = BytesIO()
+        Image.new('RGB', (100, 100), color='red').save(image_file, format='JPEG')
+
+        self.user.photo = SimpleUploadedFile('old_photo.jpg', image_file.getvalue(), content_type='image/jpeg')
+        self.user.save()
+        old_path = self.user.photo.path
+        generate_variants(self.user.photo.storage, self.user.photo.name)
+        old_variant = self.user.photo.storage.path(variant_name(self.user.photo.name, 64))
+        self.assertTrue(os.path.exists(old_variant))
+
+        user = models.Users.objects.get(pk=self.user.pk)
+        user.photo = SimpleUploadedFile('new_photo.jpg', image_file.getvalue(), content_type='image/jpeg')
+        user.save()
+
+        self.assertFalse(os.path.exists(old_path))
+        self.assertFalse(os.path.exists(old_variant))
+        self.assertTrue(os.path.exists(user.photo.path))
+
+        user.photo.delete()
+
     def test_delete_user_delete(self):
         api_url = reverse('users:user_delete')
 
@@ -244,6 +384,32 @@ class UsersTest(APITestCase, UsersMixin):
 
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_delete_user_purges_data_in_background(self):
+        other_user = models.Users.objects.create_user(email='outro@example.com', username='outro', phone='1', password='x')
+        own_thread = Thread.objects.create(title='Minha', content='Conteúdo', author=self.user)
+        other_thread = Thread.objects.create(title='Outra', content='Conteúdo', author=other_user)
+        Post.objects.create(thread=other_thread, content='Resposta', author=self.user)
+        Thread.objects.add_like(other_thread.pk, self.user.pk)
+        Thread.objects.increment_counters(other_thread.pk, posts=1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('users:user_delete'))
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(models.Users.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Thread.all_objects.filter(pk=own_thread.pk).exists())
+        self.assertFalse(Bubble.objects.filter(user_id=self.user.pk).exists())
+        other_thread.refresh_from_db()
+        self.assertEqual((other_thread.post_count, other_thread.like_count), (0, 0))
+
+    def test_delete_user_deactivates_account_before_purge(self):
+        self.client.delete(reverse('users:user_delete'))
+
+        user = models.Users.objects.get(pk=self.user.pk)
+        self.assertFalse(user.is_active)
+        self.assertIsNotNone(user.deleted_at)
+
     def test_delete_user_delete_fail_for_unauthorized(self):
         api_url = reverse('users:user_delete')
 
@@ -2,8 +2,15 @@ from rest_framework.generics import GenericAPIView
 from rest_framework.mixins import ( RetrieveModelMixin, CreateModelMixin, UpdateModelMixin, DestroyModelMixin)
 from rest_framework.response import Response  
 from rest_framework import status, permissions  
+from django.db import transaction
+from django.utils import timezone
+from apps.forum.models import Thread
 from . import models, serializers 
+from .purge import purge_user
 from .email.send_email import send_confirmation_email 
+from utils.conditional import ConditionalGetMixin, make_etag
+from utils.tasks import run_in_background
+from utils.uploads import UploadSizeLimitMixin
 
 """
     Este arquivo contém as views relacionadas aos usuários, responsáveis por processar as requisições
@@ -20,7 +27,7 @@ from .email.send_email import send_confirmation_email
 
 # View responsável por criar novos usuários na plataforma.
 # Usada para criar usuarios, manda um email para a autenticação do email.
-class UserCreateView(GenericAPIView, CreateModelMixin):
+class UserCreateView(UploadSizeLimitMixin, GenericAPIView, CreateModelMixin):
     permission_classes = [permissions.AllowAny]
     serializer_class = serializers.UsersSerializer
 
@@ -42,20 +49,27 @@ class UserCreateView(GenericAPIView, CreateModelMixin):
     
 # View responsável por retornar o perfil do usuário autenticado.
 # Deve ser usada para pegar os dados do usuário que esta autenticado.
-class UserProfileView(GenericAPIView, RetrieveModelMixin):
+class UserProfileView(ConditionalGetMixin, GenericAPIView, RetrieveModelMixin):
     permission_classes = [permissions.IsAuthenticated]  # Exige autenticação para acessar a view
     serializer_class = serializers.UsersSerializer
 
     def get_object(self):
         return self.request.user
+
+    # O usuário já foi carregado na autenticação: os validadores não custam nenhuma consulta
+    def get_etag(self, request):
+        return make_etag('user', request.user.pk, request.user.updated_at.isoformat(), weak=True)
+
+    def get_last_modified(self, request):
+        return request.user.updated_at
     
     def get(self, request, *args, **kwargs):
-        return self.retrieve(request, *args, **kwargs)
+        return self.conditional_get(request, self.retrieve, *args, **kwargs)
     
 # View responsável por atualizar parcialmente os dados de um usuário específico.
 # Apenas usuários autenticados podem acessar essa rota.
 # Deve ser usada para atualizar os dados do usuário.
-class UserUpdateView(GenericAPIView, UpdateModelMixin):
+class UserUpdateView(UploadSizeLimitMixin, GenericAPIView, UpdateModelMixin):
     permission_classes = [permissions.IsAuthenticated]  # Exige autenticação para acessar a view
     serializer_class = serializers.UsersSerializer
 
@@ -75,6 +89,8 @@ class UserUpdateView(GenericAPIView, UpdateModelMixin):
 # View responsável por excluir um usuário específico.
 # Apenas usuários autenticados podem acessar essa rota.
 # Deve ser usada para deletar os dados de um usuario
+# A conta é desativada e marcada como excluída na hora (junto com as threads do usuário);
+# os dados dependentes e os arquivos são removidos em segundo plano (ver apps.users.purge).
 class UserDeleteView(GenericAPIView, DestroyModelMixin):
     permission_classes = [permissions.IsAuthenticated]  # Exige autenticação para acessar a view
     serializer_class = serializers.UsersSerializer
@@ -88,4 +104,10 @@ class UserDeleteView(GenericAPIView, DestroyModelMixin):
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         self.perform_destroy(instance)
-        return Response("Usuário excluído com sucesso!!", status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        return Response("Usuário excluído com sucesso!!", status=status.HTTP_204_NO_CONTENT)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            models.Users.objects.filter(pk=instance.pk).update(is_active=False, deleted_at=timezone.now())
+            Thread.objects.filter(author_id=instance.pk).mark_deleted()
+        run_in_background(purge_user, instance.pk)
\ No newline at end of file
@@ -0,0 +1,22 @@
+import os
+
+"""
+    Configuração do gunicorn (lida automaticamente quando ele é iniciado nesta pasta).
+
+    O número de workers vem de WEB_CONCURRENCY, o mesmo valor que project/settings.py usa na
+    verificação ecoviva.E001 (cache compartilhado obrigatório com mais de um worker).
+
+    worker_exit grava as visualizações pendentes do worker (apps/forum/view_counter.py) antes de
+    ele sair; um worker morto à força (SIGKILL, timeout) perde as do último intervalo.
+"""
+
+workers = int(os.getenv('WEB_CONCURRENCY', 1))
+
+
+def worker_exit(server, worker):
+    from apps.forum import view_counter
+
+    try:
+        view_counter.flush()
+    except Exception:
+        worker.log.exception('Falha ao gravar as visualizações pendentes do worker')
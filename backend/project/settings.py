@@ -93,6 +93,47 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# O padrão é o cache em memória do processo, que só serve para um único worker: as versões que
+# invalidam o cache do fórum e a escada de ranks precisam ser vistas por todos os processos. Com
+# WEB_CONCURRENCY > 1 use um backend compartilhado, ex.:
+#   CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache CACHE_LOCATION=ecoviva_cache
+#   (após `python manage.py createcachetable`), ou django.core.cache.backends.redis.RedisCache.
+# `manage.py check` falha (ecoviva.E001) se o cache for local com mais de um worker.
+
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 1))  # Workers do servidor (lido também pelo gunicorn)
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'ecoviva'),
+    }
+}
+
+BUBBLE_RANKS_TTL = int(os.getenv('BUBBLE_RANKS_TTL', 60))  # Segundos até recarregar a escada de ranks mesmo sem nova versão
+FORUM_CACHE_TIMEOUT = int(os.getenv('FORUM_CACHE_TIMEOUT', 300))  # Segundos
+FORUM_VIEW_FLUSH_INTERVAL = int(os.getenv('FORUM_VIEW_FLUSH_INTERVAL', 30))  # Segundos entre gravações das visualizações
+FORUM_VIEW_FLUSH_MAX = int(os.getenv('FORUM_VIEW_FLUSH_MAX', 500))  # Threads pendentes que antecipam a gravação
+FORUM_VIEW_FLUSH_TIMER = os.getenv('FORUM_VIEW_FLUSH_TIMER', 'True') == 'True'  # Grava também sem novas visualizações
+FORUM_HOT_HALF_LIFE_HOURS = float(os.getenv('FORUM_HOT_HALF_LIFE_HOURS', 24))  # Meia-vida da pontuação "em alta"
+
+# Eventos em tempo real das threads (apps/forum/events.py). O stream SSE só é servido sob ASGI
+# (ex.: gunicorn project.asgi:application -k uvicorn.workers.UvicornWorker); com mais de um worker,
+# use FORUM_EVENTS_BROKER=apps.forum.events.PostgresBroker
+FORUM_EVENTS_BROKER = os.getenv('FORUM_EVENTS_BROKER', 'apps.forum.events.InMemoryBroker')
+FORUM_EVENTS_PG_CHANNEL = os.getenv('FORUM_EVENTS_PG_CHANNEL', 'forum_events')  # Canal do LISTEN/NOTIFY
+FORUM_EVENTS_QUEUE_SIZE = int(os.getenv('FORUM_EVENTS_QUEUE_SIZE', 100))  # Eventos guardados por conexão lenta
+FORUM_EVENTS_KEEPALIVE = int(os.getenv('FORUM_EVENTS_KEEPALIVE', 15))  # Segundos entre comentários de keep-alive
+
+
+# Tarefas em segundo plano (utils/tasks.py)
+
+BACKGROUND_TASK_WORKERS = int(os.getenv('BACKGROUND_TASK_WORKERS', 2))
+BACKGROUND_TASKS_EAGER = os.getenv('BACKGROUND_TASKS_EAGER') == 'True'  # Executa na hora (útil em testes)
+PURGE_CHUNK_SIZE = int(os.getenv('PURGE_CHUNK_SIZE', 1000))  # Linhas por DELETE na remoção definitiva (utils/bulk.py)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -132,12 +173,16 @@ STATIC_ROOT = os.getenv('STATIC_ROOT', BASE_DIR / 'staticfiles')
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Uploads: nas views da API o limite é aplicado enquanto o corpo é recebido (UploadSizeLimitMixin
+# em utils/uploads.py); nas demais, pelos validadores dos campos de imagem
+MAX_UPLOAD_SIZE = int(os.getenv('MAX_UPLOAD_SIZE', 5 * 1024 * 1024))  # Bytes por arquivo
+
 AUTH_USER_MODEL = 'users.Users'
 
 
 AUTHENTICATION_BACKENDS = [
     'apps.users.auth.auth.EmailBackend',  
-    'django.contrib.auth.backends.ModelBackend',
+    'apps.users.auth.auth.UndeletedModelBackend',
 ]
 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -166,8 +211,12 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         'apps.users.auth.middleware.CookieJWTAuthentication',
     ],
+    "PAGE_SIZE": int(os.getenv('API_PAGE_SIZE', 20)),
 }
 
+# A paginação é definida por view (ex.: KeysetPagination no feed do fórum); PAGE_SIZE é só o padrão
+SILENCED_SYSTEM_CHECKS = ['rest_framework.W001']
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
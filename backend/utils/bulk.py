@@ -0,0 +1,33 @@
+from django.conf import settings
+
+"""
+    Operações em lote sobre o banco.
+
+    - delete_in_chunks: Apaga as linhas de um queryset com DELETEs por faixa de ids, sem carregar os
+      objetos nem disparar sinais/cascatas do ORM. Quem chama é responsável por apagar antes as
+      linhas dependentes e por fazer o que os sinais fariam (índices, contadores, cache, arquivos).
+"""
+
+
+def delete_in_chunks(queryset, chunk_size=None, before_delete=None):
+    """
+    Apaga as linhas do queryset em lotes de `chunk_size` (PURGE_CHUNK_SIZE por padrão), cada lote
+    um `DELETE ... WHERE id IN (...)` próprio, para não segurar locks por muito tempo.
+
+    - before_delete: Função chamada com os ids de cada lote antes do DELETE.
+
+    Retorna o total de linhas apagadas.
+    """
+    chunk_size = chunk_size or settings.PURGE_CHUNK_SIZE
+    manager = queryset.model._base_manager
+    total = 0
+
+    while True:
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return total
+
+        if before_delete is not None:
+            before_delete(ids)
+        # _raw_delete: DELETE direto, sem o Collector (que buscaria cada objeto para os sinais)
+        total += manager.filter(pk__in=ids)._raw_delete(manager.db)
@@ -1,7 +1,7 @@
 from apps.study.models import Achievement, AchievementLog, LessonLog
-from apps.users.models import Users
-from apps.bubble.models import CheckIn
-from django.utils.timezone import now, timedelta
+from apps.users.models import Users, local_date
+from apps.bubble.models import Bubble, CheckIn
+from django.utils.timezone import now
 
 class CheckAchievements:
     CONDITION_HANDLERS = {}
@@ -43,16 +43,11 @@ class CheckAchievementsCheckIn(CheckAchievements):
 
     @staticmethod
     def user_checkin_streak(user):
-        checkins = CheckIn.objects.filter(bubble__user=user).order_by('-date')
-        expected_day = now().date()
-        streak = 0
-        for checkin in checkins:
-            if checkin.date == expected_day:
-                streak += 1
-                expected_day -= timedelta(days=1)
-            else:
-                break
-        return streak
+        # Sequência mantida na bolha pelo check-in: leitura de uma linha, sem percorrer o histórico
+        bubble = Bubble.objects.filter(user=user).only('current_streak', 'last_checkin_local_date').first()
+        if bubble is None:
+            return 0
+        return bubble.active_streak(local_date(now(), user.timezone))
 
 
 CheckAchievements.register_handlers({
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core import checks
+
+"""
+    Verificações do sistema (`manage.py check`, executadas também ao subir o servidor).
+
+    - check_shared_cache: As versões do cache do fórum (apps.forum.cache) e da escada de ranks
+      (apps.bubble.ranks) só invalidam todos os workers se o cache padrão for compartilhado entre
+      os processos. Com mais de um worker (WEB_CONCURRENCY) e um backend por processo, cada worker
+      seguiria servindo os próprios dados antigos; a verificação falha nesse caso.
+"""
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def check_shared_cache(app_configs=None, **kwargs):
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend in PROCESS_LOCAL_CACHES and settings.WEB_CONCURRENCY > 1:
+        return [
+            checks.Error(
+                f'O cache padrão ({backend}) é local a cada processo, mas WEB_CONCURRENCY={settings.WEB_CONCURRENCY}.',
+                hint=(
+                    'Configure um cache compartilhado, ex.: CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache '
+                    'com CACHE_LOCATION=ecoviva_cache (e `manage.py createcachetable`) ou um backend Redis.'
+                ),
+                id='ecoviva.E001',
+            )
+        ]
+    return []
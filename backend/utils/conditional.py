@@ -0,0 +1,62 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+"""
+    GET condicional (ETag / Last-Modified) para as views da API.
+
+    - ConditionalGetMixin: Calcula os validadores com consultas baratas (versões, timestamps) e,
+      se o cliente já tem a representação atual (`If-None-Match` / `If-Modified-Since`), responde
+      304 antes de executar as consultas pesadas e a serialização.
+"""
+
+
+def make_etag(*parts, weak=False):
+    """ Gera um ETag a partir de valores que mudam junto com a representação. """
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode(), usedforsecurity=False).hexdigest()
+    etag = quote_etag(digest)
+    return f'W/{etag}' if weak else etag
+
+
+class ConditionalGetMixin:
+    """
+    Mixin para views com GET condicional.
+
+    - get_etag(request): ETag da representação atual (ou None).
+    - get_last_modified(request): datetime da última modificação (ou None).
+    - conditional_get(request, handler): Responde 304 se o cliente estiver atualizado; caso
+      contrário executa `handler` e adiciona os validadores à resposta.
+
+    As respostas dependem do usuário autenticado, então são marcadas como `private, no-cache`:
+    o navegador guarda a cópia mas revalida a cada uso.
+
+    Os validadores devem vir de estado visto por todos os workers (banco ou cache compartilhado,
+    ver ecoviva.E001 em utils/checks.py); caso contrário, dois workers geram validadores diferentes
+    e um worker desatualizado responde 304 para conteúdo que mudou. Só implemente
+    get_last_modified quando toda mudança da representação tiver um instante correspondente.
+    """
+
+    def get_etag(self, request):
+        return None
+
+    def get_last_modified(self, request):
+        return None
+
+    def conditional_get(self, request, handler, *args, **kwargs):
+        etag = self.get_etag(request)
+        last_modified = self.get_last_modified(request)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code not in (200, 304):
+            return response
+
+        if etag:
+            response.headers['ETag'] = etag
+        if timestamp is not None:
+            response.headers['Last-Modified'] = http_date(timestamp)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -1,15 +1,272 @@
+import os
+import time
+import warnings
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from PIL import Image
+from django.core.files.base import ContentFile
+from django.dispatch import Signal
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+from utils.tasks import run_in_background
+
+"""
+    Utilitários de imagem usados por capas de threads e fotos de usuários.
+
+    - validate_image_size / validate_image_dimensions: Validadores dos campos de imagem. As dimensões
+      são lidas só do cabeçalho, sem decodificar os pixels, e imagens com pixels demais (bombas de
+      descompressão) são recusadas.
+    - normalize_image: Recodifica um upload aceito (sem EXIF, qualidade limitada) antes de gravá-lo;
+      arquivos sem metadados e já dentro dos limites (inclusive a qualidade do JPEG) são mantidos intactos.
+    - Variantes: cópias redimensionadas em WebP (VARIANT_SIZES), salvas ao lado do original com nome
+      determinístico (`foto.jpg` → `foto.jpg_256.webp`), geradas em segundo plano após o upload. Quando
+      ficam prontas, o campo booleano `<campo>_variants_ready` do modelo é marcado e o sinal
+      `variants_ready` é enviado (para invalidar caches/ETags que exibem as URLs).
+    - ImageVariantsField: Campo de serializer com as URLs das variantes (ou do original, até elas existirem).
+    - schedule_removal: Remove um arquivo e suas variantes em segundo plano, com novas tentativas.
+"""
+
+VARIANT_SIZES = (64, 256, 800)  # Lado máximo, em pixels
+VARIANT_FORMAT = 'WEBP'
+VARIANT_QUALITY = 80
+
+MAX_IMAGE_WIDTH = 1200
+MAX_IMAGE_HEIGHT = 1200
+MAX_IMAGE_PIXELS = MAX_IMAGE_WIDTH * MAX_IMAGE_HEIGHT
+JPEG_QUALITY = 85  # Teto de qualidade na recodificação
+# Tabela de quantização de luminância padrão (qualidade 50), usada para estimar a qualidade de um JPEG
+JPEG_LUMA_TABLE = (
+    16, 11, 10, 16, 24, 40, 51, 61, 12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56, 14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77, 24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101, 72, 92, 95, 98, 112, 100, 103, 99,
+)
+# Chaves de Image.info que não identificam nada (codificação e cor); qualquer outra faz a imagem ser recodificada
+IMAGE_INFO_ALLOWED = {
+    'icc_profile', 'dpi', 'jfif', 'jfif_version', 'jfif_unit', 'jfif_density', 'progressive',
+    'progression', 'adobe', 'adobe_transform', 'gamma', 'transparency', 'aspect', 'srgb',
+}
+
+# Enviado quando as variantes de um arquivo ficam prontas: sender=modelo, pk, field_name
+variants_ready = Signal()
+
+REMOVAL_ATTEMPTS = 3
+REMOVAL_BACKOFF = 2  # Segundos antes da segunda tentativa (dobra a cada nova tentativa)
 
 def validate_image_size(image):
-    max_size = 5 * 1024 * 1024
+    max_size = settings.MAX_UPLOAD_SIZE
     if image.size > max_size:
-        raise ValidationError("O arquivo de imagem não pode ser maior que 5MB.")
+        raise ValidationError(f"O arquivo de imagem não pode ser maior que {max_size // (1024 * 1024)}MB.")
+
+def read_image_header(image):
+    """
+    Lê formato e dimensões do cabeçalho da imagem (Image.open é preguiçoso e não decodifica os pixels).
+    Deixa o arquivo na posição inicial para quem for lê-lo depois.
+    """
+    image.seek(0)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', Image.DecompressionBombWarning)
+            with Image.open(image) as img:
+                return img.format, img.size
+    except (Image.DecompressionBombWarning, Image.DecompressionBombError):
+        raise ValidationError("A imagem tem pixels demais para ser processada.")
+    except (OSError, SyntaxError, ValueError):
+        raise ValidationError("Envie uma imagem válida.")
+    finally:
+        image.seek(0)
 
 # Função de validação de dimensões
 def validate_image_dimensions(image):
-    img = Image.open(image)
-    max_width = 1200
-    max_height = 1200
-    if img.width > max_width or img.height > max_height:
-        raise ValidationError(f"As dimensões da imagem não podem exceder {max_width}x{max_height} pixels.")
\ No newline at end of file
+    _, (width, height) = read_image_header(image)
+    if width > MAX_IMAGE_WIDTH or height > MAX_IMAGE_HEIGHT or width * height > MAX_IMAGE_PIXELS:
+        raise ValidationError(f"As dimensões da imagem não podem exceder {MAX_IMAGE_WIDTH}x{MAX_IMAGE_HEIGHT} pixels.")
+
+def is_clean_image(img):
+    """ True se a imagem não tem EXIF nem outros metadados além dos de IMAGE_INFO_ALLOWED. """
+    return not img.getexif() and set(img.info) <= IMAGE_INFO_ALLOWED
+
+def estimate_jpeg_quality(img):
+    """
+    Estima a qualidade (1-100, escala da libjpeg) com que um JPEG foi salvo, comparando a tabela de
+    quantização de luminância com a tabela padrão. Retorna None se a imagem não tiver tabelas.
+    """
+    tables = getattr(img, 'quantization', None)
+    if not tables or 0 not in tables:
+        return None
+    scale = sum(tables[0]) * 100 / sum(JPEG_LUMA_TABLE)
+    if scale <= 1:
+        return 100
+    return round((200 - scale) / 2 if scale <= 100 else 5000 / scale)
+
+def needs_reencoding(img, image_format):
+    """ Se o upload precisa ser recodificado: metadados a remover ou JPEG acima de JPEG_QUALITY. """
+    if not is_clean_image(img):
+        return True
+    if image_format == 'JPEG':
+        quality = estimate_jpeg_quality(img)
+        return quality is None or quality > JPEG_QUALITY
+    return False
+
+def normalize_image(field_file):
+    """
+    Recodifica um upload ainda não gravado: aplica a orientação do EXIF, descarta os metadados
+    (EXIF, GPS, comentários; o perfil de cor é mantido) e limita a qualidade do JPEG. Retorna um ContentFile com o mesmo nome, ou
+    None se o arquivo não precisar/puder ser processado (o original é mantido nesse caso). Um arquivo
+    sem metadados a remover, dentro das dimensões e (JPEG) com qualidade estimada até JPEG_QUALITY
+    também é mantido como veio, sem uma segunda perda de qualidade.
+    """
+    if not field_file or field_file._committed:
+        return None
+
+    upload = field_file.file
+    try:
+        image_format, (width, height) = read_image_header(upload)
+        if width * height > MAX_IMAGE_PIXELS:  # Os validadores não rodam em saves feitos direto pelo ORM
+            return None
+
+        with Image.open(upload) as img:
+            if not needs_reencoding(img, image_format) and width <= MAX_IMAGE_WIDTH and height <= MAX_IMAGE_HEIGHT:
+                return None  # Nada a remover nem a reduzir: recodificar só perderia qualidade
+            icc_profile = img.info.get('icc_profile')
+            image = ImageOps.exif_transpose(img)
+            image.load()
+    except (ValidationError, OSError, SyntaxError, ValueError):
+        return None
+    finally:
+        upload.seek(0)
+
+    buffer = BytesIO()
+    if image_format == 'JPEG':
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        image.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True, icc_profile=icc_profile)
+    elif image_format == 'PNG':
+        image.save(buffer, 'PNG', optimize=True, icc_profile=icc_profile)
+    else:
+        return None
+
+    return ContentFile(buffer.getvalue(), name=os.path.basename(field_file.name))
+
+# ----- Variantes redimensionadas -----
+
+def variant_name(name, size):
+    """
+    Nome da variante no storage, derivado do nome completo do original. A extensão faz parte do nome
+    para que `foto.jpg` e `foto.png` (nomes livres distintos no storage) não dividam as variantes.
+    """
+    return f'{name}_{size}.{VARIANT_FORMAT.lower()}'
+
+def generate_variants(storage, name, sizes=VARIANT_SIZES):
+    """
+    Gera as variantes do arquivo `name`. Imagens menores que o tamanho pedido não são ampliadas.
+    Se o original já foi substituído/removido, não faz nada. Retorna True se as variantes foram geradas.
+    """
+    if not storage.exists(name):
+        return False
+
+    with storage.open(name, 'rb') as original:
+        image = ImageOps.exif_transpose(Image.open(original))
+        image.load()
+
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if image.mode in ('LA', 'P', 'PA') else 'RGB')
+
+    for size in sizes:
+        variant = image.copy()
+        variant.thumbnail((size, size), Image.LANCZOS)
+
+        buffer = BytesIO()
+        variant.save(buffer, VARIANT_FORMAT, quality=VARIANT_QUALITY, method=4)
+
+        target = variant_name(name, size)
+        if storage.exists(target):
+            storage.delete(target)
+        storage.save(target, ContentFile(buffer.getvalue()))
+    return True
+
+def variants_flag(field_name):
+    """ Campo booleano do modelo que indica se as variantes do arquivo atual existem. """
+    return f'{field_name}_variants_ready'
+
+def reset_variants(instance, field_name):
+    """ Em um pre_save: um arquivo novo ainda não tem variantes. """
+    if not instance.pk or instance.has_changed(field_name):
+        setattr(instance, variants_flag(field_name), False)
+
+def generate_instance_variants(model_label, pk, field_name, name):
+    """
+    Gera as variantes do arquivo `name` e marca `<campo>_variants_ready`, desde que a instância
+    ainda use esse arquivo (um upload mais novo tem a própria tarefa). Envia `variants_ready`.
+    """
+    model = apps.get_model(model_label)
+    if not generate_variants(model._meta.get_field(field_name).storage, name):
+        return
+    updated = model._base_manager.filter(pk=pk, **{field_name: name}).update(**{variants_flag(field_name): True})
+    if updated:
+        variants_ready.send(sender=model, pk=pk, field_name=field_name)
+
+def schedule_variants(field_file):
+    """ Agenda a geração das variantes para depois do commit, fora da requisição. """
+    if field_file:
+        instance = field_file.instance
+        run_in_background(
+            generate_instance_variants, instance._meta.label, instance.pk, field_file.field.name, field_file.name
+        )
+
+def delete_variants(storage, name, sizes=VARIANT_SIZES):
+    for size in sizes:
+        target = variant_name(name, size)
+        if storage.exists(target):
+            storage.delete(target)
+
+def remove_image_files(storage, name, attempts=REMOVAL_ATTEMPTS):
+    """
+    Remove o arquivo `name` e suas variantes. Em caso de erro de I/O tenta de novo, pulando os
+    arquivos já removidos; na última falha o erro é propagado (e registrado por run_in_background).
+    """
+    pending = [name] + [variant_name(name, size) for size in VARIANT_SIZES]
+    for attempt in range(attempts):
+        try:
+            while pending:
+                if storage.exists(pending[0]):
+                    storage.delete(pending[0])
+                pending.pop(0)
+            return
+        except OSError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(REMOVAL_BACKOFF * 2 ** attempt)
+
+def schedule_removal(storage, name):
+    """ Agenda a remoção do arquivo e das variantes para depois do commit, fora da requisição. """
+    if name:
+        run_in_background(remove_image_files, storage, name)
+
+class ImageVariantsField(serializers.Field):
+    """
+    URLs das variantes de um campo de imagem: `{"64": url, "256": url, "800": url}` ou None sem imagem.
+
+    As variantes ficam prontas alguns instantes após o upload (ou nunca, se a geração falhar); até o
+    modelo marcar `<campo>_variants_ready`, todas as chaves apontam para o original. O campo de
+    controle deve estar entre as colunas carregadas (ex.: no `only()` do queryset).
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+
+        request = self.context.get('request')
+        ready = getattr(value.instance, variants_flag(value.field.name), False)
+        urls = {}
+        for size in VARIANT_SIZES:
+            url = value.storage.url(variant_name(value.name, size) if ready else value.name)
+            urls[str(size)] = request.build_absolute_uri(url) if request else url
+        return urls
@@ -0,0 +1,262 @@
+import base64
+import binascii
+import json
+import uuid
+
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Q, Subquery
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+"""
+    Paginação por keyset (seek method) para as listagens da API.
+
+    Em vez de OFFSET, cada página é obtida filtrando a partir dos valores da última linha entregue
+    (ex.: `created_at < X OR (created_at = X AND id < Y)`). Com um índice composto na mesma ordem,
+    buscar a próxima página custa o mesmo independentemente da profundidade.
+
+    - KeysetPagination: Classe de paginação reutilizável. A ordenação vem de `view.get_keyset_ordering()`
+      ou do atributo `ordering`, e deve sempre terminar em um campo único (normalmente `id`).
+    - SnapshotPagination: Para ordenações por valores que mudam entre uma página e outra (ex.: uma
+      pontuação recalculada), em que o keyset pularia ou repetiria linhas. A primeira página guarda
+      no cache a lista ordenada de ids (até `snapshot_size`); as seguintes são fatias dessa lista.
+"""
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginação baseada em cursor opaco com ordenação composta.
+
+    - cursor: Parâmetro com a posição codificada (valores da última linha + direção).
+    - page_size: Tamanho padrão da página (REST_FRAMEWORK['PAGE_SIZE']), configurável via `?page_size=`.
+    - ordering: Campos de ordenação; todos devem ser campos não nulos do modelo.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Cursor inválido.'
+
+    def __init__(self):
+        self.page_size = api_settings.PAGE_SIZE or 20
+        self.base_url = None
+        self.next_values = None
+        self.previous_values = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.setup(request, view)
+        cursor = self.decode_cursor(request)
+        return self.paginate_from(queryset, cursor)
+
+    def paginate_to(self, queryset, request, anchor, view=None, anchor_param=None):
+        """
+        Retorna a página que começa na linha de `anchor` (queryset filtrado para uma única linha).
+
+        Os valores da âncora entram como subconsultas no filtro, então a página sai de uma única
+        consulta. Se a âncora não existir em `queryset`, a página vem vazia.
+
+        - anchor_param: Parâmetro da URL que pediu o salto; é removido dos links next/previous.
+        """
+        self.setup(request, view)
+        if anchor_param:
+            self.base_url = remove_query_param(self.base_url, anchor_param)
+        values = [Subquery(anchor.values(field.lstrip('-'))[:1]) for field in self.ordering]
+        return self.paginate_from(queryset, (values, False), inclusive=True)
+
+    def setup(self, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(view)
+        self.base_url = request.build_absolute_uri()
+
+    def paginate_from(self, queryset, cursor, inclusive=False):
+        """
+        Executa a consulta da página a partir de um cursor já decodificado.
+
+        - cursor: Tupla (valores, reverso) ou None para a primeira página.
+        - inclusive: Inclui a própria linha do cursor (usado para "pular" até um item específico).
+        """
+        values, reverse = cursor if cursor else (None, False)
+        order = [self._flip(field) for field in self.ordering] if reverse else list(self.ordering)
+
+        queryset = queryset.order_by(*order)
+        if values is not None:
+            queryset = queryset.filter(self.keyset_filter(queryset.model, order, values, inclusive))
+
+        rows = list(queryset[:self.page_size + 1])  # Uma linha extra indica se há mais resultados
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            has_previous, has_next = has_more, values is not None
+        else:
+            has_previous, has_next = values is not None, has_more
+
+        self.next_values = self.row_values(rows[-1]) if rows and has_next else None
+        self.previous_values = self.row_values(rows[0]) if rows and has_previous else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if self.next_values is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.next_values, False))
+
+    def get_previous_link(self):
+        if self.previous_values is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.previous_values, True))
+
+    # ----- Configuração -----
+
+    def get_ordering(self, view):
+        if view is not None and hasattr(view, 'get_keyset_ordering'):
+            return tuple(view.get_keyset_ordering())
+        return tuple(self.ordering)
+
+    def get_page_size(self, request):
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw is None:
+            return self.page_size
+        try:
+            size = int(raw)
+        except ValueError:
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    # ----- Cursor -----
+
+    def encode_cursor(self, values, reverse):
+        payload = json.dumps({'o': ','.join(self.ordering), 'v': values, 'r': reverse}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            if payload['o'] != ','.join(self.ordering) or len(payload['v']) != len(self.ordering):
+                raise ValueError
+            return payload['v'], bool(payload['r'])
+        except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def row_values(self, row):
+        """ Converte os valores de ordenação da linha para texto serializável. """
+        values = []
+        for field_name in self.ordering:
+            name = field_name.lstrip('-')
+            value = getattr(row, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return values
+
+    def keyset_filter(self, model, order, values, inclusive=False):
+        """
+        Monta a condição "linhas depois de `values`" para uma ordenação composta.
+
+        Para (a DESC, b DESC) gera: a < va OR (a = va AND b < vb).
+        """
+        condition = Q()
+        equal = Q()
+
+        for index, (field_name, raw_value) in enumerate(zip(order, values)):
+            name = field_name.lstrip('-')
+            value = self._to_python(model, name, raw_value)
+            last = index == len(order) - 1
+            lookup = 'lt' if field_name.startswith('-') else 'gt'
+            if last and inclusive:
+                lookup += 'e'
+
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+
+        return condition
+
+    def _to_python(self, model, name, raw_value):
+        if hasattr(raw_value, 'resolve_expression'):  # Subconsulta de paginate_to
+            return raw_value
+        try:
+            field = model._meta.get_field(name)
+            return field.to_python(raw_value)
+        except (FieldDoesNotExist, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def _flip(field_name):
+        return field_name[1:] if field_name.startswith('-') else f'-{field_name}'
+
+
+class SnapshotPagination(KeysetPagination):
+    """
+    Paginação sobre um retrato da ordenação tirado na primeira página.
+
+    - snapshot_size: Quantidade máxima de linhas alcançáveis pela paginação.
+    - snapshot_timeout: Segundos que o retrato fica no cache; depois disso o cursor é recusado.
+
+    Linhas removidas depois do retrato são omitidas (a página pode vir menor); os valores exibidos
+    são os atuais, só a ordem é a do retrato. O cache deve ser compartilhado entre os processos.
+    """
+    snapshot_size = 1000
+    snapshot_timeout = 600
+    expired_cursor_message = 'A listagem expirou. Carregue a primeira página novamente.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.setup(request, view)
+        cursor = self.decode_cursor(request)
+        if cursor is None:
+            key, offset = uuid.uuid4().hex, 0
+            ids = list(queryset.order_by(*self.ordering).values_list('pk', flat=True)[:self.snapshot_size])
+            cache.set(self.snapshot_key(key), ids, timeout=self.snapshot_timeout)
+        else:
+            key, offset = cursor
+            ids = cache.get(self.snapshot_key(key))
+            if ids is None:
+                raise NotFound(self.expired_cursor_message)
+
+        page_ids = ids[offset:offset + self.page_size]
+        rows = queryset.in_bulk(page_ids)
+
+        self.next_values = (key, offset + self.page_size) if offset + self.page_size < len(ids) else None
+        self.previous_values = (key, max(offset - self.page_size, 0)) if offset > 0 else None
+        return [rows[pk] for pk in page_ids if pk in rows]
+
+    # O cursor guarda (chave do retrato, deslocamento); a direção não importa
+    def encode_cursor(self, values, reverse):
+        payload = json.dumps({'o': ','.join(self.ordering), 's': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            key, offset = payload['s']
+            if payload['o'] != ','.join(self.ordering) or not isinstance(key, str) or not isinstance(offset, int) \
+                    or offset < 0:
+                raise ValueError
+            return key, offset
+        except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def snapshot_key(key):
+        return f'pagination:snapshot:{key}'
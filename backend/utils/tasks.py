@@ -0,0 +1,51 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+"""
+    Execução de tarefas fora do ciclo da requisição.
+
+    - run_in_background: Agenda uma função para depois do commit da transação atual, em um pool de
+      threads do próprio processo. Serve para trabalho que pode atrasar alguns segundos sem prejuízo
+      (ex.: gerar miniaturas), sem exigir um broker externo.
+
+    Com BACKGROUND_TASKS_EAGER=True a função roda na hora (no commit), o que facilita testes.
+"""
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BACKGROUND_TASK_WORKERS, thread_name_prefix='ecoviva-tasks'
+        )
+    return _executor
+
+
+def run_in_background(func, *args, **kwargs):
+    """ Executa `func(*args, **kwargs)` em segundo plano assim que a transação atual for confirmada. """
+    def submit():
+        if settings.BACKGROUND_TASKS_EAGER:
+            _run(func, args, kwargs, eager=True)
+        else:
+            get_executor().submit(_run, func, args, kwargs)
+
+    transaction.on_commit(submit)
+
+
+def _run(func, args, kwargs, eager=False):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Falha na tarefa em segundo plano %s', getattr(func, '__name__', func))
+        if eager:
+            raise
+    finally:
+        if not eager:
+            close_old_connections()  # A thread do pool não passa pelo request_finished
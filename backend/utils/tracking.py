@@ -0,0 +1,72 @@
+from django.db.models.fields.files import FieldFile, FileField
+
+"""
+    Rastreamento de campos alterados em instâncias de modelos.
+
+    - FieldTrackerMixin: Guarda os valores dos campos listados em `tracked_fields` quando a instância
+      é carregada do banco (e após cada save), permitindo saber o que mudou sem uma nova consulta.
+"""
+
+_UNCOMMITTED = object()  # Marca um arquivo novo, ainda não gravado no storage
+
+
+class FieldTrackerMixin:
+    """
+    Mixin para modelos que precisam detectar mudanças de campos no save.
+
+    - tracked_fields: Nomes dos campos rastreados.
+    - has_changed(name): Indica se o campo mudou desde o carregamento/último save.
+    - get_initial(name): Valor carregado do banco (para arquivos, o nome salvo no storage).
+    - changed_fields(): Lista dos campos rastreados que mudaram.
+
+    Campos adiados (`defer`/`only`) não entram no snapshot e são considerados inalterados.
+    Instâncias novas, ainda não salvas, não têm snapshot.
+    """
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._snapshot_tracked_fields()
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._snapshot_tracked_fields()
+
+    def has_changed(self, name):
+        snapshot = getattr(self, '_tracked_snapshot', {})
+        if name not in snapshot:
+            return False
+        return self._tracked_value(name) != snapshot[name]
+
+    def get_initial(self, name):
+        return getattr(self, '_tracked_snapshot', {}).get(name)
+
+    def changed_fields(self):
+        return [name for name in self.tracked_fields if self.has_changed(name)]
+
+    def _snapshot_tracked_fields(self):
+        deferred = self.get_deferred_fields()
+        self._tracked_snapshot = {
+            name: self._tracked_value(name)
+            for name in self.tracked_fields
+            if self._meta.get_field(name).attname not in deferred
+        }
+
+    def _tracked_value(self, name):
+        # Lê direto do __dict__ para não disparar descritores (ex.: FileDescriptor) nem consultas
+        field = self._meta.get_field(name)
+        value = self.__dict__.get(field.attname)
+
+        if isinstance(value, FieldFile):
+            return (value.name or None) if value._committed else _UNCOMMITTED
+        if hasattr(value, 'read'):  # Arquivo atribuído diretamente, ainda não convertido em FieldFile
+            return _UNCOMMITTED
+        if isinstance(field, FileField):
+            return value or None  # Sem arquivo pode vir como '' ou None
+        return value
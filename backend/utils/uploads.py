@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+"""
+    Limite de tamanho aplicado durante o recebimento do upload.
+
+    - MaxUploadSizeHandler: Recusa a requisição pelo Content-Length antes de ler o corpo e
+      interrompe o recebimento assim que um arquivo passa de MAX_UPLOAD_SIZE, em vez de gravar o
+      upload inteiro para só então validar.
+    - UploadSizeLimitMixin: Instala o handler só nas views da API que recebem arquivos. O erro é
+      uma exceção do DRF (413); fora do DRF (ex.: admin) ela viraria um 500, então o handler não
+      fica em FILE_UPLOAD_HANDLERS — lá valem os validadores dos campos de imagem.
+    - UploadTooLarge: Erro 413 devolvido pela API nesses casos.
+"""
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'O arquivo enviado é maior que o permitido.'
+    default_code = 'upload_too_large'
+
+
+class MaxUploadSizeHandler(FileUploadHandler):
+    """
+    Conta os bytes recebidos de cada arquivo e aborta o upload ao ultrapassar o limite.
+
+    O corpo inteiro pode ter, além do arquivo, os demais campos do formulário
+    (até DATA_UPLOAD_MAX_MEMORY_SIZE).
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length and content_length > settings.MAX_UPLOAD_SIZE + settings.DATA_UPLOAD_MAX_MEMORY_SIZE:
+            raise UploadTooLarge()
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.MAX_UPLOAD_SIZE:
+            raise UploadTooLarge()
+        return raw_data  # Repassa o bloco para os próximos handlers
+
+    def file_complete(self, file_size):
+        return None  # Quem guarda o arquivo são os handlers seguintes
+
+
+class UploadSizeLimitMixin:
+    """ Para views do DRF com upload: coloca o MaxUploadSizeHandler antes dos handlers padrão. """
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers.insert(0, MaxUploadSizeHandler(request))
+        return super().initialize_request(request, *args, **kwargs)
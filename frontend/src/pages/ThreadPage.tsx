@@ -94,7 +94,7 @@ const ThreadDetailPage: React.FC = () => {
           <div className="flex items-start space-x-3 mb-4">
             {thread.author.photo ? (
               <img
-                src={`http://localhost:8000/${thread.author.photo}`}
+                src={thread.author.photo}
                 alt={thread.author.username}
                 className="w-10 h-10 rounded-full"
               />
@@ -168,7 +168,7 @@ const ThreadDetailPage: React.FC = () => {
                     <div className="flex items-center space-x-3 mb-2">
                       {post.author.photo ? (
                         <img
-                          src={`http://localhost:8000/${post.author.photo}`}
+                          src={post.author.photo}
                           alt={post.author.username}
                           className="w-8 h-8 rounded-full"
                         />